@@ -0,0 +1,254 @@
+"""
+Benchmark de Latência de Inferência do BurnoutPredictor
+Execute: python benchmark_inference.py [--baseline resultados_anteriores.json]
+
+Mede p50/p95/p99 e throughput de `predict_batch` para cada runtime
+(keras, numpy em cada precisão, heurística), tamanho de batch e número
+de threads. Cada combinação runtime x threads roda em um subprocesso
+próprio, já que as bibliotecas de BLAS/TensorFlow só leem o número de
+threads na importação; isso também torna a medição "cold" real.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(BACKEND_DIR, "models", "burnout_predictor.h5")
+
+RUNTIMES = ["heuristic", "numpy-float32", "numpy-float16", "numpy-int8", "keras"]
+BATCH_SIZES = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024]
+
+THREAD_ENV_VARS = [
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "TF_NUM_INTRAOP_THREADS",
+    "TF_NUM_INTEROP_THREADS"
+]
+
+# ==================== WORKER ====================
+
+def make_predictor(runtime):
+    """Cria o BurnoutPredictor do runtime pedido, sem cache"""
+    from ml.burnoutpredictor import BurnoutPredictor
+
+    if runtime == "keras":
+        return BurnoutPredictor(model_path=MODEL_PATH, runtime="keras")
+    if runtime == "heuristic":
+        # Estado "loading" força o caminho da heurística
+        predictor = BurnoutPredictor(model_path=MODEL_PATH, runtime="numpy")
+        predictor.state = "loading"
+        return predictor
+    precision = runtime.split("-", 1)[1]
+    return BurnoutPredictor(model_path=MODEL_PATH, runtime="numpy", precision=precision)
+
+def measure(fn, min_time, min_iterations, max_iterations):
+    """Tempos (ms) de chamadas repetidas até `min_time` segundos"""
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_iterations:
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+        if len(timings) >= min_iterations and time.perf_counter() - started >= min_time:
+            break
+    return np.array(timings)
+
+def run_worker(runtime, threads, batch_sizes, min_time):
+    """Mede um runtime com o número de threads já fixado pelo ambiente"""
+    rng = np.random.default_rng(42)
+    features = rng.uniform(0, 10, (max(batch_sizes), 8)).astype(np.float32)
+
+    start = time.perf_counter()
+    predictor = make_predictor(runtime)
+    if runtime != "heuristic":
+        predictor.load_model()
+    load_ms = (time.perf_counter() - start) * 1000
+
+    # Cold: primeira chamada após a carga
+    start = time.perf_counter()
+    predictor.predict_batch(features[:1])
+    first_call_ms = (time.perf_counter() - start) * 1000
+
+    results = []
+    for batch_size in batch_sizes:
+        batch = features[:batch_size]
+        predictor.predict_batch(batch)  # aquecimento deste shape
+        timings = measure(
+            lambda: predictor.predict_batch(batch),
+            min_time=min_time, min_iterations=5, max_iterations=1000
+        )
+        results.append({
+            'runtime': runtime,
+            'threads': threads,
+            'batch_size': batch_size,
+            'iterations': len(timings),
+            'p50_ms': float(np.percentile(timings, 50)),
+            'p95_ms': float(np.percentile(timings, 95)),
+            'p99_ms': float(np.percentile(timings, 99)),
+            'throughput_per_s': float(batch_size * len(timings) / (timings.sum() / 1000))
+        })
+
+    return {
+        'cold': {
+            'runtime': runtime,
+            'threads': threads,
+            'load_ms': load_ms,
+            'first_call_ms': first_call_ms
+        },
+        'warm': results
+    }
+
+# ==================== ORQUESTRAÇÃO ====================
+
+def runtime_available(runtime):
+    """Runtimes sem artefato ou dependência instalada são pulados"""
+    from ml.numpy_runtime import default_weights_path
+
+    if runtime == "heuristic":
+        return True
+    if runtime == "keras":
+        return importlib.util.find_spec("tensorflow") is not None and os.path.exists(MODEL_PATH)
+    precision = runtime.split("-", 1)[1]
+    return os.path.exists(default_weights_path(MODEL_PATH, precision))
+
+def run_in_subprocess(runtime, threads, batch_sizes, min_time):
+    """Executa o worker em um processo novo com o número de threads fixado"""
+    env = dict(os.environ)
+    for var in THREAD_ENV_VARS:
+        env[var] = str(threads)
+    env["TF_CPP_MIN_LOG_LEVEL"] = "3"
+
+    command = [
+        sys.executable, os.path.abspath(__file__), "--worker",
+        "--runtimes", runtime,
+        "--threads", str(threads),
+        "--batch-sizes", ",".join(map(str, batch_sizes)),
+        "--min-time", str(min_time)
+    ]
+    completed = subprocess.run(
+        command, env=env, cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    # Última linha do stdout é o JSON (prints de carga vêm antes)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def compare_with_baseline(report, baseline, tolerance):
+    """Lista as medições com p50 acima de (1 + tolerance) x baseline"""
+    reference = {
+        (r['runtime'], r['threads'], r['batch_size']): r
+        for r in baseline.get('warm', [])
+    }
+    regressions = []
+    for result in report['warm']:
+        key = (result['runtime'], result['threads'], result['batch_size'])
+        base = reference.get(key)
+        if base is None:
+            continue
+        ratio = result['p50_ms'] / base['p50_ms'] if base['p50_ms'] else 1.0
+        if ratio > 1 + tolerance:
+            regressions.append({
+                'runtime': result['runtime'],
+                'threads': result['threads'],
+                'batch_size': result['batch_size'],
+                'baseline_p50_ms': base['p50_ms'],
+                'p50_ms': result['p50_ms'],
+                'ratio': ratio
+            })
+    return regressions
+
+def print_summary(report):
+    print("\n" + "=" * 72)
+    print(f"{'Runtime':<15}{'Thr':>4}{'Batch':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'amostras/s':>14}")
+    for r in report['warm']:
+        print(
+            f"{r['runtime']:<15}{r['threads']:>4}{r['batch_size']:>7}"
+            f"{r['p50_ms']:>8.2f}ms{r['p95_ms']:>8.2f}ms{r['p99_ms']:>8.2f}ms"
+            f"{r['throughput_per_s']:>14.0f}"
+        )
+    print("-" * 72)
+    for c in report['cold']:
+        print(
+            f"{c['runtime']:<15}{c['threads']:>4}  cold: carga {c['load_ms']:.0f}ms, "
+            f"primeira chamada {c['first_call_ms']:.1f}ms"
+        )
+    print("=" * 72)
+
+# ==================== MAIN ====================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de inferência do BurnoutPredictor")
+    parser.add_argument("--runtimes", default=",".join(RUNTIMES))
+    parser.add_argument("--batch-sizes", default=",".join(map(str, BATCH_SIZES)))
+    parser.add_argument("--threads", default="1,%d" % (os.cpu_count() or 1))
+    parser.add_argument("--min-time", type=float, default=0.5,
+                        help="segundos mínimos de medição por batch size")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="JSON de um run anterior para comparação")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="aumento relativo de p50 tolerado antes de acusar regressão")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    sys.path.insert(0, BACKEND_DIR)
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+
+    if args.worker:
+        result = run_worker(args.runtimes, int(args.threads), batch_sizes, args.min_time)
+        print(json.dumps(result))
+        sys.exit(0)
+
+    report = {
+        'meta': {
+            'date': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'cold': [],
+        'warm': []
+    }
+
+    for runtime in args.runtimes.split(","):
+        if not runtime_available(runtime):
+            print(f" Pulando {runtime}: artefato ou dependência ausente")
+            continue
+        for threads in sorted({int(t) for t in args.threads.split(",")}):
+            print(f" Medindo {runtime} com {threads} thread(s)...")
+            result = run_in_subprocess(runtime, threads, batch_sizes, args.min_time)
+            report['cold'].append(result['cold'])
+            report['warm'].extend(result['warm'])
+
+    print_summary(report)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(report, baseline, args.tolerance)
+        report['regressions'] = regressions
+        if regressions:
+            exit_code = 1
+            print(f"\n {len(regressions)} regressão(ões) acima de {args.tolerance:.0%}:")
+            for r in regressions:
+                print(
+                    f"   - {r['runtime']} threads={r['threads']} batch={r['batch_size']}: "
+                    f"{r['baseline_p50_ms']:.2f}ms -> {r['p50_ms']:.2f}ms ({r['ratio']:.2f}x)"
+                )
+        else:
+            print(f"\n Sem regressões em relação a {args.baseline}")
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f" Resultados salvos em: {args.output}")
+
+    sys.exit(exit_code)
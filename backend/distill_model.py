@@ -0,0 +1,269 @@
+"""
+Destilação do Modelo LSTM em Alunos Compactos
+Execute: python distill_model.py [--teacher models/burnout_predictor.h5] [--register 1.1.0-distilled]
+
+O professor (modelo de produção) gera saídas suavizadas por temperatura
+e cada aluno é treinado com uma combinação delas e dos rótulos reais.
+Os alunos usam só camadas LSTM/Dense, então o escolhido roda no runtime
+NumPy, no scoring incremental e nos pesos compartilhados sem mudanças.
+Para cada aluno são medidos concordância com o professor, acurácia e
+latência de inferência.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+from train_model import build_model, measure_latency
+from ml.dataset_cache import DEFAULT_CACHE_DIR, DatasetCache
+from ml.model_registry import DEFAULT_REGISTRY_DIR, MODEL_FILENAME, ModelRegistry
+from ml.numpy_runtime import PRECISIONS, NumpyLSTMModel, default_weights_path
+
+# Marca os diretórios criados por este script (os únicos que ele substitui)
+OUTPUT_MARKER = ".distilled"
+
+# Arquiteturas candidatas, da maior para a menor
+STUDENTS = {
+    'lstm32-d16': {'lstm_units': (32,), 'dense_units': (16,)},
+    'lstm16x8-d8': {'lstm_units': (16, 8), 'dense_units': (8,)},
+    'lstm16-d8': {'lstm_units': (16,), 'dense_units': (8,)},
+    'lstm8': {'lstm_units': (8,), 'dense_units': ()}
+}
+
+# ==================== DESTILAÇÃO ====================
+
+def soften(probs, temperature):
+    """Softmax das log-probabilidades divididas pela temperatura"""
+    logits = np.log(np.clip(probs, 1e-7, 1.0)) / temperature
+    logits -= logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return (exp / exp.sum(axis=1, keepdims=True)).astype(np.float32)
+
+def distillation_loss(temperature, alpha):
+    """
+    alpha * CE(rótulo) + (1 - alpha) * T² * KL(professor_T || aluno_T)
+
+    `y_true` concatena o one-hot real e as probabilidades suavizadas do
+    professor; o aluno mantém a saída softmax para ser drop-in.
+    """
+    def loss(y_true, y_pred):
+        hard, soft_teacher = y_true[:, :4], y_true[:, 4:]
+        y_pred = tf.clip_by_value(y_pred, 1e-7, 1.0)
+        log_student = tf.nn.log_softmax(tf.math.log(y_pred) / temperature)
+        soft_teacher = tf.clip_by_value(soft_teacher, 1e-7, 1.0)
+        hard_loss = keras.losses.categorical_crossentropy(hard, y_pred)
+        soft_loss = tf.reduce_sum(soft_teacher * (tf.math.log(soft_teacher) - log_student), axis=-1)
+        return alpha * hard_loss + (1 - alpha) * temperature ** 2 * soft_loss
+    return loss
+
+def hard_accuracy(y_true, y_pred):
+    return keras.metrics.categorical_accuracy(y_true[:, :4], y_pred)
+
+def transfer_set(X, rng, copies, noise):
+    """Dados de treino mais cópias perturbadas, rotuladas só pelo professor"""
+    scale = X.reshape(-1, X.shape[-1]).std(axis=0) * noise
+    jittered = [X + rng.normal(0, 1, X.shape).astype(np.float32) * scale for _ in range(copies)]
+    return np.concatenate([X] + jittered)
+
+def train_student(name, spec, X, y_hard, teacher_probs, X_val, y_val_true, args):
+    """Treina um aluno e devolve o modelo Keras"""
+    print(f"\n Treinando aluno {name}...")
+    student = build_model(
+        lstm_units=spec['lstm_units'], dense_units=spec['dense_units'],
+        lstm_dropout=0.0, dense_dropout=0.0, verbose=False
+    )
+    student.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=args.learning_rate),
+        loss=distillation_loss(args.temperature, args.alpha),
+        metrics=[hard_accuracy]
+    )
+    y_true = np.concatenate([y_hard, soften(teacher_probs, args.temperature)], axis=1)
+    student.fit(
+        X, y_true,
+        validation_data=(X_val, y_val_true),
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        callbacks=[keras.callbacks.EarlyStopping(monitor='val_loss', patience=3, restore_best_weights=True)],
+        verbose=2
+    )
+    return student
+
+# ==================== AVALIAÇÃO ====================
+
+def evaluate(name, numpy_model, X_test, labels, teacher_pred, teacher_probs, param_count):
+    """Concordância, acurácia e latência no runtime NumPy"""
+    probs = numpy_model.predict(X_test)
+    pred = np.argmax(probs, axis=1)
+    batch = X_test[:256]
+    return {
+        'model': name,
+        'param_count': int(param_count),
+        'agreement_with_teacher': float(np.mean(pred == teacher_pred)),
+        'test_accuracy': float(np.mean(pred == labels)),
+        'mean_abs_prob_diff': float(np.mean(np.abs(probs - teacher_probs))),
+        'single_latency_ms': measure_latency(numpy_model.predict, X_test[:1], repeats=50),
+        'batch_latency_per_sample_ms': measure_latency(numpy_model.predict, batch, repeats=10) / len(batch)
+    }
+
+def check_output_dir(directory):
+    """Recusa substituir um diretório com conteúdo que não veio de uma destilação"""
+    if (
+        os.path.isdir(directory) and os.listdir(directory)
+        and not os.path.exists(os.path.join(directory, OUTPUT_MARKER))
+    ):
+        raise SystemExit(
+            f" {directory} não está vazio e não é saída de uma destilação anterior "
+            f"(sem {OUTPUT_MARKER}); escolha outro --output-dir"
+        )
+    if os.path.exists(directory) and not os.path.isdir(directory):
+        raise SystemExit(f" {directory} existe e não é um diretório")
+
+
+def publish_student(student, directory):
+    """
+    Exporta o aluno em um diretório temporário e o move para `directory`
+
+    A saída anterior (já conferida por `check_output_dir`) só é removida
+    depois que a nova está completa.
+    """
+    directory = os.path.abspath(directory)
+    parent = os.path.dirname(directory)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".distill-", dir=parent)
+    try:
+        names = [os.path.basename(path) for path in export_student(student, staging)]
+        open(os.path.join(staging, OUTPUT_MARKER), "w").close()
+        check_output_dir(directory)
+        previous = None
+        if os.path.exists(directory):
+            previous = tempfile.mkdtemp(prefix=".distill-old-", dir=parent)
+            os.replace(directory, os.path.join(previous, "output"))
+        os.replace(staging, directory)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    if previous:
+        shutil.rmtree(previous, ignore_errors=True)
+    return [os.path.join(directory, name) for name in names]
+
+
+def export_student(student, directory):
+    """Salva o aluno com os mesmos nomes de artefato do modelo de produção"""
+    os.makedirs(directory, exist_ok=True)
+    h5_path = os.path.join(directory, MODEL_FILENAME)
+    # Loss padrão no .h5: a de destilação não é carregável por load_model
+    student.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+    student.save(h5_path)
+    numpy_model = NumpyLSTMModel.from_keras(student)
+    paths = [h5_path]
+    for precision in PRECISIONS:
+        path = default_weights_path(h5_path, precision)
+        numpy_model.save(path, precision=precision)
+        paths.append(path)
+    return paths
+
+# ==================== MAIN ====================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Destilação do modelo LSTM")
+    parser.add_argument("--teacher", default=os.path.join(BACKEND_DIR, "models", MODEL_FILENAME))
+    parser.add_argument("--students", default=",".join(STUDENTS))
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--transfer-copies", type=int, default=2,
+                        help="cópias com ruído do treino rotuladas pelo professor")
+    parser.add_argument("--noise", type=float, default=0.1,
+                        help="ruído das cópias, em desvios-padrão de cada feature")
+    parser.add_argument("--temperature", type=float, default=4.0)
+    parser.add_argument("--alpha", type=float, default=0.1, help="peso dos rótulos reais")
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=128)
+    parser.add_argument("--learning-rate", type=float, default=0.003)
+    parser.add_argument("--min-agreement", type=float, default=0.99)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dataset-cache", default=os.getenv("DATASET_CACHE_DIR", DEFAULT_CACHE_DIR))
+    parser.add_argument("--output-dir", default=os.path.join(BACKEND_DIR, "models", "distilled"))
+    parser.add_argument("--register", metavar="VERSION",
+                        help="registra o aluno escolhido como nova versão do modelo")
+    parser.add_argument("--report", default=os.path.join(BACKEND_DIR, "models", "distillation_report.json"))
+    args = parser.parse_args()
+    # Confere antes de treinar, para não descobrir o problema só no final
+    check_output_dir(args.output_dir)
+
+    keras.utils.set_random_seed(args.seed)
+    rng = np.random.default_rng(args.seed)
+
+    print(f"\n Professor: {args.teacher}")
+    teacher = keras.models.load_model(args.teacher, compile=False)
+    teacher_numpy = NumpyLSTMModel.from_keras(teacher)
+
+    data = DatasetCache(args.dataset_cache).load_or_generate(args.samples, seed=args.seed)
+    X_train, y_train = data.subset('train')
+    X_val, y_val = data.subset('val')
+    X_test, y_test = data.subset('test')
+
+    # Conjunto de transferência: o professor rotula também as cópias perturbadas
+    X_transfer = transfer_set(X_train, rng, args.transfer_copies, args.noise)
+    teacher_transfer = teacher_numpy.predict(X_transfer)
+    y_transfer = np.concatenate(
+        [y_train, np.eye(4, dtype=np.float32)[np.argmax(teacher_transfer[len(X_train):], axis=1)]]
+    )
+    y_val_true = np.concatenate([y_val, soften(teacher_numpy.predict(X_val), args.temperature)], axis=1)
+    print(f" Conjunto de transferência: {len(X_transfer):,} amostras")
+
+    labels = np.argmax(y_test, axis=1)
+    teacher_probs = teacher_numpy.predict(X_test)
+    teacher_pred = np.argmax(teacher_probs, axis=1)
+
+    report = [evaluate('teacher', teacher_numpy, X_test, labels, teacher_pred, teacher_probs,
+                       teacher.count_params())]
+    students = {}
+    for name in args.students.split(","):
+        student = train_student(name, STUDENTS[name], X_transfer, y_transfer, teacher_transfer,
+                                X_val, y_val_true, args)
+        students[name] = student
+        report.append(evaluate(name, NumpyLSTMModel.from_keras(student), X_test, labels,
+                               teacher_pred, teacher_probs, student.count_params()))
+
+    teacher_latency = report[0]['single_latency_ms']
+    print("\n" + "=" * 90)
+    print(f"{'Modelo':<14}{'Params':>9}{'Concord.':>10}{'Acc':>8}{'1 amostra':>12}"
+          f"{'lote/amostra':>15}{'Speedup':>10}")
+    for row in report:
+        row['speedup_vs_teacher'] = teacher_latency / row['single_latency_ms']
+        print(
+            f"{row['model']:<14}{row['param_count']:>9,}{row['agreement_with_teacher']:>10.4f}"
+            f"{row['test_accuracy']:>8.4f}{row['single_latency_ms']:>10.2f}ms"
+            f"{row['batch_latency_per_sample_ms']:>13.3f}ms{row['speedup_vs_teacher']:>9.1f}x"
+        )
+    print("=" * 90)
+
+    # Escolhido: o mais rápido entre os que concordam o bastante com o professor
+    eligible = [r for r in report[1:] if r['agreement_with_teacher'] >= args.min_agreement]
+    best = min(eligible, key=lambda r: r['single_latency_ms'], default=None)
+    result = {'teacher': args.teacher, 'config': vars(args), 'models': report, 'best': best}
+
+    if best is None:
+        print(f" Nenhum aluno atingiu concordância >= {args.min_agreement:.2%}")
+    else:
+        paths = publish_student(students[best['model']], args.output_dir)
+        print(f" Aluno escolhido: {best['model']} ({best['param_count']:,} parâmetros, "
+              f"{best['speedup_vs_teacher']:.1f}x mais rápido) -> {args.output_dir}")
+        if args.register:
+            registry = ModelRegistry(os.getenv("MODEL_REGISTRY_DIR", DEFAULT_REGISTRY_DIR))
+            registry.register(args.register, paths, metadata={'distilled_from': args.teacher, **best})
+            print(f" Registrado como versão {args.register}; ative com "
+                  f"POST /api/admin/models/{args.register}/activate")
+
+    with open(args.report, "w") as f:
+        json.dump(result, f, indent=2, default=list)
+    print(f" Relatório salvo em: {args.report}")
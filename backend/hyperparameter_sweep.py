@@ -0,0 +1,272 @@
+"""
+Sweep de Hiperparâmetros da Arquitetura LSTM
+Execute: python hyperparameter_sweep.py [--space espaco.json] [--parallel 4] [--target-accuracy 0.95]
+
+Cada trial treina uma variante de `build_model` (train_model.py) em um
+processo próprio, com as threads de CPU divididas entre os processos.
+Trials cujo val_loss fica acima da mediana dos demais na mesma época
+são interrompidos cedo. Para cada trial são registrados acurácia de
+teste, número de parâmetros e latência de inferência no runtime NumPy,
+e o resumo aponta o menor modelo que atinge a acurácia alvo.
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Valores de produção primeiro em cada lista
+SEARCH_SPACE = {
+    'lstm_units': [[128, 64, 32], [64, 32], [32, 16], [32]],
+    'lstm_dropout': [0.3, 0.2],
+    'dense_units': [[64, 32], [32], [16]],
+    'dense_dropout': [0.2],
+    'learning_rate': [0.001, 0.003],
+    'batch_size': [32, 64]
+}
+
+THREAD_ENV_VARS = [
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "TF_NUM_INTRAOP_THREADS",
+    "TF_NUM_INTEROP_THREADS"
+]
+
+# ==================== ESPAÇO DE BUSCA ====================
+
+def expand_space(space, trials=None, seed=42):
+    """Grade completa, ou `trials` combinações sorteadas dela"""
+    keys = list(space)
+    grid = [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+    if trials is None or trials >= len(grid):
+        return grid
+    rng = np.random.default_rng(seed)
+    return [grid[i] for i in sorted(rng.choice(len(grid), size=trials, replace=False))]
+
+# ==================== WORKER ====================
+
+def init_worker(threads):
+    """Fixa as threads de CPU antes de o TensorFlow ser importado"""
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    os.environ["TF_CPP_MIN_LOG_LEVEL"] = "3"
+    sys.path.insert(0, BACKEND_DIR)
+
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(threads)
+
+
+def make_pruning_callback(trial_id, history, warmup_epochs, min_trials):
+    """Callback Keras de poda pela mediana do val_loss por época"""
+    from tensorflow import keras
+
+    class MedianPruning(keras.callbacks.Callback):
+        pruned_at = None
+
+        def on_epoch_end(self, epoch, logs=None):
+            val_loss = float(logs['val_loss'])
+            # Proxy do Manager: a lista precisa ser reatribuída
+            history[trial_id] = history.get(trial_id, []) + [val_loss]
+            if epoch + 1 < warmup_epochs:
+                return
+            others = [
+                losses[epoch] for key, losses in history.items()
+                if key != trial_id and len(losses) > epoch
+            ]
+            if len(others) >= min_trials and val_loss > float(np.median(others)):
+                self.pruned_at = epoch + 1
+                self.model.stop_training = True
+
+    return MedianPruning()
+
+
+def run_trial(trial_id, params, config, history):
+    """Treina, avalia e mede um trial; devolve o registro do resultado"""
+    from tensorflow import keras
+    from ml.dataset_cache import DatasetCache
+    from ml.numpy_runtime import NumpyLSTMModel
+    from train_model import build_model, measure_latency
+
+    data = DatasetCache(config['dataset_cache']).load_or_generate(config['samples'], seed=config['seed'])
+    X_train, y_train = data.subset('train')
+    X_val, y_val = data.subset('val')
+    X_test, y_test = data.subset('test')
+
+    keras.utils.set_random_seed(config['seed'] + trial_id)
+    model = build_model(
+        lstm_units=params['lstm_units'],
+        lstm_dropout=params['lstm_dropout'],
+        dense_units=params['dense_units'],
+        dense_dropout=params['dense_dropout'],
+        learning_rate=params['learning_rate'],
+        verbose=False
+    )
+    pruning = make_pruning_callback(trial_id, history, config['warmup_epochs'], config['min_trials'])
+    early_stop = keras.callbacks.EarlyStopping(
+        monitor='val_loss', patience=config['patience'], restore_best_weights=True
+    )
+
+    start = time.perf_counter()
+    fit = model.fit(
+        X_train, y_train,
+        validation_data=(X_val, y_val),
+        epochs=config['epochs'],
+        batch_size=params['batch_size'],
+        callbacks=[early_stop, pruning],
+        verbose=0
+    )
+    train_seconds = time.perf_counter() - start
+
+    record = {
+        'trial': trial_id,
+        'params': params,
+        'status': 'pruned' if pruning.pruned_at else 'complete',
+        'epochs': len(fit.history['loss']),
+        'best_val_loss': float(min(fit.history['val_loss'])),
+        'val_accuracy': float(max(fit.history['val_accuracy'])),
+        'param_count': int(model.count_params()),
+        'train_seconds': train_seconds
+    }
+    if pruning.pruned_at:
+        return record
+
+    # Acurácia e latência no runtime de produção (NumPy, float32)
+    numpy_model = NumpyLSTMModel.from_keras(model)
+    X_test = X_test.astype(np.float32)
+    record['test_accuracy'] = float(np.mean(
+        np.argmax(numpy_model.predict(X_test), axis=1) == np.argmax(y_test, axis=1)
+    ))
+    record['single_latency_ms'] = measure_latency(numpy_model.predict, X_test[:1], repeats=50)
+    batch = X_test[:256]
+    record['batch_latency_per_sample_ms'] = measure_latency(numpy_model.predict, batch, repeats=10) / len(batch)
+    return record
+
+# ==================== RELATÓRIO ====================
+
+def smallest_meeting_target(trials, target):
+    """Trial completo com menos parâmetros e acurácia de teste >= target"""
+    eligible = [t for t in trials if t['status'] == 'complete' and t['test_accuracy'] >= target]
+    return min(eligible, key=lambda t: (t['param_count'], t['single_latency_ms']), default=None)
+
+
+def print_summary(trials, best, target):
+    print("\n" + "=" * 96)
+    print(f"{'#':>3} {'LSTM':<14}{'Dense':<10}{'lr':>7}{'bs':>5}{'Params':>9}"
+          f"{'Épocas':>8}{'Acc teste':>11}{'1 amostra':>12}  Status")
+    for t in sorted(trials, key=lambda t: t['param_count']):
+        p = t['params']
+        acc = f"{t['test_accuracy']:.4f}" if 'test_accuracy' in t else "-"
+        latency = f"{t['single_latency_ms']:.2f}ms" if 'single_latency_ms' in t else "-"
+        print(
+            f"{t['trial']:>3} {'/'.join(map(str, p['lstm_units'])):<14}"
+            f"{'/'.join(map(str, p['dense_units'])):<10}{p['learning_rate']:>7g}{p['batch_size']:>5}"
+            f"{t['param_count']:>9,}{t['epochs']:>8}{acc:>11}{latency:>12}  {t['status']}"
+        )
+    print("=" * 96)
+    if best:
+        print(f" Menor modelo com acurácia >= {target:.2%}: trial {best['trial']} "
+              f"({best['param_count']:,} parâmetros) -> {json.dumps(best['params'])}")
+    else:
+        print(f" Nenhum trial atingiu acurácia >= {target:.2%}")
+
+# ==================== MAIN ====================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep de hiperparâmetros do modelo LSTM")
+    parser.add_argument("--space", help="JSON {parâmetro: [valores]} (padrão: SEARCH_SPACE)")
+    parser.add_argument("--trials", type=int, help="sortear N combinações em vez da grade completa")
+    parser.add_argument("--parallel", type=int, default=2, help="trials simultâneos")
+    parser.add_argument("--samples", type=int, default=5000)
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--patience", type=int, default=5)
+    parser.add_argument("--warmup-epochs", type=int, default=3,
+                        help="épocas antes de um trial poder ser podado")
+    parser.add_argument("--min-trials", type=int, default=2,
+                        help="trials de referência necessários para podar")
+    parser.add_argument("--target-accuracy", type=float, default=0.95)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dataset-cache", default=os.getenv(
+        "DATASET_CACHE_DIR", os.path.join(BACKEND_DIR, "models", "datasets")))
+    parser.add_argument("--output", default="sweep_results.json")
+    args = parser.parse_args()
+
+    space = SEARCH_SPACE
+    if args.space:
+        with open(args.space) as f:
+            space = {**SEARCH_SPACE, **json.load(f)}
+    candidates = expand_space(space, args.trials, args.seed)
+
+    cpu_count = os.cpu_count() or 1
+    parallel = max(1, min(args.parallel, len(candidates)))
+    threads = max(1, cpu_count // parallel)
+    config = {
+        'samples': args.samples,
+        'seed': args.seed,
+        'epochs': args.epochs,
+        'patience': args.patience,
+        'warmup_epochs': args.warmup_epochs,
+        'min_trials': args.min_trials,
+        'dataset_cache': args.dataset_cache
+    }
+
+    # Gera o dataset uma vez antes de abrir os workers
+    sys.path.insert(0, BACKEND_DIR)
+    from ml.dataset_cache import DatasetCache
+    DatasetCache(args.dataset_cache).load_or_generate(args.samples, seed=args.seed)
+
+    print(f" {len(candidates)} trial(s), {parallel} em paralelo, {threads} thread(s) cada")
+
+    trials = []
+    context = multiprocessing.get_context("spawn")  # TensorFlow não é fork-safe
+    with context.Manager() as manager:
+        history = manager.dict()
+        with ProcessPoolExecutor(parallel, mp_context=context,
+                                 initializer=init_worker, initargs=(threads,)) as pool:
+            futures = {
+                pool.submit(run_trial, trial_id, params, config, history): trial_id
+                for trial_id, params in enumerate(candidates)
+            }
+            for future in as_completed(futures):
+                trial_id = futures[future]
+                try:
+                    record = future.result()
+                except Exception as e:
+                    record = {'trial': trial_id, 'params': candidates[trial_id],
+                              'status': 'failed', 'error': str(e), 'param_count': 0, 'epochs': 0}
+                trials.append(record)
+                summary = (f"acc={record['test_accuracy']:.4f}" if 'test_accuracy' in record
+                           else record['status'])
+                print(f"   - trial {trial_id}: {summary} ({len(trials)}/{len(candidates)})")
+
+    best = smallest_meeting_target(trials, args.target_accuracy)
+    print_summary(trials, best, args.target_accuracy)
+
+    report = {
+        'meta': {
+            'date': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'cpu_count': cpu_count,
+            'parallel': parallel,
+            'threads_per_trial': threads,
+            'target_accuracy': args.target_accuracy,
+            **config
+        },
+        'space': space,
+        'best': best,
+        'trials': sorted(trials, key=lambda t: t['trial'])
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f" Resultados salvos em: {args.output}")
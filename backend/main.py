@@ -2,19 +2,36 @@
 OÁSÎS Backend - API Principal
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
 from typing import List, Optional
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import uvicorn
+import os
+import json
+import asyncio
+from tempfile import SpooledTemporaryFile
 
 # Importações locais
-from ml.burnout_predictor import BurnoutPredictor
+from ml.burnoutpredictor import BurnoutPredictor
 from services.calendar_service import CalendarService
 from services.notification_service import NotificationService
 from services.ai_generator import AIMessageGenerator
+from ml.micro_batcher import MicroBatcher
+from ml.incremental_lstm import StaleDayError
+from ml.model_registry import BACKEND_DIR, DEFAULT_REGISTRY_DIR, ActivationBackoff, ModelRegistry
+from ml.labeled_samples import DEFAULT_SAMPLES_DIR, LabeledSampleStore
+from ml.synthetic_data import CLASS_NAMES
+from ml.inference_executor import (
+    InferenceExecutor, InferenceQueueFull, init_worker_predictor, worker_predict_batch
+)
+from services import bulk_scoring
+from services.prediction_store import RESOLUTIONS as ROLLUP_RESOLUTIONS, STATUSES as STATUS_NAMES, PredictionStore
+from services.score_matrix import NO_SCORE, ScoreMatrix, status_codes, status_for
+from services.team_health import TeamAggregates, TeamIndex
 
 # Inicialização
 app = FastAPI(
@@ -32,17 +49,99 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Caminhos relativos são resolvidos a partir de backend/, não do diretório atual
+MODEL_PATH = os.path.join(BACKEND_DIR, os.getenv("MODEL_PATH", "models/burnout_predictor.h5"))
+
+# Registro de modelos versionados
+model_registry = ModelRegistry(
+    os.path.join(BACKEND_DIR, os.getenv("MODEL_REGISTRY_DIR", DEFAULT_REGISTRY_DIR))
+)
+MODEL_VERSION = os.getenv("MODEL_VERSION")
+# Intervalo em que cada processo confere a versão ativa do registro
+MODEL_ACTIVE_POLL_SECONDS = float(os.getenv("MODEL_ACTIVE_POLL_SECONDS", "5"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# Janelas reais rotuladas para fine-tuning (python -m ml.fine_tuning)
+labeled_samples = LabeledSampleStore(
+    os.path.join(BACKEND_DIR, os.getenv("LABELED_SAMPLES_DIR", DEFAULT_SAMPLES_DIR)),
+    flush_every=int(os.getenv("LABELED_SAMPLES_FLUSH_EVERY", "256"))
+)
+
 # Serviços
-burnout_predictor = BurnoutPredictor()
+predictor_config = dict(
+    model_path=MODEL_PATH,
+    incremental_recompute_days=int(os.getenv("INCREMENTAL_RECOMPUTE_DAYS", "7")),
+    runtime=os.getenv("MODEL_RUNTIME", "keras"),
+    precision=os.getenv("MODEL_PRECISION", "float32"),
+    shared_weights_path=os.getenv("MODEL_SHARED_WEIGHTS") or None,
+    cache_size=int(os.getenv("PREDICT_CACHE_SIZE", "10000")),
+    cache_ttl_seconds=float(os.getenv("PREDICT_CACHE_TTL_SECONDS", "3600")),
+    daily_features_path=os.path.join(
+        BACKEND_DIR, os.getenv("DAILY_FEATURES_DB_PATH", "data/daily_features.db")
+    )
+)
+burnout_predictor = BurnoutPredictor(**predictor_config)
 calendar_service = CalendarService()
 notification_service = NotificationService()
 ai_generator = AIMessageGenerator()
 
+# Executor de inferência (mantém o event loop livre durante o forward pass)
+inference_executor = InferenceExecutor(
+    max_workers=int(os.getenv("INFERENCE_WORKERS", "2")),
+    max_pending=int(os.getenv("INFERENCE_MAX_PENDING", "64")),
+    kind=os.getenv("INFERENCE_POOL", "thread"),
+    initializer=init_worker_predictor,
+    initargs=(predictor_config, model_registry.root, MODEL_VERSION, MODEL_ACTIVE_POLL_SECONDS)
+)
+
+# No modo processo cada worker tem seu próprio modelo
+predict_batch_fn = (
+    worker_predict_batch if inference_executor.kind == "process"
+    else burnout_predictor.predict_batch
+)
+
+# Micro-batching de inferência
+predict_batcher = MicroBatcher(
+    predict_fn=predict_batch_fn,
+    max_batch_size=int(os.getenv("PREDICT_MAX_BATCH_SIZE", "32")),
+    max_wait_ms=float(os.getenv("PREDICT_MAX_WAIT_MS", "5")),
+    executor=inference_executor
+)
+
+# Tamanho do bloco de inferência do scoring em lote
+BATCH_PREDICT_CHUNK_SIZE = int(os.getenv("BATCH_PREDICT_CHUNK_SIZE", "256"))
+
+# Histórico de predições (SQLite local, gravado em group commit)
+prediction_store = PredictionStore(
+    os.path.join(BACKEND_DIR, os.getenv("PREDICTION_DB_PATH", "data/predictions.db")),
+    flush_interval=float(os.getenv("PREDICTION_FLUSH_MS", "50")) / 1000,
+    max_batch=int(os.getenv("PREDICTION_FLUSH_MAX_BATCH", "1000"))
+)
+
+# Limites do histórico: período máximo e tamanho das páginas em raw
+HISTORY_MAX_DAYS = int(os.getenv("HISTORY_MAX_DAYS", "3650"))
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "500"))
+HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "5000"))
+
+# Último score diário de cada usuário em memória (leituras quentes)
+score_matrix = ScoreMatrix(days=int(os.getenv("SCORE_MATRIX_DAYS", "365")))
+
+# Membros das equipes (SQLite local) e parâmetros do dashboard
+team_index = TeamIndex(os.path.join(BACKEND_DIR, os.getenv("TEAM_DB_PATH", "data/teams.db")))
+TEAM_SCORE_MAX_AGE_DAYS = int(os.getenv("TEAM_SCORE_MAX_AGE_DAYS", "7"))
+TEAM_ALERT_TOP_K = int(os.getenv("TEAM_ALERT_TOP_K", "20"))
+TEAM_RECONCILE_SECONDS = float(os.getenv("TEAM_RECONCILE_SECONDS", "300"))
+SCORE_MATRIX_REFRESH_SECONDS = float(os.getenv("SCORE_MATRIX_REFRESH_SECONDS", "300"))
+
+# Agregados por equipe atualizados a cada score gravado (reconciliados pelo SQLite)
+team_aggregates = TeamAggregates(
+    team_index, prediction_store, max_age_days=TEAM_SCORE_MAX_AGE_DAYS, top_k=TEAM_ALERT_TOP_K
+)
+
 # ==================== MODELS ====================
 
-class UserWorkData(BaseModel):
-    """Dados de trabalho do usuário"""
-    user_id: str
+class WorkDayData(BaseModel):
+    """Features de um dia de trabalho"""
     hours_worked: float
     meetings_count: int
     avg_time_between_breaks: float
@@ -52,6 +151,24 @@ class UserWorkData(BaseModel):
     meeting_overlap_rate: float
     response_time_after_hours: float
 
+class UserWorkData(WorkDayData):
+    """Dados de trabalho do usuário"""
+    user_id: str
+
+class DailyWorkData(UserWorkData):
+    """Um dia de trabalho do usuário (hoje, se `day` não for enviado)"""
+    day: Optional[date] = None
+
+class LabeledWindowRequest(BaseModel):
+    """Janela de dias de um usuário com o status confirmado"""
+    user_id: str
+    label: str
+    days: List[WorkDayData]
+
+class TeamMembersRequest(BaseModel):
+    """Lista completa de membros de uma equipe"""
+    user_ids: List[str]
+
 class BurnoutPredictionResponse(BaseModel):
     """Resposta da predição"""
     score: int
@@ -85,6 +202,20 @@ async def root():
         "version": "1.0.0"
     }
 
+@app.get("/health/live")
+async def liveness():
+    """Liveness: o processo está respondendo"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness: 200 só depois que o modelo LSTM estiver carregado"""
+    model = burnout_predictor.status()
+    return JSONResponse(
+        status_code=200 if model['ready'] else 503,
+        content={"status": "ready" if model['ready'] else "warming_up", "model": model}
+    )
+
 @app.post("/api/ml/predict", response_model=BurnoutPredictionResponse)
 async def predict_burnout(work_data: UserWorkData):
     """
@@ -92,30 +223,17 @@ async def predict_burnout(work_data: UserWorkData):
     """
     try:
         # Prepara features
-        features = np.array([
-            work_data.hours_worked,
-            work_data.meetings_count,
-            work_data.avg_time_between_breaks,
-            float(work_data.night_work),
-            float(work_data.weekend_work),
-            work_data.avg_meeting_duration,
-            work_data.meeting_overlap_rate,
-            work_data.response_time_after_hours
-        ])
+        features = bulk_scoring.records_to_matrix([work_data])[0]
         
-        # Predição
-        prediction = burnout_predictor.predict(features)
+        # Predição (cache ou agrupada com requisições concorrentes)
+        prediction = burnout_predictor.get_cached(features)
+        if prediction is None:
+            prediction = await predict_batcher.submit(features)
         
         # Status
         score = prediction['score']
-        if score < 30:
-            status = "Saudável"
-        elif score < 60:
-            status = "Atenção"
-        elif score < 80:
-            status = "Risco"
-        else:
-            status = "Crítico"
+        status = _get_status(score)
+        _record_predictions([work_data.user_id], [prediction])
         
         # Recomendações
         recommendations = ai_generator.generate_recommendations(
@@ -131,36 +249,212 @@ async def predict_burnout(work_data: UserWorkData):
             trend=prediction['trend']
         )
         
+    except InferenceQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/ml/history/{user_id}")
-async def get_history(user_id: str, days: int = 30):
-    """Retorna histórico"""
-    history = []
-    for i in range(days):
-        date = datetime.now() - timedelta(days=days - i)
-        score = 40 + i + np.random.randint(-5, 5)
+@app.post("/api/ml/predict/batch")
+async def predict_burnout_batch(request: Request):
+    """
+    Prediz risco de burnout em lote
+    
+    Aceita um array JSON ou NDJSON de UserWorkData (no corpo ou como
+    upload multipart no campo `file`) e responde em NDJSON, uma linha
+    por usuário, à medida que cada bloco é processado.
+    """
+    content_type = request.headers.get("content-type", "")
+    
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Campo 'file' ausente")
+    else:
+        # O corpo precisa ser consumido antes da resposta começar
+        # (o StreamingResponse disputa o canal `receive` da requisição)
+        upload = await _spool_body(request)
+    
+    records = bulk_scoring.iter_records(_iter_upload(upload))
+    
+    return StreamingResponse(
+        _stream_batch_predictions(records),
+        media_type="application/x-ndjson"
+    )
+
+@app.post("/api/ml/predict/daily", response_model=BurnoutPredictionResponse)
+async def predict_burnout_daily(work_data: DailyWorkData):
+    """
+    Atualiza a predição com um novo dia de dados
+    
+    Avança o LSTM um único timestep a partir do estado salvo do usuário,
+    em vez de reprocessar a janela de 30 dias. Reenviar o mesmo `day`
+    substitui aquele dia (retries não avançam o estado); um dia anterior
+    ao último processado é rejeitado com 409.
+    """
+    try:
+        features = bulk_scoring.records_to_matrix([work_data])
+        predictions = await inference_executor.run(
+            burnout_predictor.predict_incremental,
+            [work_data.user_id],
+            features,
+            [work_data.day],
+            stateful=True
+        )
+        prediction = predictions[0]
         
-        if score < 30:
-            status = "Saudável"
-        elif score < 60:
-            status = "Atenção"
-        elif score < 80:
-            status = "Risco"
-        else:
-            status = "Crítico"
+        score = prediction['score']
+        _record_predictions([work_data.user_id], [prediction], day=work_data.day)
         
-        history.append({
-            'date': date.strftime('%Y-%m-%d'),
-            'score': min(score, 100),
-            'status': status
-        })
+        recommendations = ai_generator.generate_recommendations(
+            score=score,
+            work_pattern=work_data.dict()
+        )
+        
+        return BurnoutPredictionResponse(
+            score=score,
+            status=_get_status(score),
+            confidence=prediction['confidence'],
+            recommendations=recommendations,
+            trend=prediction['trend']
+        )
+    except InferenceQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except StaleDayError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/ml/inference/stats")
+async def get_inference_stats():
+    """Métricas do executor de inferência e do micro-batching"""
+    return {
+        "executor": inference_executor.stats(),
+        "batcher": predict_batcher.stats(),
+        # No modo processo o cache de cada worker fica no próprio worker
+        "cache": (
+            burnout_predictor.cache.stats()
+            if burnout_predictor.cache and inference_executor.kind != "process" else None
+        ),
+        "history_store": prediction_store.stats(),
+        "score_matrix": score_matrix.stats(),
+        "teams": {**team_index.stats(), "aggregates": team_aggregates.stats()}
+    }
+
+@app.post("/api/ml/feedback", status_code=202)
+async def submit_labeled_window(request: LabeledWindowRequest):
+    """
+    Registra uma janela real rotulada para o próximo fine-tuning
+    
+    `days` vai do mais antigo ao mais recente; janelas com menos de 30
+    dias são completadas repetindo o primeiro dia.
+    """
+    if request.label not in CLASS_NAMES:
+        raise HTTPException(status_code=422, detail=f"label deve ser um de {CLASS_NAMES}")
+    sequence_length = burnout_predictor.sequence_length
+    if not 1 <= len(request.days) <= sequence_length:
+        raise HTTPException(status_code=422, detail=f"days deve ter de 1 a {sequence_length} dias")
+    
+    window = bulk_scoring.records_to_matrix(request.days)
+    window = np.pad(window, ((sequence_length - len(window), 0), (0, 0)), mode='edge')
+    labeled_samples.append([request.user_id], window[np.newaxis], [CLASS_NAMES.index(request.label)])
+    return {"status": "accepted", "pending": labeled_samples.pending()}
+
+@app.get("/api/ml/history/{user_id}")
+async def get_history(
+    user_id: str,
+    days: int = 30,
+    resolution: str = "raw",
+    limit: int = HISTORY_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    stream: Optional[str] = None
+):
+    """
+    Retorna as predições registradas do usuário nos últimos `days` dias
+    
+    `resolution` = raw (cada predição) ou day, week, month: um ponto
+    pré-agregado por período (mín, máx, média, último score e contagem
+    por status).
+    
+    Em raw a resposta é paginada: até `limit` predições, da mais antiga
+    para a mais nova, e `next_cursor` para pedir a página seguinte (um
+    cursor em outro formato é rejeitado com 400). Para
+    exportar o período inteiro use `stream=ndjson` (uma predição por
+    linha) ou `stream=json` (mesmo formato da resposta, sem paginação),
+    gerados em blocos direto do banco.
+    """
+    if not 1 <= days <= HISTORY_MAX_DAYS:
+        raise HTTPException(status_code=422, detail=f"days deve estar entre 1 e {HISTORY_MAX_DAYS}")
+    if resolution != "raw" and resolution not in ROLLUP_RESOLUTIONS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"resolution deve ser raw ou um de {list(ROLLUP_RESOLUTIONS)}"
+        )
+    if not 1 <= limit <= HISTORY_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=422, detail=f"limit deve estar entre 1 e {HISTORY_MAX_PAGE_SIZE}")
+    if stream is not None and (stream not in ("ndjson", "json") or resolution != "raw"):
+        raise HTTPException(status_code=422, detail="stream deve ser ndjson ou json, com resolution=raw")
+    
+    start_ms = int((datetime.now() - timedelta(days=days)).timestamp() * 1000)
+    
+    if resolution != "raw":
+        points = await asyncio.to_thread(prediction_store.rollups, user_id, resolution, start_ms)
+        return {
+            "user_id": user_id,
+            "period_days": days,
+            "resolution": resolution,
+            "points": points
+        }
+    
+    if stream is not None:
+        header = {"user_id": user_id, "period_days": days, "resolution": resolution}
+        return StreamingResponse(
+            _stream_history(prediction_store.iter_history(user_id, start_ms), stream, header),
+            media_type="application/x-ndjson" if stream == "ndjson" else "application/json"
+        )
+    
+    # Cursor = "<ts_ms>:<seq>" da última predição da página anterior
+    after = None
+    if cursor is not None:
+        try:
+            ts_ms, seq = cursor.split(":")
+            after = (int(ts_ms), int(seq))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="cursor inválido: use o next_cursor da página anterior")
+    
+    rows = await asyncio.to_thread(prediction_store.history, user_id, start_ms, None, limit + 1, after)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
     
     return {
         "user_id": user_id,
         "period_days": days,
-        "predictions": history
+        "resolution": resolution,
+        "predictions": [_format_history_row(row) for row in rows],
+        "next_cursor": f"{rows[-1]['ts_ms']}:{rows[-1]['seq']}" if has_more else None
+    }
+
+@app.get("/api/ml/scores/{user_id}")
+async def get_daily_scores(user_id: str, days: int = 30):
+    """
+    Último score de cada dia do usuário, direto da matriz em memória
+    
+    Resposta compacta para sparklines: `scores[i]` é o dia
+    `start_date + i` (null quando não houve predição).
+    """
+    if not 1 <= days <= score_matrix.days:
+        raise HTTPException(status_code=422, detail=f"days deve estar entre 1 e {score_matrix.days}")
+    
+    window = score_matrix.user_window(user_id, days)
+    if window is None:
+        raise HTTPException(status_code=404, detail=f"Sem predições para {user_id}")
+    
+    codes = status_codes(window)
+    return {
+        "user_id": user_id,
+        "start_date": score_matrix.window_start(days).isoformat(),
+        "scores": [None if s == NO_SCORE else int(s) for s in window],
+        "statuses": [None if c < 0 else STATUS_NAMES[c] for c in codes]
     }
 
 @app.post("/api/calendar/protect-time")
@@ -258,32 +552,41 @@ async def complete_ritual(ritual_id: str, user_id: str, silence_hours: int = 12)
 
 @app.get("/api/team/health/{team_id}")
 async def get_team_health(team_id: str):
-    """Dashboard de equipe"""
-    # Simula dados da equipe
-    team_data = [
-        {'score': 25, 'status': 'Saudável'},
-        {'score': 45, 'status': 'Atenção'},
-        {'score': 72, 'status': 'Risco'},
-        {'score': 30, 'status': 'Saudável'},
-        {'score': 55, 'status': 'Atenção'},
-    ]
-    
-    overall_score = int(np.mean([m['score'] for m in team_data]))
-    
-    distribution = {
-        "Saudável": sum(1 for m in team_data if m['status'] == 'Saudável'),
-        "Atenção": sum(1 for m in team_data if m['status'] == 'Atenção'),
-        "Risco": sum(1 for m in team_data if m['status'] == 'Risco'),
-        "Crítico": 0
-    }
+    """
+    Dashboard de equipe
+    
+    Usa o score mais recente de cada membro nos últimos
+    TEAM_SCORE_MAX_AGE_DAYS dias; membros sem predição no período ficam
+    fora do score e da distribuição. Lê o snapshot mantido a cada score
+    gravado e reconciliado a cada TEAM_RECONCILE_SECONDS.
+    """
+    health = await asyncio.to_thread(team_aggregates.snapshot, team_id)
+    if health is None:
+        raise HTTPException(status_code=404, detail=f"Equipe {team_id} não encontrada")
+    
+    distribution = health['distribution']
+    overall_score = health['overall_score'] or 0
     
     alerts = []
+    if distribution["Crítico"] > 0:
+        alerts.append({
+            "severity": "critical",
+            "message": f"{distribution['Crítico']} membro(s) em estado crítico",
+            "action": "Converse individualmente ainda hoje"
+        })
     if distribution["Risco"] > 0:
         alerts.append({
             "severity": "high",
             "message": f"{distribution['Risco']} membro(s) em risco",
             "action": "Considere redistribuir carga"
         })
+    without_score = health['members'] - health['members_with_score']
+    if without_score > 0:
+        alerts.append({
+            "severity": "info",
+            "message": f"{without_score} membro(s) sem predição nos últimos {TEAM_SCORE_MAX_AGE_DAYS} dias",
+            "action": "Verifique a integração de dados desses membros"
+        })
     
     recommendations = ai_generator.generate_team_recommendations(
         overall_score, distribution
@@ -292,20 +595,300 @@ async def get_team_health(team_id: str):
     return {
         "overall_score": overall_score,
         "status_distribution": distribution,
+        "percentiles": health['percentiles'],
+        "members": health['members'],
+        "members_with_score": health['members_with_score'],
+        "at_risk_members": health['at_risk_members'],
         "alerts": alerts,
         "recommendations": recommendations
     }
 
+@app.put("/api/team/{team_id}/members")
+async def set_team_members(
+    team_id: str,
+    request: TeamMembersRequest,
+    x_admin_token: Optional[str] = Header(None)
+):
+    """Substitui os membros da equipe (lista vazia remove a equipe)"""
+    _check_admin(x_admin_token)
+    await asyncio.to_thread(team_index.set_members, team_id, request.user_ids)
+    await asyncio.to_thread(team_aggregates.rebuild, team_id)
+    members = team_index.members(team_id)
+    return {"team_id": team_id, "members": 0 if members is None else len(members)}
+
+# ==================== ADMIN ====================
+
+@app.get("/api/admin/models")
+async def list_model_versions(x_admin_token: Optional[str] = Header(None)):
+    """Lista as versões registradas e a versão ativa"""
+    _check_admin(x_admin_token)
+    return {
+        "active": burnout_predictor.status(),
+        "versions": [model_registry.manifest(v) for v in model_registry.versions()]
+    }
+
+@app.post("/api/admin/models/{version}/activate", status_code=202)
+async def activate_model_version(version: str, x_admin_token: Optional[str] = Header(None)):
+    """
+    Carrega uma versão em background e troca o modelo sem downtime
+    
+    Acompanhe pelo `pending_version`/`swap_error` em GET /api/admin/models.
+    Depois da troca a versão vira a ativa do registro, e os demais
+    processos (workers do serve.py e do pool) a seguem em até
+    MODEL_ACTIVE_POLL_SECONDS.
+    """
+    _check_admin(x_admin_token)
+    if not model_registry.exists(version):
+        raise HTTPException(status_code=404, detail=f"Versão {version} não encontrada")
+    
+    swap = getattr(app.state, "model_swap", None)
+    if swap is not None and not swap.done():
+        raise HTTPException(status_code=409, detail="Troca de modelo já em andamento")
+    
+    app.state.model_swap = asyncio.create_task(_activate_version(version, publish=True))
+    return {"status": "loading", "version": version}
+
+# ==================== HELPERS ====================
+
+def _check_admin(token: Optional[str]):
+    """Valida o token de admin (sem ADMIN_TOKEN configurado, recusa tudo)"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=503, detail="Endpoints de admin desabilitados: ADMIN_TOKEN não configurado")
+    if token != ADMIN_TOKEN:
+        raise HTTPException(status_code=401, detail="Token de admin inválido")
+
+async def _activate_version(version: str, publish: bool = False):
+    """
+    Carrega e ativa uma versão do registro fora do event loop
+    
+    Com `publish`, grava a versão como ativa no registro após a troca.
+    """
+    try:
+        await asyncio.to_thread(burnout_predictor.activate_version, model_registry, version)
+        if publish:
+            model_registry.set_active(version)
+    except Exception as e:
+        print(f" Falha ao ativar a versão {version}: {e}")
+
+async def _follow_active_version():
+    """Segue a versão ativa do registro, trocada por outro processo"""
+    await asyncio.wait([app.state.model_warmup])
+    backoff = ActivationBackoff()  # versão que falhou: nova tentativa com espera crescente
+    while True:
+        await asyncio.sleep(MODEL_ACTIVE_POLL_SECONDS)
+        swap = getattr(app.state, "model_swap", None)
+        if swap is not None and not swap.done():
+            continue
+        version = await asyncio.to_thread(model_registry.active)
+        if version in (None, burnout_predictor.version) or not backoff.ready(version):
+            continue
+        app.state.model_swap = asyncio.create_task(_activate_version(version))
+        await app.state.model_swap
+        if burnout_predictor.version == version:
+            backoff.succeeded(version)
+        else:
+            backoff.failed(version)
+
+def _record_predictions(user_ids: List[str], predictions: List[dict], day: Optional[date] = None):
+    """
+    Enfileira as predições no histórico (gravadas em background)
+
+    Um `day` anterior a hoje (reprocessamento) é gravado no fim daquele
+    dia e não altera os agregados das equipes, que refletem o score atual.
+    """
+    backfill = day is not None and day < date.today()
+    ts_ms = None
+    if backfill:
+        end_of_day = datetime.combine(day + timedelta(days=1), datetime.min.time())
+        ts_ms = int(end_of_day.timestamp() * 1000) - 1
+    scores = [p['score'] for p in predictions]
+    score_matrix.record(user_ids, scores, day=day if backfill else None)
+    # Antes dos agregados: uma reconstrução concorrente já lê estes scores do banco
+    prediction_store.record(
+        user_ids,
+        scores,
+        [_get_status(score) for score in scores],
+        [p['confidence'] for p in predictions],
+        model_version=burnout_predictor.version,
+        ts_ms=ts_ms
+    )
+    if not backfill:
+        team_aggregates.update(user_ids, scores)
+
+def _get_status(score: int) -> str:
+    """Converte score em status"""
+    return status_for(score)
+
+def _load_score_matrix():
+    """Preenche a matriz em memória com os agregados diários do SQLite"""
+    start = datetime.now() - timedelta(days=score_matrix.days)
+    score_matrix.load(prediction_store.daily_last_scores(int(start.timestamp() * 1000)))
+
+async def _refresh_score_matrix():
+    """Recarrega a matriz do SQLite periodicamente (inclui scores de outros workers)"""
+    first = True
+    while True:
+        try:
+            await asyncio.to_thread(_load_score_matrix)
+            if first:
+                print(f" Matriz de scores carregada: {score_matrix.stats()['users']} usuário(s)")
+                first = False
+        except Exception as e:
+            print(f" Falha ao recarregar a matriz de scores: {e}")
+        await asyncio.sleep(SCORE_MATRIX_REFRESH_SECONDS)
+
+async def _reconcile_team_aggregates():
+    """Recalcula os agregados das equipes a partir do SQLite, periodicamente"""
+    while True:
+        try:
+            drifted = await asyncio.to_thread(team_aggregates.reconcile)
+            if drifted:
+                print(f" Agregados de {drifted} equipe(s) corrigidos na reconciliação")
+        except Exception as e:
+            print(f" Falha ao reconciliar equipes: {e}")
+        await asyncio.sleep(TEAM_RECONCILE_SECONDS)
+
+async def _spool_body(request: Request) -> UploadFile:
+    """Copia o corpo da requisição para um arquivo temporário (RAM até 1MB)"""
+    spool = SpooledTemporaryFile(max_size=1024 * 1024)
+    upload = UploadFile(file=spool)
+    async for chunk in request.stream():
+        await upload.write(chunk)
+    await upload.seek(0)
+    return upload
+
+async def _iter_upload(upload, chunk_size: int = 64 * 1024):
+    """Lê um arquivo enviado em blocos"""
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+def _format_history_row(row):
+    timestamp = datetime.fromtimestamp(row['ts_ms'] / 1000)
+    return {
+        'date': timestamp.strftime('%Y-%m-%d'),
+        'timestamp': timestamp.isoformat(timespec='milliseconds'),
+        'score': row['score'],
+        'status': row['status'],
+        'confidence': row['confidence']
+    }
+
+def _stream_history(blocks, mode, header):
+    """
+    Serializa o histórico bloco a bloco (NDJSON ou um objeto JSON)
+    
+    Gerador síncrono: o StreamingResponse o consome em uma thread, então
+    a leitura do SQLite não bloqueia o event loop.
+    """
+    if mode == "json":
+        yield json.dumps(header)[:-1] + ', "predictions": ['
+    first = True
+    for block in blocks:
+        rows = [json.dumps(_format_history_row(row)) for row in block]
+        if mode == "ndjson":
+            yield "\n".join(rows) + "\n"
+        else:
+            yield ("" if first else ",") + ",".join(rows)
+        first = False
+    if mode == "json":
+        yield "]}"
+
+async def _stream_batch_predictions(records):
+    """Gera uma linha NDJSON por usuário, bloco a bloco"""
+    try:
+        async for chunk in bulk_scoring.iter_chunks(records, BATCH_PREDICT_CHUNK_SIZE):
+            valid = []
+            lines = {}
+            
+            for index, record in chunk:
+                if isinstance(record, bulk_scoring.InvalidRecord):
+                    lines[index] = {"index": index, "error": record.error}
+                    continue
+                try:
+                    valid.append((index, UserWorkData(**record)))
+                except (ValidationError, TypeError) as e:
+                    lines[index] = {"index": index, "error": str(e)}
+            
+            if valid:
+                features = bulk_scoring.records_to_matrix([data for _, data in valid])
+                predictions = await inference_executor.run(predict_batch_fn, features)
+                _record_predictions([data.user_id for _, data in valid], predictions)
+                
+                for (index, work_data), prediction in zip(valid, predictions):
+                    score = prediction['score']
+                    lines[index] = {
+                        "index": index,
+                        "user_id": work_data.user_id,
+                        "score": score,
+                        "status": _get_status(score),
+                        "confidence": prediction['confidence'],
+                        "recommendations": ai_generator.generate_recommendations(
+                            score=score,
+                            work_pattern=work_data.dict()
+                        ),
+                        "trend": prediction['trend']
+                    }
+            
+            yield "".join(
+                json.dumps(lines[index], ensure_ascii=False) + "\n"
+                for index, _ in chunk
+            )
+    except Exception as e:
+        # O status HTTP já foi enviado: reporta o erro como última linha
+        yield json.dumps({"error": str(e) or type(e).__name__}, ensure_ascii=False) + "\n"
+
+async def _warm_up_model():
+    """Carrega o modelo fora do event loop"""
+    # Memória compartilhada (serve.py) tem prioridade sobre o registro
+    version = model_registry.startup_version(MODEL_VERSION)
+    if version and not burnout_predictor.shared_weights_path:
+        await _activate_version(version)
+        if burnout_predictor.version == version:
+            return
+    
+    try:
+        await asyncio.to_thread(burnout_predictor.load_model)
+        if burnout_predictor.shared_weights_path:
+            # Versão publicada pelo supervisor no arquivo compartilhado
+            burnout_predictor.version = os.getenv("MODEL_SHARED_VERSION") or None
+        print(" Modelo LSTM pronto!")
+    except Exception as e:
+        print(f" Falha ao carregar o modelo: {e}")
+
 # ==================== STARTUP ====================
 
 @app.on_event("startup")
 async def startup():
     """Inicialização"""
     print(" Iniciando OÁSÎS API...")
-    burnout_predictor.load_model()
+    # Carrega (ou treina) o modelo em background; até lá vale a heurística
+    # "loading" antes da task existir: até lá nenhuma requisição tenta carregar
+    burnout_predictor.state = "loading"
+    app.state.model_warmup = asyncio.create_task(_warm_up_model())
+    app.state.model_follow = asyncio.create_task(_follow_active_version())
+    inference_executor.start()
+    predict_batcher.start()
+    prediction_store.start()
+    team_aggregates.start()
+    app.state.score_matrix_refresh = asyncio.create_task(_refresh_score_matrix())
+    app.state.team_reconcile = asyncio.create_task(_reconcile_team_aggregates())
     calendar_service.initialize()
     notification_service.initialize()
     print(" OÁSÎS API pronta!")
 
+@app.on_event("shutdown")
+async def shutdown():
+    """Finalização"""
+    app.state.team_reconcile.cancel()
+    app.state.score_matrix_refresh.cancel()
+    app.state.model_follow.cancel()
+    await predict_batcher.stop()
+    inference_executor.shutdown()
+    labeled_samples.flush()
+    team_aggregates.close()
+    prediction_store.close()
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
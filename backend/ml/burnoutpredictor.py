@@ -4,34 +4,86 @@ LSTM Neural Network
 """
 
 import numpy as np
-import tensorflow as tf
-from tensorflow import keras
-from tensorflow.keras.models import Sequential, load_model
-from tensorflow.keras.layers import LSTM, Dense, Dropout
-from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
-from sklearn.preprocessing import StandardScaler
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import joblib
 import os
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+
+from ml.incremental_lstm import IncrementalLSTMScorer
+from ml.daily_features import DailyFeatureStore
+from ml.numpy_runtime import PRECISIONS, NumpyLSTMModel, default_weights_path
+from ml.shared_weights import attach_model
+from ml.prediction_cache import PredictionCache
+from ml.model_registry import warm_up
+from ml.synthetic_data import generate_synthetic_data
+from ml.dataset_cache import DatasetCache
+
+# TensorFlow só é importado para treinar ou quando runtime="keras":
+# nós de inferência com runtime="numpy" não precisam dele
+
+RUNTIMES = ("keras", "numpy")
+
+# Estados do modelo: até chegar em "ready" as predições usam a heurística
+MODEL_STATES = ("unloaded", "loading", "training", "ready", "failed")
 
 class BurnoutPredictor:
     """
     Modelo LSTM para predição de risco de burnout
     """
     
-    def __init__(self, model_path: str = "models/burnout_predictor.h5"):
+    def __init__(
+        self,
+        model_path: str = "models/burnout_predictor.h5",
+        incremental_recompute_days: int = 7,
+        runtime: str = "keras",
+        weights_path: Optional[str] = None,
+        precision: str = "float32",
+        shared_weights_path: Optional[str] = None,
+        cache_size: int = 0,
+        cache_ttl_seconds: float = 3600.0,
+        daily_features_path: Optional[str] = None
+    ):
+        if runtime not in RUNTIMES:
+            raise ValueError(f"runtime deve ser um de {RUNTIMES}")
+        if precision not in PRECISIONS:
+            raise ValueError(f"precision deve ser um de {PRECISIONS}")
+        if precision != "float32" and runtime != "numpy":
+            raise ValueError("Pesos quantizados exigem runtime=\"numpy\"")
+        
         self.model_path = model_path
+        self.runtime = runtime
+        self.precision = precision
+        self.weights_path = weights_path or default_weights_path(model_path, precision)
+        # Pesos publicados pelo supervisor multi-worker (serve.py)
+        self.shared_weights_path = shared_weights_path
         self.model = None
-        self.scaler = StandardScaler()
+        self.state = "unloaded"
+        self.error = None
+        self.version = None          # versão do registro em uso (se houver)
+        self.pending_version = None  # versão sendo carregada para troca
+        self.swap_error = None
+        self.incremental_recompute_days = incremental_recompute_days
+        self.incremental = None  # IncrementalLSTMScorer, criado sob demanda
+        # Dias do scoring incremental em SQLite (reconstrução dos estados)
+        self.daily_features_path = daily_features_path
+        self._daily_features = None
+        # Cache de resultados (desligado com cache_size=0)
+        self.cache = PredictionCache(cache_size, cache_ttl_seconds) if cache_size > 0 else None
+        self.scaler = None
         self.sequence_length = 30  # 30 dias
         self.n_features = 8
         
         # Criar diretório de modelos se não existir
-        os.makedirs("models", exist_ok=True)
+        self.models_dir = os.path.dirname(model_path) or "models"
+        self.scaler_path = os.path.join(self.models_dir, 'scaler.pkl')
+        os.makedirs(self.models_dir, exist_ok=True)
         
     def build_model(self):
         """Constrói arquitetura do modelo LSTM"""
+        from tensorflow import keras
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import LSTM, Dense, Dropout
+        
         model = Sequential([
             # Primeira camada LSTM
             LSTM(128, return_sequences=True, 
@@ -64,80 +116,21 @@ class BurnoutPredictor:
         print("✅ Modelo construído com sucesso")
         return model
     
-    def generate_synthetic_data(self, n_samples: int = 1000):
+    def generate_synthetic_data(self, n_samples: int = 1000, rng=None):
         """Gera dados sintéticos para treinamento"""
-        X = []
-        y = []
-        
-        for _ in range(n_samples):
-            # Gera sequência de 30 dias
-            sequence = []
-            
-            # Define padrão (0=Saudável, 1=Atenção, 2=Risco, 3=Crítico)
-            pattern = np.random.choice([0, 1, 2, 3], p=[0.4, 0.3, 0.2, 0.1])
-            
-            for day in range(30):
-                if pattern == 0:  # Saudável
-                    features = [
-                        np.random.uniform(7, 8),      # horas
-                        np.random.randint(3, 5),      # reuniões
-                        np.random.uniform(90, 120),   # tempo pausas
-                        0,                            # night work
-                        0,                            # weekend work
-                        np.random.uniform(30, 45),    # duração reuniões
-                        np.random.uniform(0, 0.1),    # sobreposição
-                        np.random.uniform(60, 120)    # response time
-                    ]
-                elif pattern == 1:  # Atenção
-                    features = [
-                        np.random.uniform(8, 9.5),
-                        np.random.randint(5, 7),
-                        np.random.uniform(60, 90),
-                        np.random.choice([0, 1], p=[0.7, 0.3]),
-                        np.random.choice([0, 1], p=[0.8, 0.2]),
-                        np.random.uniform(45, 60),
-                        np.random.uniform(0.1, 0.3),
-                        np.random.uniform(30, 60)
-                    ]
-                elif pattern == 2:  # Risco
-                    features = [
-                        np.random.uniform(9.5, 11),
-                        np.random.randint(7, 10),
-                        np.random.uniform(30, 60),
-                        np.random.choice([0, 1], p=[0.4, 0.6]),
-                        np.random.choice([0, 1], p=[0.5, 0.5]),
-                        np.random.uniform(60, 90),
-                        np.random.uniform(0.3, 0.5),
-                        np.random.uniform(10, 30)
-                    ]
-                else:  # Crítico
-                    features = [
-                        np.random.uniform(11, 14),
-                        np.random.randint(10, 15),
-                        np.random.uniform(10, 30),
-                        np.random.choice([0, 1], p=[0.2, 0.8]),
-                        np.random.choice([0, 1], p=[0.3, 0.7]),
-                        np.random.uniform(90, 120),
-                        np.random.uniform(0.5, 0.8),
-                        np.random.uniform(5, 10)
-                    ]
-                
-                sequence.append(features)
-            
-            X.append(sequence)
-            
-            # One-hot encode
-            label = [0, 0, 0, 0]
-            label[pattern] = 1
-            y.append(label)
-        
-        return np.array(X), np.array(y)
+        return generate_synthetic_data(n_samples, self.sequence_length, rng=rng)
     
     def train(self, X_train, y_train, X_val, y_val, epochs=30, batch_size=32):
         """Treina o modelo"""
-        if self.model is None:
+        from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
+        from sklearn.preprocessing import StandardScaler
+        
+        if not hasattr(self.model, 'fit'):
             self.build_model()
         
+        if self.scaler is None:
+            self.scaler = StandardScaler()
+        
         # Callbacks
         early_stop = EarlyStopping(
             monitor='val_loss',
@@ -162,28 +155,181 @@ class BurnoutPredictor:
         )
         
         # Salvar scaler
-        joblib.dump(self.scaler, 'models/scaler.pkl')
+        joblib.dump(self.scaler, self.scaler_path)
+        
+        # Exporta os pesos para o runtime NumPy
+        self._export_weights()
+        
+        # Pesos mudaram: estados incrementais e cache não são mais válidos
+        self._on_model_changed()
+        self.state = "ready"
         
         return history
     
     def predict(self, features: np.ndarray) -> Dict:
         """Faz predição"""
-        if self.model is None:
-            self.load_model()
+        return self.predict_batch(np.asarray(features)[np.newaxis, :])[0]
+    
+    def predict_batch(self, features_batch: np.ndarray) -> List[Dict]:
+        """Faz predição para vários usuários em um único forward pass"""
+        features_batch = np.asarray(features_batch, dtype=np.float32)
+        
+        # Modelo não carregado, carregando ou treinando: nunca carrega aqui
+        # (bloquearia o executor); resultados da heurística não vão para o cache
+        if not self.is_ready:
+            return self._predict_heuristic(features_batch)
+        
+        if self.cache is None:
+            return self._predict_uncached(features_batch)
         
-        # Simula histórico de 30 dias
-        sequence = []
-        for i in range(30):
-            noise = np.random.normal(0, 0.05, 8)
-            day_features = features + noise
-            sequence.append(day_features)
+        # Só as linhas sem resultado em cache passam pelo modelo,
+        # uma vez por chave mesmo que repetida no lote
+        keys = self.cache.keys(features_batch)
+        results = self.cache.get_many(keys)
+        missing = {}
+        for i, result in enumerate(results):
+            if result is None:
+                missing.setdefault(keys[i], []).append(i)
         
-        sequence = np.array([sequence])
+        if missing:
+            rows = [indices[0] for indices in missing.values()]
+            # Lida antes do forward pass: uma troca de modelo no meio invalida o put
+            generation = self.cache.generation
+            computed = self._predict_uncached(features_batch[rows])
+            self.cache.put_many(list(missing), computed, generation=generation)
+            for indices, result in zip(missing.values(), computed):
+                for i in indices:
+                    results[i] = dict(result)
+        
+        return results
+    
+    def get_cached(self, features: np.ndarray) -> Optional[Dict]:
+        """
+        Resultado em cache para um vetor de features, sem inferência
+        
+        Misses não são contabilizados aqui: a chamada seguinte a
+        `predict_batch` faz a contagem.
+        """
+        if self.cache is None:
+            return None
+        return self.cache.get_many(self.cache.keys(features), record_misses=False)[0]
+    
+    def _predict_uncached(self, features_batch: np.ndarray) -> List[Dict]:
+        """Forward pass do modelo"""
+        n_samples = features_batch.shape[0]
+        
+        # Simula histórico de 30 dias para cada usuário
+        noise = np.random.normal(
+            0, 0.05, (n_samples, self.sequence_length, self.n_features)
+        )
+        sequences = features_batch[:, np.newaxis, :] + noise
         
         # Predição
-        prediction = self.model.predict(sequence, verbose=0)
-        probs = prediction[0]
-        predicted_class = np.argmax(probs)
+        predictions = self.model.predict(sequences, verbose=0)
+        
+        return [self._to_result(probs) for probs in predictions]
+    
+    def predict_incremental(
+        self,
+        user_ids: List[str],
+        features_batch: np.ndarray,
+        days: Optional[List[date]] = None
+    ) -> List[Dict]:
+        """
+        Faz predição avançando o LSTM apenas um dia por usuário
+        
+        Usa os estados (h, c) salvos após o último dia de cada usuário;
+        a janela completa é recalculada a cada `incremental_recompute_days`.
+        Cada atualização é do dia `days[i]` (hoje por padrão): repetir o
+        último dia o substitui. Com `daily_features_path` os dias ficam
+        gravados e estados perdidos são reconstruídos a partir deles.
+        """
+        features_batch = np.asarray(features_batch, dtype=np.float32)
+        ordinals = [(day or date.today()).toordinal() for day in (days or [None] * len(user_ids))]
+        
+        store = self._feature_store()
+        
+        # Sem modelo pronto não há estados válidos para avançar
+        if not self.is_ready:
+            if store is not None:
+                store.put(user_ids, ordinals, features_batch)
+            return self._predict_heuristic(features_batch)
+        
+        if self.incremental is None:
+            self.incremental = IncrementalLSTMScorer(
+                self.model,
+                window=self.sequence_length,
+                recompute_every=self.incremental_recompute_days
+            )
+        
+        predictions = self.incremental.step_batch(
+            user_ids, features_batch, ordinals,
+            load_history=store.windows if store is not None else None
+        )
+        # Só depois do passo: um dia rejeitado não sobrescreve o gravado
+        if store is not None:
+            store.put(user_ids, ordinals, features_batch)
+        
+        return [self._to_result(probs) for probs in predictions]
+    
+    def _feature_store(self) -> Optional[DailyFeatureStore]:
+        if self.daily_features_path and self._daily_features is None:
+            self._daily_features = DailyFeatureStore(self.daily_features_path, self.n_features)
+        return self._daily_features
+    
+    @property
+    def is_ready(self) -> bool:
+        return self.state == "ready"
+    
+    def status(self) -> Dict:
+        """Estado do modelo para os endpoints de health check"""
+        return {
+            'state': self.state,
+            'ready': self.is_ready,
+            'runtime': self.runtime,
+            'precision': self.precision,
+            'error': self.error,
+            'version': self.version,
+            'pending_version': self.pending_version,
+            'swap_error': self.swap_error
+        }
+    
+    def _predict_heuristic(self, features_batch: np.ndarray) -> List[Dict]:
+        """
+        Predição por fórmula simples enquanto o LSTM não está pronto
+        
+        Mesma heurística do modo simulado do app_completo.py.
+        """
+        scores = features_batch[:, 0] * 10 + features_batch[:, 1] * 5
+        scores = np.clip(scores.astype(int), 20, 90)
+        
+        results = []
+        for score in scores:
+            if score < 30:
+                probs = [0.8, 0.15, 0.05, 0.0]
+            elif score < 60:
+                probs = [0.2, 0.6, 0.15, 0.05]
+            elif score < 80:
+                probs = [0.05, 0.2, 0.6, 0.15]
+            else:
+                probs = [0.0, 0.05, 0.3, 0.65]
+            
+            results.append({
+                'score': int(score),
+                'confidence': 0.85,
+                'probabilities': {
+                    'Saudável': probs[0],
+                    'Atenção': probs[1],
+                    'Risco': probs[2],
+                    'Crítico': probs[3]
+                },
+                'trend': 'stable'
+            })
+        return results
+    
+    def _to_result(self, probs: np.ndarray) -> Dict:
+        """Converte probabilidades em score"""
+        predicted_class = int(np.argmax(probs))
         confidence = float(probs[predicted_class])
         
         # Converte para score
@@ -203,29 +349,118 @@ class BurnoutPredictor:
             'trend': 'stable'
         }
     
-    def load_model(self):
-        """Carrega modelo"""
-        if os.path.exists(self.model_path):
+    def load_model(self, read_only: bool = False):
+        """
+        Carrega modelo no runtime configurado (treina um novo se não existir)
+        
+        Pode rodar em background: as predições usam a heurística até o
+        estado passar a "ready". Com `read_only` (workers do pool de
+        processos) só lê artefatos prontos: nunca treina nem exporta
+        pesos, e falha se o artefato do runtime ainda não existe.
+        """
+        self.state = "loading"
+        self.error = None
+        try:
+            self._load(read_only)
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            raise
+        self.state = "ready"
+    
+    def activate_version(self, registry, version: str) -> float:
+        """
+        Troca para uma versão do registro sem downtime
+        
+        A nova versão é verificada, carregada e aquecida com um batch
+        fictício enquanto a atual continua atendendo; a troca é uma única
+        atribuição, então chamadas em andamento terminam no modelo antigo.
+        Retorna o tempo de carga do artefato em ms.
+        """
+        self.pending_version = version
+        self.swap_error = None
+        previous_state = self.state
+        if not self.is_ready:
+            # Sem modelo atendendo (ex.: startup): heurística até a troca
+            self.state = "loading"
+        try:
+            model, load_ms = registry.load(version, self.runtime, self.precision)
+            warm_up(model, self.sequence_length, self.n_features)
+        except Exception as e:
+            self.swap_error = str(e)
+            self.state = previous_state
+            raise
+        finally:
+            self.pending_version = None
+        
+        self.model = model
+        self.version = version
+        self.error = None
+        self._on_model_changed()
+        self.state = "ready"
+        print(f" Modelo trocado para a versão {version} ({load_ms:.0f}ms de carga)")
+        return load_ms
+    
+    def _load(self, read_only: bool = False):
+        """Carrega (ou treina) o modelo"""
+        if self.runtime == "numpy" and self.shared_weights_path:
+            self.model = attach_model(self.shared_weights_path)
+            self._on_model_changed()
+            print(f" Modelo anexado (memória compartilhada)")
+        elif self.runtime == "numpy" and os.path.exists(self.weights_path):
+            self.model = NumpyLSTMModel.load(self.weights_path)
+            self._on_model_changed()
+            print(f" Modelo carregado (runtime NumPy, {self.precision})")
+            
+            if os.path.exists(self.scaler_path):
+                self.scaler = joblib.load(self.scaler_path)
+        elif os.path.exists(self.model_path) and not (read_only and self.runtime == "numpy"):
+            from tensorflow.keras.models import load_model
+            
             self.model = load_model(self.model_path)
+            self._on_model_changed()
             print(f" Modelo carregado")
             
-            if os.path.exists('models/scaler.pkl'):
-                self.scaler = joblib.load('models/scaler.pkl')
+            if os.path.exists(self.scaler_path):
+                self.scaler = joblib.load(self.scaler_path)
+            
+            if self.runtime == "numpy":
+                self.model = self._export_weights()
+        elif read_only:
+            raise FileNotFoundError(f"Artefato do modelo ainda não existe: {self.weights_path if self.runtime == 'numpy' else self.model_path}")
         else:
             print(" Modelo não encontrado, construindo novo...")
+            self.state = "training"
             self.build_model()
             # Treina com dados sintéticos
             self._train_initial_model()
+            
+            if self.runtime == "numpy":
+                self.model = NumpyLSTMModel.load(self.weights_path)
+    
+    def _on_model_changed(self):
+        """Descarta estados derivados dos pesos anteriores"""
+        self.incremental = None
+        if self.cache is not None:
+            self.cache.clear()
+    
+    def _export_weights(self) -> NumpyLSTMModel:
+        """Salva os pesos do modelo Keras em .npz para o runtime NumPy"""
+        numpy_model = NumpyLSTMModel.from_keras(self.model)
+        numpy_model.save(self.weights_path, precision=self.precision)
+        print(f" Pesos exportados para {self.weights_path}")
+        
+        # Recarrega para usar exatamente os pesos (quantizados) do arquivo
+        return NumpyLSTMModel.load(self.weights_path)
     
     def _train_initial_model(self):
         """Treina modelo inicial"""
-        print(" Gerando dados sintéticos...")
-        X, y = self.generate_synthetic_data(n_samples=1000)
-        
-        # Split
-        train_size = int(0.8 * len(X))
-        X_train, X_val = X[:train_size], X[train_size:]
-        y_train, y_val = y[:train_size], y[train_size:]
+        print(" Carregando dados sintéticos...")
+        data = DatasetCache(os.path.join(self.models_dir, 'datasets')).load_or_generate(
+            n_samples=1000, sequence_length=self.sequence_length, split=(0.8, 0.2, 0.0)
+        )
+        X_train, y_train = data.subset('train')
+        X_val, y_val = data.subset('val')
         
         print(" Treinando modelo...")
         self.train(X_train, y_train, X_val, y_val, epochs=20)
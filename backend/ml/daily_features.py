@@ -0,0 +1,76 @@
+"""
+OÁSÎS - Features Diárias por Usuário
+Dias já enviados ao scoring incremental, para reconstruir os estados do LSTM
+"""
+
+import os
+import sqlite3
+import threading
+from typing import List, Sequence
+
+import numpy as np
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_features (
+    user_id TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    features BLOB NOT NULL,
+    PRIMARY KEY (user_id, day)
+) WITHOUT ROWID
+"""
+
+
+class DailyFeatureStore:
+    """
+    Um vetor de features por (usuário, dia), em SQLite
+
+    Reenviar o mesmo dia substitui o vetor anterior, então retries são
+    idempotentes. O arquivo é compartilhado entre processos (modo WAL):
+    qualquer worker reconstrói o estado de um usuário a partir dos
+    últimos dias gravados, mesmo que tenham sido atendidos por outro.
+    `day` é o ordinal da data (date.toordinal()).
+    """
+
+    def __init__(self, path: str, n_features: int = 8):
+        self.path = path
+        self.n_features = n_features
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(SCHEMA)
+
+    def put(self, user_ids: Sequence[str], days: Sequence[int], features: np.ndarray):
+        """Grava (ou substitui) o dia de cada usuário"""
+        features = np.asarray(features, dtype=np.float32)
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO daily_features VALUES (?, ?, ?)",
+                [
+                    (user_id, int(day), row.tobytes())
+                    for user_id, day, row in zip(user_ids, days, features)
+                ]
+            )
+
+    def window(self, user_id: str, last_day: int, length: int) -> np.ndarray:
+        """Dias gravados em (last_day - length, last_day], em ordem cronológica"""
+        rows = self._connection().execute(
+            "SELECT features FROM daily_features "
+            "WHERE user_id = ? AND day > ? AND day <= ? ORDER BY day",
+            (user_id, last_day - length, last_day)
+        ).fetchall()
+        if not rows:
+            return np.empty((0, self.n_features), dtype=np.float32)
+        return np.frombuffer(b"".join(row[0] for row in rows), dtype=np.float32).reshape(len(rows), -1)
+
+    def windows(self, user_ids: Sequence[str], last_days: Sequence[int], length: int) -> List[np.ndarray]:
+        return [self.window(u, int(d), length) for u, d in zip(user_ids, last_days)]
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
@@ -0,0 +1,170 @@
+"""
+OÁSÎS - Cache de Datasets Sintéticos
+Datasets gerados uma vez e reaproveitados entre treinos, por hash dos parâmetros
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Dict, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from ml.synthetic_data import CLASS_PROBS, GENERATOR_VERSION, generate_synthetic_data
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DIR = os.path.join(BACKEND_DIR, "models", "datasets")
+
+N_FEATURES = 8
+
+
+class CachedDataset(NamedTuple):
+    X: np.ndarray          # memmap somente leitura
+    y: np.ndarray
+    train_idx: np.ndarray
+    val_idx: np.ndarray
+    test_idx: np.ndarray
+    key: str
+    hit: bool
+
+    def subset(self, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(X, y) em memória de 'train', 'val' ou 'test'"""
+        idx = getattr(self, f"{name}_idx")
+        return np.asarray(self.X[idx]), np.asarray(self.y[idx])
+
+
+def dataset_params(
+    n_samples: int,
+    sequence_length: int = 30,
+    seed: int = 42,
+    class_probs: Sequence[float] = CLASS_PROBS,
+    split: Sequence[float] = (0.7, 0.2, 0.1)
+) -> Dict:
+    """Parâmetros que determinam o conteúdo do dataset"""
+    return {
+        'n_samples': int(n_samples),
+        'sequence_length': int(sequence_length),
+        'n_features': N_FEATURES,
+        'class_probs': [float(p) for p in class_probs],
+        'seed': int(seed),
+        'split': [float(f) for f in split],
+        'generator_version': GENERATOR_VERSION
+    }
+
+
+def dataset_key(params: Dict) -> str:
+    canonical = json.dumps(params, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+class DatasetCache:
+    """
+    Diretório de datasets já gerados
+
+    Cada entrada fica em `<root>/<hash>/` com X.npy e y.npy (abertos via
+    mmap, carregam em milissegundos), split.npz com os índices de
+    treino/validação/teste e params.json. Entradas são escritas em um
+    diretório temporário e renomeadas, então leitores concorrentes nunca
+    veem um dataset parcial.
+    """
+
+    def __init__(self, root: str = DEFAULT_CACHE_DIR):
+        self.root = os.path.abspath(root)
+
+    def load_or_generate(
+        self,
+        n_samples: int,
+        sequence_length: int = 30,
+        seed: int = 42,
+        class_probs: Sequence[float] = CLASS_PROBS,
+        split: Sequence[float] = (0.7, 0.2, 0.1)
+    ) -> CachedDataset:
+        params = dataset_params(n_samples, sequence_length, seed, class_probs, split)
+        key = dataset_key(params)
+        directory = os.path.join(self.root, key)
+
+        hit = os.path.exists(os.path.join(directory, 'params.json'))
+        if not hit:
+            self._generate(directory, params)
+        return self._open(directory, key, hit)
+
+    def entries(self) -> Dict[str, Dict]:
+        """params.json de cada dataset em cache"""
+        if not os.path.isdir(self.root):
+            return {}
+        entries = {}
+        for key in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, key, 'params.json')
+            if os.path.exists(path):
+                with open(path) as f:
+                    entries[key] = json.load(f)
+        return entries
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    # ==================== HELPERS ====================
+
+    def _generate(self, directory: str, params: Dict):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix='.tmp-', dir=self.root)
+        try:
+            X, y = generate_synthetic_data(
+                params['n_samples'], params['sequence_length'],
+                rng=params['seed'], class_probs=params['class_probs']
+            )
+            np.save(os.path.join(tmp, 'X.npy'), X)
+            np.save(os.path.join(tmp, 'y.npy'), y)
+            train_idx, val_idx, test_idx = stratified_split(
+                np.argmax(y, axis=1), params['split'], params['seed']
+            )
+            np.savez(os.path.join(tmp, 'split.npz'), train=train_idx, val=val_idx, test=test_idx)
+            with open(os.path.join(tmp, 'params.json'), 'w') as f:
+                json.dump(params, f, indent=2)
+            os.rename(tmp, directory)
+        except OSError:
+            # Outro processo gerou o mesmo dataset primeiro
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not os.path.exists(os.path.join(directory, 'params.json')):
+                raise
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    def _open(self, directory: str, key: str, hit: bool) -> CachedDataset:
+        X = np.load(os.path.join(directory, 'X.npy'), mmap_mode='r')
+        y = np.load(os.path.join(directory, 'y.npy'), mmap_mode='r')
+        with np.load(os.path.join(directory, 'split.npz')) as split:
+            return CachedDataset(X, y, split['train'], split['val'], split['test'], key, hit)
+
+
+def stratified_split(
+    labels: np.ndarray,
+    fractions: Sequence[float],
+    seed: int
+) -> Tuple[np.ndarray, ...]:
+    """Índices de cada parte, com a proporção de classes preservada"""
+    rng = np.random.default_rng(seed)
+    bounds = np.cumsum(fractions)[:-1]
+    parts = [[] for _ in fractions]
+    for label in np.unique(labels):
+        idx = rng.permutation(np.flatnonzero(labels == label))
+        for part, chunk in zip(parts, np.split(idx, (bounds * len(idx)).astype(int))):
+            part.append(chunk)
+    return tuple(np.sort(np.concatenate(part)) for part in parts)
+
+
+# Script: python -m ml.dataset_cache [list|clear]
+if __name__ == "__main__":
+    import sys
+
+    cache = DatasetCache(os.getenv("DATASET_CACHE_DIR", DEFAULT_CACHE_DIR))
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    if command == "clear":
+        cache.clear()
+        print(f" Cache removido: {cache.root}")
+    else:
+        for key, params in cache.entries().items():
+            print(f" {key}  {json.dumps(params)}")
@@ -0,0 +1,239 @@
+"""
+OÁSÎS - Dataset em Shards Mapeados em Memória
+Treino out-of-core: o dataset fica em disco como .npy e é lido em streaming
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ml.synthetic_data import CLASS_PROBS, generate_synthetic_data
+
+MANIFEST_NAME = "manifest.json"
+N_FEATURES = 8
+
+# Linhas geradas por vez ao escrever um shard (limita a memória da escrita)
+WRITE_CHUNK = 50_000
+
+
+def shard_filenames(index: int) -> Tuple[str, str]:
+    return f"X_{index:05d}.npy", f"y_{index:05d}.npy"
+
+
+def write_shards(
+    directory: str,
+    n_samples: int,
+    shard_size: int = 100_000,
+    sequence_length: int = 30,
+    seed: Optional[int] = None,
+    workers: int = 1
+) -> Dict:
+    """
+    Gera o dataset sintético direto em shards .npy
+
+    Cada shard recebe uma semente derivada de `seed` via
+    `SeedSequence.spawn`, então o resultado é idêntico byte a byte com
+    qualquer número de `workers` (processos). Sem `seed`, a entropia
+    sorteada fica no manifesto para reproduzir o dataset.
+    """
+    if shard_size < 1:
+        raise ValueError("shard_size deve ser >= 1")
+
+    os.makedirs(directory, exist_ok=True)
+    master = np.random.SeedSequence(seed)
+
+    jobs = [
+        (directory, index, min(shard_size, n_samples - start), sequence_length, child)
+        for index, (start, child) in enumerate(zip(
+            range(0, n_samples, shard_size),
+            master.spawn(-(-n_samples // shard_size))
+        ))
+    ]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            shards = list(pool.map(_write_shard, *zip(*jobs)))
+    else:
+        shards = [_write_shard(*job) for job in jobs]
+
+    manifest = {
+        'n_samples': n_samples,
+        'sequence_length': sequence_length,
+        'n_features': N_FEATURES,
+        'n_classes': len(CLASS_PROBS),
+        'seed': master.entropy,
+        'shards': shards
+    }
+    with open(os.path.join(directory, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _write_shard(
+    directory: str,
+    index: int,
+    rows: int,
+    sequence_length: int,
+    seed: np.random.SeedSequence
+) -> Dict:
+    """Um shard, em blocos de WRITE_CHUNK linhas via `open_memmap`"""
+    rng = np.random.default_rng(seed)
+    x_name, y_name = shard_filenames(index)
+    X = np.lib.format.open_memmap(
+        os.path.join(directory, x_name), mode='w+', dtype=np.float32,
+        shape=(rows, sequence_length, N_FEATURES)
+    )
+    y = np.lib.format.open_memmap(
+        os.path.join(directory, y_name), mode='w+', dtype=np.float32,
+        shape=(rows, len(CLASS_PROBS))
+    )
+    for offset in range(0, rows, WRITE_CHUNK):
+        count = min(WRITE_CHUNK, rows - offset)
+        X[offset:offset + count], y[offset:offset + count] = generate_synthetic_data(
+            count, sequence_length, rng=rng
+        )
+    X.flush()
+    y.flush()
+    del X, y
+    return {'X': x_name, 'y': y_name, 'rows': rows, 'seed_spawn_key': list(seed.spawn_key)}
+
+
+class ShardedDataset:
+    """
+    Visão somente leitura de um diretório de shards
+
+    Os arrays são abertos com `mmap_mode='r'`: só as páginas lidas em
+    cada batch entram na memória. `split` devolve visões sobre faixas de
+    linhas de cada shard, sem copiar dados.
+    """
+
+    def __init__(self, directory: str, ranges: Optional[List[Tuple[int, int, int]]] = None):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST_NAME)) as f:
+            self.manifest = json.load(f)
+
+        self.sequence_length = self.manifest['sequence_length']
+        self.n_features = self.manifest['n_features']
+        self.n_classes = self.manifest['n_classes']
+
+        self._arrays = [
+            (
+                np.load(os.path.join(directory, shard['X']), mmap_mode='r'),
+                np.load(os.path.join(directory, shard['y']), mmap_mode='r')
+            )
+            for shard in self.manifest['shards']
+        ]
+        # (shard, início, fim) de cada faixa desta visão
+        self.ranges = ranges if ranges is not None else [
+            (i, 0, shard['rows']) for i, shard in enumerate(self.manifest['shards'])
+        ]
+
+    @classmethod
+    def exists(cls, directory: str) -> bool:
+        return os.path.exists(os.path.join(directory, MANIFEST_NAME))
+
+    def __len__(self) -> int:
+        return sum(stop - start for _, start, stop in self.ranges)
+
+    # ==================== SPLIT ====================
+
+    def split(self, validation: float = 0.2, test: float = 0.1) -> Tuple['ShardedDataset', ...]:
+        """(treino, validação, teste) com as mesmas proporções em cada shard"""
+        views = ([], [], [])
+        for shard, start, stop in self.ranges:
+            rows = stop - start
+            train_end = start + int(rows * (1 - validation - test))
+            val_end = train_end + int(rows * validation)
+            for view, (a, b) in zip(views, [(start, train_end), (train_end, val_end), (val_end, stop)]):
+                if b > a:
+                    view.append((shard, a, b))
+        return tuple(ShardedDataset(self.directory, ranges) for ranges in views)
+
+    # ==================== LEITURA ====================
+
+    def batches(
+        self,
+        batch_size: int = 32,
+        shuffle_buffer: int = 10_000,
+        seed: Optional[int] = None
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Itera (X, y) em batches
+
+        Com `shuffle_buffer > 0`, a ordem das faixas e dos blocos de
+        `shuffle_buffer` linhas dentro de cada faixa é sorteada, e as
+        linhas são embaralhadas dentro do buffer. A leitura de cada bloco
+        continua sequencial no disco.
+        """
+        rng = np.random.default_rng(seed)
+        blocks = []
+        block_rows = shuffle_buffer if shuffle_buffer > 0 else max(batch_size, WRITE_CHUNK)
+        for shard, start, stop in self.ranges:
+            blocks.extend((shard, a, min(a + block_rows, stop)) for a in range(start, stop, block_rows))
+        if shuffle_buffer > 0:
+            blocks = [blocks[i] for i in rng.permutation(len(blocks))]
+
+        carry_X = carry_y = None
+        for shard, a, b in blocks:
+            X_map, y_map = self._arrays[shard]
+            X = np.asarray(X_map[a:b])
+            y = np.asarray(y_map[a:b])
+            if carry_X is not None:
+                X = np.concatenate([carry_X, X])
+                y = np.concatenate([carry_y, y])
+            if shuffle_buffer > 0:
+                order = rng.permutation(len(X))
+                X, y = X[order], y[order]
+
+            full = len(X) - len(X) % batch_size
+            for i in range(0, full, batch_size):
+                yield X[i:i + batch_size], y[i:i + batch_size]
+            carry_X, carry_y = (X[full:], y[full:]) if full < len(X) else (None, None)
+
+        if carry_X is not None:
+            yield carry_X, carry_y
+
+    def tf_dataset(
+        self,
+        batch_size: int = 32,
+        shuffle_buffer: int = 10_000,
+        seed: Optional[int] = None
+    ):
+        """tf.data.Dataset em streaming sobre `batches`, com prefetch"""
+        import tensorflow as tf
+
+        epoch = [0]
+
+        def generator():
+            # Semente diferente por época, reprodutível a partir de `seed`
+            epoch_seed = None if seed is None else seed + epoch[0]
+            epoch[0] += 1
+            yield from self.batches(batch_size, shuffle_buffer, epoch_seed)
+
+        signature = (
+            tf.TensorSpec((None, self.sequence_length, self.n_features), tf.float32),
+            tf.TensorSpec((None, self.n_classes), tf.float32)
+        )
+        dataset = tf.data.Dataset.from_generator(generator, output_signature=signature)
+        return dataset.prefetch(tf.data.AUTOTUNE)
+
+    def sample(self, n: int, seed: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Até `n` linhas aleatórias em memória (ex.: relatório de quantização)"""
+        rng = np.random.default_rng(seed)
+        n = min(n, len(self))
+        picks = np.sort(rng.choice(len(self), size=n, replace=False))
+
+        X = np.empty((n, self.sequence_length, self.n_features), dtype=np.float32)
+        y = np.empty((n, self.n_classes), dtype=np.float32)
+        offset = 0
+        for shard, start, stop in self.ranges:
+            rows = stop - start
+            local = picks[(picks >= offset) & (picks < offset + rows)] - offset + start
+            X_map, y_map = self._arrays[shard]
+            filled = np.searchsorted(picks, offset)
+            X[filled:filled + len(local)] = X_map[local]
+            y[filled:filled + len(local)] = y_map[local]
+            offset += rows
+        return X, y
@@ -0,0 +1,164 @@
+"""
+OÁSÎS - Fine-tuning Incremental
+Atualiza uma versão do registro com as amostras reais acumuladas desde ela
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+
+from ml.dataset_cache import DatasetCache
+from ml.labeled_samples import DEFAULT_SAMPLES_DIR, LabeledSampleStore
+from ml.model_registry import BACKEND_DIR, DEFAULT_REGISTRY_DIR, MODEL_FILENAME, ModelRegistry
+from ml.numpy_runtime import PRECISIONS, NumpyLSTMModel, default_weights_path
+
+N_CLASSES = 4
+
+
+def fine_tune(
+    registry: ModelRegistry,
+    base_version: str,
+    new_version: str,
+    store: LabeledSampleStore,
+    epochs: int = 3,
+    learning_rate: float = 1e-4,
+    batch_size: int = 32,
+    replay_ratio: float = 1.0,
+    validation_fraction: float = 0.1,
+    min_samples: int = 32,
+    seed: int = 42,
+    dataset_cache: Optional[DatasetCache] = None
+) -> Dict:
+    """
+    Fine-tuning com warm start a partir de `base_version`
+
+    Usa os chunks de amostras ainda fora do `trained_chunks` da versão
+    base, misturados com `replay_ratio` vezes esse total de amostras
+    antigas (reais, e sintéticas do dataset original quando faltarem)
+    para não esquecer os padrões já aprendidos. A nova versão é
+    registrada com as métricas antes/depois e o `trained_chunks`
+    acumulado.
+    """
+    from tensorflow import keras
+
+    rng = np.random.default_rng(seed)
+    base_metadata = registry.manifest(base_version).get('metadata', {})
+    consumed = set(base_metadata.get('trained_chunks', ()))
+
+    chunks = store.chunks()
+    new_chunks = [name for name in chunks if name not in consumed]
+    X_new, labels_new = store.load(new_chunks)
+    if len(X_new) < min_samples:
+        raise ValueError(
+            f"Apenas {len(X_new)} amostra(s) nova(s) desde {base_version} (mínimo {min_samples})"
+        )
+
+    # Validação: só dados novos, mede o ganho na distribuição real
+    order = rng.permutation(len(X_new))
+    n_val = max(1, int(len(X_new) * validation_fraction))
+    val_idx, train_idx = order[:n_val], order[n_val:]
+    X_val, y_val = X_new[val_idx], _one_hot(labels_new[val_idx])
+
+    # Replay: amostras reais antigas, completadas com o dataset sintético
+    n_replay = int(len(train_idx) * replay_ratio)
+    X_old, labels_old = store.sample([name for name in chunks if name in consumed], n_replay, rng)
+    X_old, y_old = X_old.reshape(-1, *X_new.shape[1:]), _one_hot(labels_old)
+    synthetic = (dataset_cache or DatasetCache()).load_or_generate(5000, seed=seed)
+    X_synth, y_synth = synthetic.subset('train')
+    n_synth = min(n_replay - len(X_old), len(X_synth))
+    if n_synth > 0:
+        picks = rng.choice(len(X_synth), size=n_synth, replace=False)
+        X_old = np.concatenate([X_old, X_synth[picks]])
+        y_old = np.concatenate([y_old, y_synth[picks]])
+    X_retain, y_retain = synthetic.subset('test')
+
+    X_train = np.concatenate([X_new[train_idx], X_old])
+    y_train = np.concatenate([_one_hot(labels_new[train_idx]), y_old])
+    shuffle = rng.permutation(len(X_train))
+    X_train, y_train = X_train[shuffle], y_train[shuffle]
+
+    model, _ = registry.load(base_version, "keras")
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+        loss='categorical_crossentropy',
+        metrics=['accuracy']
+    )
+    before = _metrics(model, X_val, y_val, X_retain, y_retain)
+
+    start = time.perf_counter()
+    model.fit(
+        X_train, y_train,
+        validation_data=(X_val, y_val),
+        epochs=epochs,
+        batch_size=batch_size,
+        callbacks=[keras.callbacks.EarlyStopping(monitor='val_loss', patience=1, restore_best_weights=True)],
+        verbose=1
+    )
+    train_seconds = time.perf_counter() - start
+    after = _metrics(model, X_val, y_val, X_retain, y_retain)
+
+    metadata = {
+        'base_version': base_version,
+        'fine_tuned_at': datetime.now().isoformat(),
+        'trained_chunks': sorted(consumed.union(new_chunks)),
+        'new_chunks': len(new_chunks),
+        'new_samples': int(len(X_new)),
+        'replay_samples': int(len(X_old)),
+        'epochs': epochs,
+        'learning_rate': learning_rate,
+        'train_seconds': train_seconds,
+        'before': before,
+        'after': after
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        h5_path = os.path.join(tmp, MODEL_FILENAME)
+        model.save(h5_path)
+        numpy_model = NumpyLSTMModel.from_keras(model)
+        artifacts = [h5_path]
+        for precision in PRECISIONS:
+            path = default_weights_path(h5_path, precision)
+            numpy_model.save(path, precision=precision)
+            artifacts.append(path)
+        return registry.register(new_version, artifacts, metadata=metadata)
+
+
+def _one_hot(labels: np.ndarray) -> np.ndarray:
+    return np.eye(N_CLASSES, dtype=np.float32)[np.asarray(labels, dtype=np.int64)]
+
+
+def _metrics(model, X_val, y_val, X_retain, y_retain) -> Dict:
+    """Acurácia nos dados novos e no dataset original (esquecimento)"""
+    new_loss, new_acc = model.evaluate(X_val, y_val, verbose=0)
+    _, retain_acc = model.evaluate(X_retain, y_retain, verbose=0)
+    return {
+        'new_data_loss': float(new_loss),
+        'new_data_accuracy': float(new_acc),
+        'synthetic_accuracy': float(retain_acc)
+    }
+
+
+# Script: python -m ml.fine_tuning <versão base> <nova versão> [épocas]
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Uso: python -m ml.fine_tuning <versão base> <nova versão> [épocas]")
+        sys.exit(1)
+
+    # Caminhos relativos valem a partir de backend/, como em main.py
+    registry = ModelRegistry(os.path.join(BACKEND_DIR, os.getenv("MODEL_REGISTRY_DIR", DEFAULT_REGISTRY_DIR)))
+    store = LabeledSampleStore(os.path.join(BACKEND_DIR, os.getenv("LABELED_SAMPLES_DIR", DEFAULT_SAMPLES_DIR)))
+    manifest = fine_tune(
+        registry, sys.argv[1], sys.argv[2], store,
+        epochs=int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    )
+    meta = manifest['metadata']
+    print(f"\n Versão {manifest['version']} registrada ({meta['new_samples']} novas, "
+          f"{meta['replay_samples']} de replay, {meta['train_seconds']:.0f}s)")
+    print(f"   - Dados novos: {meta['before']['new_data_accuracy']:.4f} -> {meta['after']['new_data_accuracy']:.4f}")
+    print(f"   - Sintético:   {meta['before']['synthetic_accuracy']:.4f} -> {meta['after']['synthetic_accuracy']:.4f}")
+    print(f" Ative com: POST /api/admin/models/{manifest['version']}/activate")
@@ -0,0 +1,277 @@
+"""
+OÁSÎS - Inferência Incremental do LSTM
+Mantém os estados (h, c) de cada camada por usuário e avança a
+recorrência um único dia por atualização
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ml.numpy_runtime import LSTMState, NumpyLSTMModel
+
+
+class StaleDayError(ValueError):
+    """Atualização de um dia anterior ao último já processado"""
+
+
+class LSTMStateStore:
+    """
+    Armazenamento compacto de estados por usuário
+
+    Cada usuário ocupa uma linha de uma matriz float32 contígua com os
+    estados (h, c) de todas as camadas LSTM, mais um buffer circular com
+    os últimos `window` dias de features para o recálculo completo.
+    """
+
+    def __init__(
+        self,
+        units: Sequence[int],
+        window: int,
+        n_features: int,
+        initial_capacity: int = 1024
+    ):
+        self.units = list(units)
+        self.window = window
+        self.n_features = n_features
+
+        # Offsets de (h, c) de cada camada dentro da linha de estado
+        self._offsets = []
+        offset = 0
+        for n in self.units:
+            self._offsets.append(offset)
+            offset += 2 * n
+        self.state_size = offset
+
+        capacity = max(initial_capacity, 1)
+        self._index: Dict[str, int] = {}
+        self._states = np.zeros((capacity, self.state_size), dtype=np.float32)
+        self._history = np.zeros((capacity, window, n_features), dtype=np.float32)
+        self._history_len = np.zeros(capacity, dtype=np.int32)
+        self._history_pos = np.zeros(capacity, dtype=np.int32)
+        self.steps_since_recompute = np.zeros(capacity, dtype=np.int32)
+        self.last_day = np.zeros(capacity, dtype=np.int64)  # 0 = nenhum dia ainda
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._index
+
+    def rows(self, user_ids: Sequence[str]) -> np.ndarray:
+        """Índices das linhas dos usuários (cria linhas zeradas para novos)"""
+        rows = np.empty(len(user_ids), dtype=np.int64)
+        for i, user_id in enumerate(user_ids):
+            row = self._index.get(user_id)
+            if row is None:
+                row = len(self._index)
+                if row >= len(self._states):
+                    self._grow()
+                self._index[user_id] = row
+            rows[i] = row
+        return rows
+
+    def get_states(self, rows: np.ndarray) -> List[LSTMState]:
+        """Estados (h, c) de cada camada para as linhas pedidas"""
+        block = self._states[rows]
+        return [
+            (block[:, offset:offset + n], block[:, offset + n:offset + 2 * n])
+            for offset, n in zip(self._offsets, self.units)
+        ]
+
+    def set_states(self, rows: np.ndarray, states: List[LSTMState]):
+        """Grava os estados (h, c) de cada camada"""
+        for (h, c), offset, n in zip(states, self._offsets, self.units):
+            self._states[rows, offset:offset + n] = h
+            self._states[rows, offset + n:offset + 2 * n] = c
+
+    def append_day(self, rows: np.ndarray, features: np.ndarray):
+        """Adiciona um dia ao buffer circular de cada usuário"""
+        positions = self._history_pos[rows]
+        self._history[rows, positions] = features
+        self._history_pos[rows] = (positions + 1) % self.window
+        self._history_len[rows] = np.minimum(self._history_len[rows] + 1, self.window)
+
+    def replace_last_day(self, rows: np.ndarray, features: np.ndarray):
+        """Substitui o dia mais recente do buffer de cada linha"""
+        positions = (self._history_pos[rows] - 1) % self.window
+        self._history[rows, positions] = features
+
+    def set_history(self, row: int, days: np.ndarray):
+        """Substitui o buffer da linha pelos dias dados (ordem cronológica)"""
+        days = days[-self.window:]
+        self._history[row, :len(days)] = days
+        self._history_len[row] = len(days)
+        self._history_pos[row] = len(days) % self.window
+
+    def history_len(self, rows: np.ndarray) -> np.ndarray:
+        return self._history_len[rows]
+
+    def windows(self, rows: np.ndarray, length: int) -> np.ndarray:
+        """Últimos `length` dias de cada linha, em ordem cronológica"""
+        offsets = np.arange(-length, 0)
+        positions = (self._history_pos[rows, np.newaxis] + offsets) % self.window
+        return self._history[rows[:, np.newaxis], positions]
+
+    def clear(self):
+        """Descarta todos os estados"""
+        self._index.clear()
+        self._states[:] = 0
+        self._history[:] = 0
+        self._history_len[:] = 0
+        self._history_pos[:] = 0
+        self.steps_since_recompute[:] = 0
+        self.last_day[:] = 0
+
+    def _grow(self):
+        """Dobra a capacidade das matrizes"""
+        capacity = len(self._states)
+
+        def grow(array):
+            grown = np.zeros((capacity * 2,) + array.shape[1:], dtype=array.dtype)
+            grown[:capacity] = array
+            return grown
+
+        self._states = grow(self._states)
+        self._history = grow(self._history)
+        self._history_len = grow(self._history_len)
+        self._history_pos = grow(self._history_pos)
+        self.steps_since_recompute = grow(self.steps_since_recompute)
+        self.last_day = grow(self.last_day)
+
+
+class IncrementalLSTMScorer:
+    """
+    Scoring incremental com os pesos do modelo treinado
+
+    Cada chamada a `step_batch` consome um novo dia por usuário e avança
+    as três camadas LSTM um único timestep a partir do estado salvo. A
+    cada `recompute_every` atualizações o estado é recalculado do zero
+    sobre a janela de `window` dias, corrigindo o drift da recorrência.
+
+    Com `days` (ordinais) cada atualização é identificada por
+    (usuário, dia): reenviar o último dia o substitui em vez de avançar
+    mais um, e um dia anterior ao último é rejeitado. Usuários sem
+    estado em memória (restart, troca de modelo, dias atendidos por
+    outro worker) são reconstruídos com `load_history(usuários, último
+    dia, n)`, que devolve os dias gravados até o dia anterior ao atual.
+    """
+
+    def __init__(
+        self,
+        model,
+        window: int = 30,
+        recompute_every: int = 7,
+        initial_capacity: int = 1024
+    ):
+        if recompute_every < 1:
+            raise ValueError("recompute_every deve ser >= 1")
+
+        # Aceita o modelo Keras ou o runtime NumPy
+        if not isinstance(model, NumpyLSTMModel):
+            model = NumpyLSTMModel.from_keras(model)
+
+        self.model = model
+        self.window = window
+        self.recompute_every = recompute_every
+        self.store = LSTMStateStore(
+            units=model.units,
+            window=window,
+            n_features=model.n_features,
+            initial_capacity=initial_capacity
+        )
+
+        # Métricas
+        self.steps = 0
+        self.recomputes = 0
+        self.replaced = 0
+        self.rebuilds = 0
+
+    # ==================== API ====================
+
+    def step_batch(
+        self,
+        user_ids: Sequence[str],
+        features_batch: np.ndarray,
+        days: Optional[Sequence[int]] = None,
+        load_history: Optional[Callable[[Sequence[str], Sequence[int], int], List[np.ndarray]]] = None
+    ) -> np.ndarray:
+        """Avança um dia para cada usuário e retorna as probabilidades (n, 4)"""
+        if len(set(user_ids)) != len(user_ids):
+            raise ValueError("user_ids repetidos no mesmo lote")
+
+        features_batch = np.asarray(features_batch, dtype=np.float32)
+        rows = self.store.rows(user_ids)
+        n = len(rows)
+
+        replace = np.zeros(n, dtype=bool)
+        rebuild = np.zeros(n, dtype=bool)
+        if days is not None:
+            days = np.asarray(days, dtype=np.int64)
+            last = self.store.last_day[rows]
+            if np.any(days < last):
+                stale = [user_ids[i] for i in np.flatnonzero(days < last)]
+                raise StaleDayError(f"Dia anterior ao último já processado para {stale}")
+            replace = days == last
+            if load_history is not None:
+                # Sem estado ou com dias faltando (ex.: atendidos por outro worker)
+                rebuild = (last == 0) | (days > last + 1)
+
+        # Mesmo dia de novo: substitui no buffer e recalcula a janela
+        if replace.any():
+            self.store.replace_last_day(rows[replace], features_batch[replace])
+            self.replaced += int(replace.sum())
+
+        # Estado reconstruído a partir dos dias gravados
+        if rebuild.any():
+            idx = np.flatnonzero(rebuild)
+            histories = load_history([user_ids[i] for i in idx], days[idx] - 1, self.window - 1)
+            for i, history in zip(idx, histories):
+                history = np.reshape(history, (-1, features_batch.shape[1]))
+                history = np.concatenate([history, features_batch[i:i + 1]])
+                self.store.set_history(rows[i], history)
+            self.rebuilds += len(idx)
+
+        advance = ~replace & ~rebuild
+        self.store.append_day(rows[advance], features_batch[advance])
+        self.store.steps_since_recompute[rows[advance]] += 1
+
+        due = replace | rebuild | (self.store.steps_since_recompute[rows] >= self.recompute_every)
+        top_h = np.empty((n, self.model.units[-1]), dtype=np.float32)
+
+        # Atualização de um timestep a partir do estado salvo
+        step_idx = np.flatnonzero(~due)
+        if len(step_idx):
+            step_rows = rows[step_idx]
+            states = self.model.step(self.store.get_states(step_rows), features_batch[step_idx])
+            self.store.set_states(step_rows, states)
+            top_h[step_idx] = states[-1][0]
+
+        # Recálculo completo da janela, agrupado por tamanho de histórico
+        due_idx = np.flatnonzero(due)
+        if len(due_idx):
+            lengths = self.store.history_len(rows[due_idx])
+            for length in np.unique(lengths):
+                idx = due_idx[lengths == length]
+                states = self.model.run_sequence(self.store.windows(rows[idx], int(length)))
+                self.store.set_states(rows[idx], states)
+                top_h[idx] = states[-1][0]
+            self.store.steps_since_recompute[rows[due_idx]] = 0
+            self.recomputes += len(due_idx)
+
+        if days is not None:
+            self.store.last_day[rows] = days
+        self.steps += n
+        return self.model.head(top_h)
+
+    def stats(self) -> Dict:
+        """Métricas do scorer"""
+        return {
+            'users': len(self.store),
+            'state_bytes_per_user': self.store.state_size * 4,
+            'recompute_every': self.recompute_every,
+            'steps': self.steps,
+            'recomputes': self.recomputes,
+            'replaced_days': self.replaced,
+            'rebuilds': self.rebuilds
+        }
@@ -0,0 +1,251 @@
+"""
+OÁSÎS - Executor de Inferência
+Tira o forward pass bloqueante do event loop do asyncio
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+POOL_KINDS = ("thread", "process")
+
+
+class InferenceQueueFull(RuntimeError):
+    """Fila de inferência cheia"""
+
+
+def _timed_call(fn: Callable, *args):
+    """Executa `fn` no worker registrando início e duração"""
+    started = time.time()
+    result = fn(*args)
+    return started, time.time() - started, result
+
+
+class InferenceExecutor:
+    """
+    Pool limitado para chamadas de inferência
+
+    As predições são aguardadas via `run`, que executa a função em um
+    pool de threads ou processos (`kind`) com `max_workers` workers.
+    No máximo `max_pending` chamadas podem estar na fila ou em execução;
+    acima disso `InferenceQueueFull` é levantada imediatamente.
+
+    Chamadas `stateful=True` (ex.: scoring incremental, que altera
+    estados em memória deste processo) rodam sempre em uma única thread
+    dedicada, serializadas entre si.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_pending: int = 64,
+        kind: str = "thread",
+        initializer: Optional[Callable] = None,
+        initargs: tuple = ()
+    ):
+        if kind not in POOL_KINDS:
+            raise ValueError(f"kind deve ser um de {POOL_KINDS}")
+        if max_workers < 1:
+            raise ValueError("max_workers deve ser >= 1")
+        if max_pending < max_workers:
+            raise ValueError("max_pending deve ser >= max_workers")
+
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._initializer = initializer
+        self._initargs = initargs
+
+        self._pool: Optional[Executor] = None
+        self._stateful_pool: Optional[ThreadPoolExecutor] = None
+
+        # Métricas (chamadas na fila ou em execução, por pool)
+        self.in_flight = 0
+        self.stateful_in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+    # ==================== CICLO DE VIDA ====================
+
+    def start(self):
+        """Cria os pools (no modo processo, os workers carregam o modelo)"""
+        if self._pool is not None:
+            return
+        if self.kind == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=self._initializer,
+                initargs=self._initargs
+            )
+        else:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="inference"
+            )
+        self._stateful_pool = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="inference-stateful"
+        )
+
+    def shutdown(self):
+        """Aguarda as chamadas em andamento e encerra os pools"""
+        for pool in (self._pool, self._stateful_pool):
+            if pool is not None:
+                pool.shutdown(wait=True)
+        self._pool = None
+        self._stateful_pool = None
+
+    # ==================== API ====================
+
+    async def run(self, fn: Callable, *args, stateful: bool = False):
+        """Executa `fn(*args)` fora do event loop e aguarda o resultado"""
+        if self._pool is None:
+            self.start()
+
+        pending = self.in_flight + self.stateful_in_flight
+        if pending >= self.max_pending:
+            self.rejected += 1
+            raise InferenceQueueFull(
+                f"Fila de inferência cheia ({pending}/{self.max_pending})"
+            )
+
+        pool = self._stateful_pool if stateful else self._pool
+        counter = 'stateful_in_flight' if stateful else 'in_flight'
+        submitted = time.time()
+        setattr(self, counter, getattr(self, counter) + 1)
+
+        try:
+            started, duration, result = await asyncio.get_running_loop().run_in_executor(
+                pool, _timed_call, fn, *args
+            )
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            setattr(self, counter, getattr(self, counter) - 1)
+
+        wait = max(started - submitted, 0.0)
+        self.completed += 1
+        self._wait_total += wait
+        self._wait_max = max(self._wait_max, wait)
+        self._run_total += duration
+        return result
+
+    def stats(self) -> Dict:
+        """Métricas do executor"""
+        done = self.completed or 1
+        return {
+            'kind': self.kind,
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'in_flight': self.in_flight + self.stateful_in_flight,
+            'queue_depth': (
+                max(self.in_flight - self.max_workers, 0)
+                + max(self.stateful_in_flight - 1, 0)
+            ),
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'avg_wait_ms': self._wait_total / done * 1000.0,
+            'max_wait_ms': self._wait_max * 1000.0,
+            'avg_run_ms': self._run_total / done * 1000.0
+        }
+
+
+# ==================== WORKERS (modo processo) ====================
+
+_worker_predictor = None
+_worker_registry = None
+_worker_poll_seconds = 5.0
+_worker_next_poll = 0.0
+_worker_swap: Optional[threading.Thread] = None
+_worker_backoff = None  # ActivationBackoff: versões que falharam
+
+
+def init_worker_predictor(
+    predictor_kwargs: Dict,
+    registry_root: Optional[str] = None,
+    default_version: Optional[str] = None,
+    poll_seconds: float = 5.0
+):
+    """
+    Initializer do pool de processos: um modelo por worker, carregado em background
+
+    O worker só lê artefatos prontos (nunca treina nem exporta pesos:
+    isso é do processo principal) e responde com a heurística até o
+    modelo carregar; se o artefato ainda não existe, tenta de novo a
+    cada `poll_seconds`. Com `registry_root`, começa na versão ativa do
+    registro e passa a segui-la (ver `_follow_active_version`).
+    """
+    global _worker_predictor, _worker_registry, _worker_poll_seconds, _worker_next_poll, _worker_swap, _worker_backoff
+    from ml.burnoutpredictor import BurnoutPredictor
+    from ml.model_registry import ActivationBackoff, ModelRegistry
+
+    _worker_predictor = BurnoutPredictor(**predictor_kwargs)
+    _worker_predictor.state = "loading"
+    _worker_backoff = ActivationBackoff()
+    _worker_poll_seconds = poll_seconds
+    _worker_next_poll = time.monotonic() + poll_seconds
+
+    _worker_registry = ModelRegistry(registry_root) if registry_root else None
+    version = _worker_registry.startup_version(default_version) if _worker_registry else None
+    _worker_swap = threading.Thread(target=_load_worker_model, args=(version,), daemon=True)
+    _worker_swap.start()
+
+
+def worker_predict_batch(features_batch: np.ndarray):
+    """`predict_batch` no modelo do processo worker (heurística até ele carregar)"""
+    _follow_active_version()
+    return _worker_predictor.predict_batch(features_batch)
+
+
+def _follow_active_version():
+    """
+    Troca para a versão ativa do registro se ela mudou
+
+    Confere o ponteiro no máximo a cada `poll_seconds`; a carga roda em
+    uma thread do worker e o modelo atual continua atendendo até a troca.
+    Sem modelo carregado, tenta de novo ler o artefato.
+    """
+    global _worker_next_poll, _worker_swap
+    now = time.monotonic()
+    if now < _worker_next_poll:
+        return
+    _worker_next_poll = now + _worker_poll_seconds
+    if _worker_swap is not None and _worker_swap.is_alive():
+        return
+
+    version = _worker_registry.active() if _worker_registry is not None else None
+    if version in (None, _worker_predictor.version) or not _worker_backoff.ready(version):
+        if _worker_predictor.is_ready:
+            return
+        version = None
+    _worker_swap = threading.Thread(target=_load_worker_model, args=(version,), daemon=True)
+    _worker_swap.start()
+
+
+def _load_worker_model(version: Optional[str]):
+    """Ativa `version` do registro ou, sem versão, lê o artefato de MODEL_PATH"""
+    if version:
+        try:
+            _worker_predictor.activate_version(_worker_registry, version)
+            _worker_backoff.succeeded(version)
+            return
+        except Exception as e:
+            _worker_backoff.failed(version)
+            print(f" Worker {os.getpid()}: falha ao ativar a versão {version}: {e}")
+        if _worker_predictor.is_ready:
+            return
+    try:
+        _worker_predictor.load_model(read_only=True)
+    except Exception as e:
+        print(f" Worker {os.getpid()}: modelo indisponível, usando a heurística ({e})")
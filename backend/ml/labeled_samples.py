@@ -0,0 +1,122 @@
+"""
+OÁSÎS - Amostras Reais Rotuladas
+Janelas de 30 dias com o rótulo confirmado, acumuladas para fine-tuning
+"""
+
+import glob
+import os
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ml.model_registry import BACKEND_DIR
+
+DEFAULT_SAMPLES_DIR = os.path.join(BACKEND_DIR, "models", "labeled")
+
+
+class LabeledSampleStore:
+    """
+    Diretório append-only de janelas rotuladas
+
+    As amostras ficam em memória até `flush_every` e então vão para um
+    arquivo `chunk_<primeiro>_<último>_<pid>.npz` (timestamps em ns), o
+    que permite que vários workers escrevam no mesmo diretório.
+
+    Cada worker grava no seu ritmo, então um chunk novo pode trazer
+    timestamps anteriores aos de chunks já usados em treino: o consumo é
+    controlado pelo nome dos chunks (ver `fine_tune`), nunca por período.
+    """
+
+    def __init__(self, root: str = DEFAULT_SAMPLES_DIR, flush_every: int = 256):
+        self.root = os.path.abspath(root)
+        self.flush_every = flush_every
+        self._pending = []
+        self._lock = threading.Lock()
+
+    # ==================== ESCRITA ====================
+
+    def append(self, user_ids: Sequence[str], windows: np.ndarray, labels: Sequence[int]):
+        """Adiciona janelas (n, dias, features) com o rótulo de classe de cada uma"""
+        windows = np.asarray(windows, dtype=np.float32)
+        if len(windows) != len(labels) or len(windows) != len(user_ids):
+            raise ValueError("user_ids, windows e labels devem ter o mesmo tamanho")
+
+        now = time.time_ns()
+        with self._lock:
+            for offset, (user_id, window, label) in enumerate(zip(user_ids, windows, labels)):
+                self._pending.append((now + offset, user_id, window, int(label)))
+            if len(self._pending) >= self.flush_every:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        timestamps, user_ids, windows, labels = zip(*self._pending)
+        name = f"chunk_{timestamps[0]}_{timestamps[-1]}_{os.getpid()}.npz"
+        tmp = os.path.join(self.root, f".{name}.tmp")
+        with open(tmp, 'wb') as f:
+            np.savez(
+                f,
+                X=np.stack(windows),
+                labels=np.asarray(labels, dtype=np.int8),
+                user_ids=np.asarray(user_ids),
+                timestamps=np.asarray(timestamps, dtype=np.int64)
+            )
+        os.replace(tmp, os.path.join(self.root, name))
+        self._pending = []
+
+    # ==================== LEITURA ====================
+
+    def chunks(self) -> List[str]:
+        """Nomes dos chunks gravados, do mais antigo para o mais novo"""
+        return [os.path.basename(path) for path, _, _ in self._chunks()]
+
+    def load(self, names: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(X, labels) das amostras dos chunks `names`"""
+        parts = []
+        for name in names:
+            with np.load(os.path.join(self.root, name)) as data:
+                if len(data['labels']):
+                    parts.append((data['X'], data['labels']))
+        if not parts:
+            return np.empty((0, 0, 0), dtype=np.float32), np.empty(0, dtype=np.int8)
+        X, labels = (np.concatenate(column) for column in zip(*parts))
+        return X, labels
+
+    def sample(
+        self,
+        names: Sequence[str],
+        n: int,
+        rng: Optional[np.random.Generator] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Até `n` amostras aleatórias dos chunks `names` (replay)"""
+        rng = rng or np.random.default_rng()
+        X, labels = self.load(names)
+        if len(X) > n:
+            picks = rng.choice(len(X), size=n, replace=False)
+            X, labels = X[picks], labels[picks]
+        return X, labels
+
+    def count(self) -> int:
+        total = self.pending()
+        for path, _, _ in self._chunks():
+            with np.load(path) as data:
+                total += len(data['labels'])
+        return total
+
+    def _chunks(self):
+        chunks = []
+        for path in glob.glob(os.path.join(self.root, "chunk_*.npz")):
+            _, first, last, _ = os.path.basename(path)[:-4].split('_')
+            chunks.append((path, int(first), int(last)))
+        return sorted(chunks, key=lambda c: c[1])
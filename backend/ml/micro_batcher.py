@@ -0,0 +1,150 @@
+"""
+OÁSÎS - Micro-batching de Inferência
+Agrupa requisições concorrentes em um único forward pass do LSTM
+"""
+
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Fila de inferência com batching dinâmico
+
+    Requisições concorrentes são acumuladas por até `max_wait_ms`
+    milissegundos (ou até `max_batch_size` itens), executadas em um
+    único `predict_fn` e cada resultado é devolvido à coroutine que
+    o solicitou.
+
+    Com um `executor` (InferenceExecutor), o forward pass roda fora do
+    event loop e o próximo batch é coletado enquanto o anterior executa.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[np.ndarray], List[Dict]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        executor=None
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size deve ser >= 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms deve ser >= 0")
+
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.executor = executor
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._dispatches: Set[asyncio.Task] = set()
+
+        # Métricas
+        self.batches_processed = 0
+        self.items_processed = 0
+
+    # ==================== CICLO DE VIDA ====================
+
+    def start(self):
+        """Inicia o worker de batching no event loop atual"""
+        if self._worker is not None and not self._worker.done():
+            return
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Processa itens pendentes e encerra o worker"""
+        if self._worker is None:
+            return
+        await self._queue.put(None)
+        await self._worker
+        self._worker = None
+        if self._dispatches:
+            await asyncio.gather(*self._dispatches)
+
+    # ==================== API ====================
+
+    async def submit(self, features: np.ndarray) -> Dict:
+        """Enfileira um vetor de features e aguarda sua predição"""
+        if self._worker is None or self._worker.done():
+            self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((np.asarray(features, dtype=np.float32), future))
+        return await future
+
+    def stats(self) -> Dict:
+        """Métricas do batcher"""
+        avg_batch = (
+            self.items_processed / self.batches_processed
+            if self.batches_processed else 0.0
+        )
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'pending': self._queue.qsize() if self._queue else 0,
+            'batches_in_flight': len(self._dispatches),
+            'batches_processed': self.batches_processed,
+            'items_processed': self.items_processed,
+            'avg_batch_size': avg_batch
+        }
+
+    # ==================== WORKER ====================
+
+    async def _run(self):
+        """Loop principal: coleta um batch e executa a predição"""
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+
+            # Coleta até encher o batch ou estourar o tempo máximo
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: List[Tuple[np.ndarray, asyncio.Future]]):
+        """Executa um forward pass e distribui os resultados"""
+        futures = [future for _, future in batch]
+
+        try:
+            features = np.stack([features for features, _ in batch])
+            if self.executor is not None:
+                results = await self.executor.run(self.predict_fn, features)
+            else:
+                results = self.predict_fn(features)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches_processed += 1
+        self.items_processed += len(batch)
+
+        for future, result in zip(futures, results):
+            # A coroutine pode ter sido cancelada enquanto aguardava
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,268 @@
+"""
+OÁSÎS - Registro Local de Modelos
+Versões imutáveis com artefatos verificados por SHA-256
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos, só a escrita atômica
+    fcntl = None
+
+import numpy as np
+
+from ml.numpy_runtime import NumpyLSTMModel
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_REGISTRY_DIR = os.path.join(BACKEND_DIR, "models", "registry")
+
+MODEL_FILENAME = "burnout_predictor.h5"
+
+# Arquivo com a versão ativa, lido por todos os processos que servem o modelo
+ACTIVE_FILENAME = "ACTIVE"
+
+
+class ModelRegistry:
+    """
+    Diretório de versões do modelo
+
+    Cada versão fica em `<root>/<versão>/` com os artefatos (.h5 e os
+    .npz de cada precisão) e um `manifest.json` com o SHA-256 e o
+    tamanho de cada arquivo, mais o tempo de carga medido por formato.
+
+    `<root>/ACTIVE` aponta a versão ativa: a troca feita em um processo
+    é gravada ali e os demais (workers do serve.py e do pool de
+    processos) a seguem.
+    """
+
+    def __init__(self, root: str = DEFAULT_REGISTRY_DIR):
+        self.root = os.path.abspath(root)
+
+    # ==================== VERSÕES ====================
+
+    def register(self, version: str, artifacts: List[str], metadata: Optional[Dict] = None) -> Dict:
+        """Copia os artefatos para uma nova versão"""
+        if not version or os.sep in version or version.startswith('.'):
+            raise ValueError(f"Versão inválida: {version!r}")
+
+        directory = self._version_dir(version)
+        if os.path.exists(directory):
+            raise ValueError(f"Versão {version} já registrada")
+        os.makedirs(directory)
+
+        manifest = {
+            'version': version,
+            'created_at': datetime.now().isoformat(),
+            'artifacts': {},
+            'load_times_ms': {},
+            'metadata': metadata or {}
+        }
+        for path in artifacts:
+            name = os.path.basename(path)
+            target = os.path.join(directory, name)
+            shutil.copy2(path, target)
+            manifest['artifacts'][name] = {
+                'sha256': _sha256(target),
+                'size_bytes': os.path.getsize(target)
+            }
+
+        self._write_manifest(version, manifest)
+        return manifest
+
+    def versions(self) -> List[str]:
+        """Versões registradas, da mais antiga para a mais nova"""
+        if not os.path.isdir(self.root):
+            return []
+        manifests = [self.manifest(v) for v in os.listdir(self.root) if self.exists(v)]
+        return [m['version'] for m in sorted(manifests, key=lambda m: m['created_at'])]
+
+    def exists(self, version: str) -> bool:
+        return os.path.exists(os.path.join(self._version_dir(version), 'manifest.json'))
+
+    def manifest(self, version: str) -> Dict:
+        path = os.path.join(self._version_dir(version), 'manifest.json')
+        if not os.path.exists(path):
+            raise KeyError(f"Versão {version} não encontrada")
+        with open(path) as f:
+            return json.load(f)
+
+    def verify(self, version: str):
+        """Confere o checksum de todos os artefatos da versão"""
+        for name, info in self.manifest(version)['artifacts'].items():
+            path = os.path.join(self._version_dir(version), name)
+            if not os.path.exists(path) or _sha256(path) != info['sha256']:
+                raise ValueError(f"Checksum inválido: {version}/{name}")
+
+    # ==================== VERSÃO ATIVA ====================
+
+    def set_active(self, version: str):
+        """Grava a versão ativa (atômico, como o manifesto)"""
+        if not self.exists(version):
+            raise KeyError(f"Versão {version} não encontrada")
+        os.makedirs(self.root, exist_ok=True)
+        _write_atomic(os.path.join(self.root, ACTIVE_FILENAME), version)
+
+    def active(self) -> Optional[str]:
+        """Versão ativa (None se nunca ativada ou se não existe mais)"""
+        try:
+            with open(os.path.join(self.root, ACTIVE_FILENAME)) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return version if version and self.exists(version) else None
+
+    def startup_version(self, default: Optional[str] = None) -> Optional[str]:
+        """Versão a carregar na inicialização: a ativa, senão `default` (se registrada)"""
+        version = self.active()
+        if version is None and default and self.exists(default):
+            version = default
+        return version
+
+    # ==================== CARGA ====================
+
+    def artifact_path(self, version: str, runtime: str, precision: str = "float32") -> Tuple[str, str]:
+        """Caminho e formato do artefato para o runtime/precisão pedidos"""
+        if runtime == "keras":
+            name, fmt = MODEL_FILENAME, "keras-h5"
+        else:
+            base, _ = os.path.splitext(MODEL_FILENAME)
+            suffix = ".npz" if precision == "float32" else f".{precision}.npz"
+            name, fmt = base + suffix, f"numpy-{precision}"
+
+        if name not in self.manifest(version)['artifacts']:
+            raise KeyError(f"Versão {version} não tem o artefato {name}")
+        return os.path.join(self._version_dir(version), name), fmt
+
+    def load(self, version: str, runtime: str, precision: str = "float32"):
+        """Verifica, carrega e registra o tempo de carga do artefato"""
+        self.verify(version)
+        path, fmt = self.artifact_path(version, runtime, precision)
+
+        start = time.perf_counter()
+        if runtime == "keras":
+            from tensorflow.keras.models import load_model
+            model = load_model(path)
+        else:
+            model = NumpyLSTMModel.load(path)
+        load_ms = (time.perf_counter() - start) * 1000.0
+
+        try:
+            self.record_load_time(version, fmt, load_ms)
+        except (OSError, ValueError) as e:
+            # Métrica: nunca faz falhar uma carga que deu certo
+            print(f" Falha ao registrar o tempo de carga de {version}: {e}")
+        return model, load_ms
+
+    def record_load_time(self, version: str, fmt: str, load_ms: float):
+        """Guarda o último e o melhor tempo de carga por formato"""
+        # Vários workers carregam a mesma versão ao mesmo tempo:
+        # ler, alterar e gravar o manifesto é feito sob o lock da versão
+        with self._manifest_lock(version):
+            manifest = self.manifest(version)
+            times = manifest['load_times_ms'].setdefault(fmt, {})
+            times['last'] = load_ms
+            times['best'] = min(times.get('best', load_ms), load_ms)
+            self._write_manifest(version, manifest)
+
+    # ==================== HELPERS ====================
+
+    def _version_dir(self, version: str) -> str:
+        return os.path.join(self.root, version)
+
+    def _write_manifest(self, version: str, manifest: Dict):
+        # Escrita atômica: outro processo nunca lê um manifesto parcial
+        path = os.path.join(self._version_dir(version), 'manifest.json')
+        _write_atomic(path, json.dumps(manifest, indent=2))
+
+    @contextmanager
+    def _manifest_lock(self, version: str):
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self._version_dir(version), 'manifest.lock'), 'w') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class ActivationBackoff:
+    """
+    Versões que falharam ao ativar neste processo
+
+    Uma falha pode ser transitória (arquivo em cópia, disco cheio): a
+    versão volta a ser tentada depois de uma espera que dobra a cada
+    falha, até `max_seconds`, em vez de a cada poll ou nunca mais.
+    """
+
+    def __init__(self, initial_seconds: float = 5.0, max_seconds: float = 300.0):
+        self.initial_seconds = initial_seconds
+        self.max_seconds = max_seconds
+        self._failures: Dict[str, Tuple[float, float]] = {}  # versão -> (próxima tentativa, espera)
+
+    def ready(self, version: str) -> bool:
+        failure = self._failures.get(version)
+        return failure is None or time.monotonic() >= failure[0]
+
+    def failed(self, version: str):
+        _, delay = self._failures.get(version, (0.0, self.initial_seconds / 2))
+        delay = min(delay * 2, self.max_seconds)
+        self._failures[version] = (time.monotonic() + delay, delay)
+
+    def succeeded(self, version: str):
+        self._failures.pop(version, None)
+
+
+def warm_up(model, sequence_length: int = 30, n_features: int = 8, batch_size: int = 8):
+    """Executa um batch fictício para pagar custos de primeira chamada"""
+    dummy = np.zeros((batch_size, sequence_length, n_features), dtype=np.float32)
+    model.predict(dummy, verbose=0)
+
+
+def _write_atomic(path: str, content: str):
+    """Grava em um temporário único no mesmo diretório e troca de uma vez"""
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Script: python -m ml.model_registry register <versão> <artefato>... | list
+if __name__ == "__main__":
+    registry = ModelRegistry(os.getenv("MODEL_REGISTRY_DIR", DEFAULT_REGISTRY_DIR))
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+
+    if command == "register" and len(sys.argv) > 3:
+        manifest = registry.register(sys.argv[2], sys.argv[3:])
+        print(f" Versão {manifest['version']} registrada com {len(manifest['artifacts'])} artefato(s)")
+    elif command == "list":
+        for version in registry.versions():
+            manifest = registry.manifest(version)
+            print(f" {version}  {manifest['created_at']}  {json.dumps(manifest['load_times_ms'])}")
+    else:
+        print("Uso: python -m ml.model_registry register <versão> <artefato>... | list")
+        sys.exit(1)
@@ -0,0 +1,255 @@
+"""
+OÁSÎS - Runtime de Inferência em NumPy
+Executa o LSTM treinado sem TensorFlow, a partir de um .npz com os pesos
+"""
+
+import json
+import os
+import sys
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0.0),
+    'sigmoid': _sigmoid,
+    'tanh': np.tanh,
+    'softmax': _softmax
+}
+
+LSTMState = Tuple[np.ndarray, np.ndarray]
+
+# Precisão dos pesos no .npz (o cálculo é sempre feito em float32)
+PRECISIONS = ('float32', 'float16', 'int8')
+
+
+class NumpyLSTMModel:
+    """
+    Forward pass do modelo Sequential (LSTM x N + Dense x M) em NumPy
+
+    Dropout não tem efeito na inferência e é ignorado. `predict` segue a
+    assinatura do `model.predict` do Keras, permitindo substituir o
+    modelo no `BurnoutPredictor` sem outras mudanças.
+
+    Os pesos podem ser salvos quantizados (float16 ou int8 simétrico por
+    coluna); ao carregar, são convertidos de volta para float32. A
+    economia é só do arquivo em disco (e da cópia/download do artefato):
+    a memória ocupada e a latência são as do modelo float32, e a carga
+    ainda paga a conversão.
+    """
+
+    def __init__(self, lstm_layers: List[Dict], dense_layers: List[Dict]):
+        if not lstm_layers or not dense_layers:
+            raise ValueError("Modelo sem camadas LSTM/Dense")
+
+        self.lstm_layers = lstm_layers
+        self.dense_layers = dense_layers
+        self.n_features = lstm_layers[0]['kernel'].shape[0]
+        self.units = [layer['units'] for layer in lstm_layers]
+
+    # ==================== CONSTRUÇÃO ====================
+
+    @classmethod
+    def from_keras(cls, model) -> 'NumpyLSTMModel':
+        """Copia os pesos de um modelo Keras já carregado"""
+        lstm_layers = []
+        dense_layers = []
+
+        for layer in model.layers:
+            kind = type(layer).__name__
+            config = layer.get_config()
+            if kind == 'LSTM':
+                kernel, recurrent_kernel, bias = layer.get_weights()
+                lstm_layers.append(cls._lstm_layer(
+                    kernel, recurrent_kernel, bias,
+                    config['activation'], config['recurrent_activation']
+                ))
+            elif kind == 'Dense':
+                kernel, bias = layer.get_weights()
+                dense_layers.append(cls._dense_layer(kernel, bias, config['activation']))
+            elif kind != 'Dropout':
+                raise ValueError(f"Camada não suportada no runtime NumPy: {kind}")
+
+        return cls(lstm_layers, dense_layers)
+
+    @classmethod
+    def load(cls, path: str) -> 'NumpyLSTMModel':
+        """Carrega os pesos exportados por `save`"""
+        with np.load(path, allow_pickle=False) as data:
+            spec = json.loads(str(data['spec']))
+            lstm_layers = [
+                cls._lstm_layer(
+                    _decode(data, f'lstm_{k}_kernel'),
+                    _decode(data, f'lstm_{k}_recurrent_kernel'),
+                    data[f'lstm_{k}_bias'],
+                    layer['activation'],
+                    layer['recurrent_activation']
+                )
+                for k, layer in enumerate(spec['lstm'])
+            ]
+            dense_layers = [
+                cls._dense_layer(
+                    _decode(data, f'dense_{k}_kernel'),
+                    data[f'dense_{k}_bias'],
+                    layer['activation']
+                )
+                for k, layer in enumerate(spec['dense'])
+            ]
+        return cls(lstm_layers, dense_layers)
+
+    def save(self, path: str, precision: str = 'float32'):
+        """Salva os pesos em um .npz plano (um array por tensor)"""
+        if precision not in PRECISIONS:
+            raise ValueError(f"precision deve ser um de {PRECISIONS}")
+
+        arrays = {}
+        spec = {'precision': precision, 'lstm': [], 'dense': []}
+
+        # Apenas as matrizes são quantizadas; os biases ficam em float32
+        for k, layer in enumerate(self.lstm_layers):
+            arrays.update(_encode(f'lstm_{k}_kernel', layer['kernel'], precision))
+            arrays.update(_encode(f'lstm_{k}_recurrent_kernel', layer['recurrent_kernel'], precision))
+            arrays[f'lstm_{k}_bias'] = layer['bias']
+            spec['lstm'].append({
+                'units': layer['units'],
+                'activation': layer['activation_name'],
+                'recurrent_activation': layer['recurrent_activation_name']
+            })
+        for k, layer in enumerate(self.dense_layers):
+            arrays.update(_encode(f'dense_{k}_kernel', layer['kernel'], precision))
+            arrays[f'dense_{k}_bias'] = layer['bias']
+            spec['dense'].append({'activation': layer['activation_name']})
+
+        np.savez(path, spec=np.array(json.dumps(spec)), **arrays)
+
+    # ==================== INFERÊNCIA ====================
+
+    def predict(self, sequences: np.ndarray, verbose: int = 0, batch_size: int = 1024) -> np.ndarray:
+        """Probabilidades (n, classes) para sequências (n, dias, features)"""
+        sequences = np.asarray(sequences, dtype=np.float32)
+        outputs = [
+            self.head(self.run_sequence(sequences[start:start + batch_size])[-1][0])
+            for start in range(0, len(sequences), batch_size)
+        ]
+        if not outputs:
+            return np.empty((0, self.dense_layers[-1]['kernel'].shape[1]), dtype=np.float32)
+        return np.concatenate(outputs)
+
+    def zero_states(self, n: int) -> List[LSTMState]:
+        """Estados (h, c) zerados de cada camada"""
+        return [
+            (np.zeros((n, units), dtype=np.float32), np.zeros((n, units), dtype=np.float32))
+            for units in self.units
+        ]
+
+    def step(self, states: Sequence[LSTMState], x: np.ndarray) -> List[LSTMState]:
+        """Avança todas as camadas LSTM um timestep"""
+        new_states = []
+        for layer, (h, c) in zip(self.lstm_layers, states):
+            # Ordem dos gates no Keras: i, f, c, o
+            z = x @ layer['kernel'] + h @ layer['recurrent_kernel'] + layer['bias']
+            i, f, g, o = np.split(z, 4, axis=-1)
+            act, rec_act = layer['activation'], layer['recurrent_activation']
+            c = rec_act(f) * c + rec_act(i) * act(g)
+            h = rec_act(o) * act(c)
+            new_states.append((h, c))
+            x = h
+        return new_states
+
+    def run_sequence(self, sequences: np.ndarray) -> List[LSTMState]:
+        """Processa sequências (n, dias, features) a partir de estados zerados"""
+        states = self.zero_states(sequences.shape[0])
+        for t in range(sequences.shape[1]):
+            states = self.step(states, sequences[:, t])
+        return states
+
+    def head(self, h: np.ndarray) -> np.ndarray:
+        """Camadas densas sobre o último estado h"""
+        x = h
+        for layer in self.dense_layers:
+            x = layer['activation'](x @ layer['kernel'] + layer['bias'])
+        return x
+
+    # ==================== HELPERS ====================
+
+    @staticmethod
+    def _lstm_layer(kernel, recurrent_kernel, bias, activation: str, recurrent_activation: str) -> Dict:
+        return {
+            'units': recurrent_kernel.shape[0],
+            'kernel': np.asarray(kernel, dtype=np.float32),
+            'recurrent_kernel': np.asarray(recurrent_kernel, dtype=np.float32),
+            'bias': np.asarray(bias, dtype=np.float32),
+            'activation': ACTIVATIONS[activation],
+            'recurrent_activation': ACTIVATIONS[recurrent_activation],
+            'activation_name': activation,
+            'recurrent_activation_name': recurrent_activation
+        }
+
+    @staticmethod
+    def _dense_layer(kernel, bias, activation: str) -> Dict:
+        return {
+            'kernel': np.asarray(kernel, dtype=np.float32),
+            'bias': np.asarray(bias, dtype=np.float32),
+            'activation': ACTIVATIONS[activation],
+            'activation_name': activation
+        }
+
+
+def _encode(name: str, array: np.ndarray, precision: str) -> Dict[str, np.ndarray]:
+    """Converte uma matriz de pesos para a precisão pedida"""
+    if precision == 'float16':
+        return {name: array.astype(np.float16)}
+    if precision == 'int8':
+        # Quantização simétrica com uma escala por coluna (neurônio de saída)
+        scale = np.abs(array).max(axis=0) / 127.0
+        scale[scale == 0] = 1.0
+        quantized = np.clip(np.round(array / scale), -127, 127).astype(np.int8)
+        return {name: quantized, f'{name}_scale': scale.astype(np.float32)}
+    return {name: array.astype(np.float32)}
+
+
+def _decode(data, name: str) -> np.ndarray:
+    """Reconstrói uma matriz float32 a partir do .npz"""
+    array = data[name].astype(np.float32)
+    if f'{name}_scale' in data:
+        array *= data[f'{name}_scale']
+    return array
+
+
+def export_weights(h5_path: str, npz_path: str, precision: str = 'float32') -> NumpyLSTMModel:
+    """Exporta os pesos de um modelo Keras (.h5) para .npz"""
+    from tensorflow.keras.models import load_model
+
+    model = NumpyLSTMModel.from_keras(load_model(h5_path))
+    model.save(npz_path, precision=precision)
+    return model
+
+
+def default_weights_path(model_path: str, precision: str = 'float32') -> str:
+    """Caminho do .npz ao lado do .h5 (`modelo.npz`, `modelo.int8.npz`...)"""
+    base, _ = os.path.splitext(model_path)
+    if precision == 'float32':
+        return base + '.npz'
+    return f'{base}.{precision}.npz'
+
+
+# Script de exportação: python -m ml.numpy_runtime [modelo.h5] [precisão]
+if __name__ == "__main__":
+    h5_path = sys.argv[1] if len(sys.argv) > 1 else "models/burnout_predictor.h5"
+    precision = sys.argv[2] if len(sys.argv) > 2 else 'float32'
+    npz_path = default_weights_path(h5_path, precision)
+
+    print(f" Exportando {h5_path} -> {npz_path} ({precision})...")
+    export_weights(h5_path, npz_path, precision)
+    print(" Pesos exportados!")
@@ -0,0 +1,125 @@
+"""
+OÁSÎS - Cache de Predições
+LRU com TTL indexado pelo vetor de features quantizado
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Tamanho do bucket de cada feature, na ordem esperada pelo modelo:
+# horas, reuniões, tempo entre pausas, trabalho noturno, fim de semana,
+# duração das reuniões, sobreposição, tempo de resposta fora do horário
+FEATURE_BUCKETS = [0.25, 1, 5, 1, 1, 5, 0.05, 5]
+
+
+class PredictionCache:
+    """
+    Cache em processo de resultados do BurnoutPredictor
+
+    Vetores que caem nos mesmos buckets compartilham a entrada. Entradas
+    expiram após `ttl_seconds` e as menos usadas são descartadas quando
+    o cache passa de `max_size`. Seguro para uso a partir das threads do
+    executor de inferência.
+
+    `generation` muda a cada `clear`: quem calcula um resultado lê a
+    geração antes e a passa para `put_many`, que descarta resultados de
+    um modelo que foi trocado durante o cálculo.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        ttl_seconds: float = 3600.0,
+        buckets: Sequence[float] = FEATURE_BUCKETS
+    ):
+        if max_size < 1:
+            raise ValueError("max_size deve ser >= 1")
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds deve ser > 0")
+
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self.buckets = np.asarray(buckets, dtype=np.float64)
+
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+
+        # Métricas
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale_puts = 0
+
+    # ==================== API ====================
+
+    def keys(self, features_batch: np.ndarray) -> List[bytes]:
+        """Chaves canônicas (features arredondadas ao bucket) de cada linha"""
+        features_batch = np.atleast_2d(np.asarray(features_batch, dtype=np.float64))
+        buckets = np.round(features_batch / self.buckets).astype(np.int64)
+        return [row.tobytes() for row in buckets]
+
+    def get_many(self, keys: Sequence[bytes], record_misses: bool = True) -> List[Optional[Dict]]:
+        """Resultados em cache (ou None) para cada chave"""
+        now = time.monotonic()
+        results = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] <= now:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    if record_misses:
+                        self.misses += 1
+                    results.append(None)
+                    continue
+                self._entries.move_to_end(key)
+                self.hits += 1
+                results.append(dict(entry[1]))
+        return results
+
+    def put_many(self, keys: Sequence[bytes], results: Sequence[Dict], generation: Optional[int] = None):
+        """Armazena resultados, descartando os menos usados se necessário"""
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                # Calculados antes de um `clear` (modelo anterior)
+                self.stale_puts += len(keys)
+                return
+            for key, result in zip(keys, results):
+                self._entries[key] = (expires_at, dict(result))
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Invalida todas as entradas (ex.: novo modelo carregado)"""
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> Dict:
+        """Métricas do cache"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+            'stale_puts': self.stale_puts
+        }
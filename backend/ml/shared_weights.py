@@ -0,0 +1,105 @@
+"""
+OÁSÎS - Pesos do Modelo Mapeados em Memória
+Os pesos do runtime NumPy ficam em um arquivo plano que cada worker
+mapeia somente leitura: as páginas são compartilhadas pelo page cache
+do sistema operacional em vez de copiadas por processo
+"""
+
+import json
+import struct
+
+import numpy as np
+
+from ml.numpy_runtime import NumpyLSTMModel
+
+_MAGIC = b'OASISW01'
+# Alinhamento de cada tensor dentro do arquivo
+_ALIGN = 64
+
+
+def write_flat(model: NumpyLSTMModel, path: str):
+    """
+    Grava os pesos em float32 contíguo para `attach_model`
+
+    Formato: magic, tamanho do cabeçalho (uint64), cabeçalho JSON e os
+    tensores alinhados a 64 bytes.
+    """
+    tensors = {}
+    spec = {'lstm': [], 'dense': [], 'tensors': {}}
+
+    for k, layer in enumerate(model.lstm_layers):
+        tensors[f'lstm_{k}_kernel'] = layer['kernel']
+        tensors[f'lstm_{k}_recurrent_kernel'] = layer['recurrent_kernel']
+        tensors[f'lstm_{k}_bias'] = layer['bias']
+        spec['lstm'].append({
+            'activation': layer['activation_name'],
+            'recurrent_activation': layer['recurrent_activation_name']
+        })
+    for k, layer in enumerate(model.dense_layers):
+        tensors[f'dense_{k}_kernel'] = layer['kernel']
+        tensors[f'dense_{k}_bias'] = layer['bias']
+        spec['dense'].append({'activation': layer['activation_name']})
+
+    offset = 0
+    for name, array in tensors.items():
+        spec['tensors'][name] = {'offset': offset, 'shape': list(array.shape)}
+        offset += _aligned(array.nbytes)
+
+    header = json.dumps(spec).encode('utf-8')
+    data_start = _aligned(len(_MAGIC) + 8 + len(header))
+
+    with open(path, 'wb') as f:
+        f.write(_MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        for name, array in tensors.items():
+            f.seek(data_start + spec['tensors'][name]['offset'])
+            f.write(np.ascontiguousarray(array, dtype='<f4').tobytes())
+        f.truncate(data_start + offset)
+
+
+def attach_model(path: str) -> NumpyLSTMModel:
+    """Monta um NumpyLSTMModel sobre o arquivo mapeado (somente leitura)"""
+    with open(path, 'rb') as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"Arquivo de pesos inválido: {path}")
+        (header_len,) = struct.unpack('<Q', f.read(8))
+        spec = json.loads(f.read(header_len).decode('utf-8'))
+
+    data_start = _aligned(len(_MAGIC) + 8 + header_len)
+    buffer = np.memmap(path, dtype=np.uint8, mode='r')
+
+    tensors = {
+        name: np.ndarray(
+            tuple(info['shape']),
+            dtype='<f4',
+            buffer=buffer,
+            offset=data_start + info['offset']
+        )
+        for name, info in spec['tensors'].items()
+    }
+
+    lstm_layers = [
+        NumpyLSTMModel._lstm_layer(
+            tensors[f'lstm_{k}_kernel'],
+            tensors[f'lstm_{k}_recurrent_kernel'],
+            tensors[f'lstm_{k}_bias'],
+            layer['activation'],
+            layer['recurrent_activation']
+        )
+        for k, layer in enumerate(spec['lstm'])
+    ]
+    dense_layers = [
+        NumpyLSTMModel._dense_layer(
+            tensors[f'dense_{k}_kernel'],
+            tensors[f'dense_{k}_bias'],
+            layer['activation']
+        )
+        for k, layer in enumerate(spec['dense'])
+    ]
+
+    return NumpyLSTMModel(lstm_layers, dense_layers)
+
+
+def _aligned(n: int) -> int:
+    return -(-n // _ALIGN) * _ALIGN
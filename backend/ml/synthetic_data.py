@@ -0,0 +1,118 @@
+"""
+OÁSÎS - Gerador de Dataset Sintético
+Sequências de 30 dias por classe de risco, geradas em blocos vetorizados
+"""
+
+from typing import Sequence, Tuple, Union
+
+import numpy as np
+
+# Incrementar ao mudar perfis ou o algoritmo: invalida os datasets em cache
+GENERATOR_VERSION = 1
+
+CLASS_NAMES = ['Saudável', 'Atenção', 'Risco', 'Crítico']
+CLASS_PROBS = [0.4, 0.3, 0.2, 0.1]
+
+# Distribuição de cada feature por classe:
+#   ('uniform', a, b)   -> U[a, b)
+#   ('integers', a, b)  -> inteiro em [a, b)
+#   ('bernoulli', p)    -> 1 com probabilidade p
+#   ('constant', v)
+CLASS_PROFILES = [
+    # 0 - Saudável
+    [
+        ('uniform', 6, 8),          # horas trabalhadas
+        ('integers', 2, 5),         # reuniões
+        ('uniform', 90, 120),       # tempo entre pausas
+        ('constant', 0),            # trabalho noturno
+        ('constant', 0),            # fim de semana
+        ('uniform', 30, 45),        # duração das reuniões
+        ('uniform', 0, 0.1),        # sobreposição
+        ('uniform', 60, 120)        # tempo de resposta
+    ],
+    # 1 - Atenção
+    [
+        ('uniform', 8, 9.5),
+        ('integers', 5, 7),
+        ('uniform', 60, 90),
+        ('bernoulli', 0.3),
+        ('bernoulli', 0.2),
+        ('uniform', 45, 60),
+        ('uniform', 0.1, 0.3),
+        ('uniform', 30, 60)
+    ],
+    # 2 - Risco
+    [
+        ('uniform', 9.5, 11),
+        ('integers', 7, 10),
+        ('uniform', 30, 60),
+        ('bernoulli', 0.6),
+        ('bernoulli', 0.5),
+        ('uniform', 60, 90),
+        ('uniform', 0.3, 0.5),
+        ('uniform', 10, 30)
+    ],
+    # 3 - Crítico
+    [
+        ('uniform', 11, 14),
+        ('integers', 10, 15),
+        ('uniform', 10, 30),
+        ('bernoulli', 0.8),
+        ('bernoulli', 0.7),
+        ('uniform', 90, 120),
+        ('uniform', 0.5, 0.8),
+        ('uniform', 5, 10)
+    ]
+]
+
+
+def generate_synthetic_data(
+    n_samples: int,
+    sequence_length: int = 30,
+    rng: Union[None, int, np.random.Generator] = None,
+    class_probs: Sequence[float] = CLASS_PROBS
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Gera (X, y) sintéticos
+
+    X tem shape (n_samples, sequence_length, 8) em float32 e y é o
+    one-hot (n_samples, 4). `rng` aceita um seed ou um np.random.Generator.
+    """
+    rng = np.random.default_rng(rng)
+    n_features = len(CLASS_PROFILES[0])
+
+    labels = rng.choice(len(CLASS_PROFILES), size=n_samples, p=class_probs)
+    X = np.empty((n_samples, sequence_length, n_features), dtype=np.float32)
+
+    for class_id, profile in enumerate(CLASS_PROFILES):
+        rows = np.flatnonzero(labels == class_id)
+        if len(rows):
+            X[rows] = _class_block(rng, profile, len(rows), sequence_length)
+
+    y = np.eye(len(CLASS_PROFILES), dtype=np.float32)[labels]
+    return X, y
+
+
+def _class_block(
+    rng: np.random.Generator,
+    profile: Sequence[tuple],
+    n: int,
+    sequence_length: int
+) -> np.ndarray:
+    """Todas as sequências de uma classe, uma feature por vez"""
+    block = np.empty((n, sequence_length, len(profile)), dtype=np.float32)
+    shape = (n, sequence_length)
+
+    for feature, (kind, *params) in enumerate(profile):
+        if kind == 'uniform':
+            block[:, :, feature] = rng.uniform(params[0], params[1], shape)
+        elif kind == 'integers':
+            block[:, :, feature] = rng.integers(params[0], params[1], shape)
+        elif kind == 'bernoulli':
+            block[:, :, feature] = rng.random(shape) < params[0]
+        elif kind == 'constant':
+            block[:, :, feature] = params[0]
+        else:
+            raise ValueError(f"Distribuição desconhecida: {kind}")
+
+    return block
@@ -0,0 +1,187 @@
+"""
+OÁSÎS - Servidor Multi-worker
+Execute: python serve.py --workers 4
+
+Os pesos do modelo são carregados uma única vez pelo supervisor e
+mapeados somente leitura por todos os workers (MODEL_SHARED_WEIGHTS),
+então a memória não cresce linearmente com o número de workers.
+
+Uma versão ativada via /api/admin é gravada como ativa no registro e
+cada worker a carrega por conta própria (cópia privada dos pesos até o
+próximo restart do servidor).
+"""
+
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import tempfile
+import time
+
+import uvicorn
+from uvicorn.importer import import_from_string
+
+from ml.burnoutpredictor import BurnoutPredictor
+from ml.model_registry import BACKEND_DIR, DEFAULT_REGISTRY_DIR, ModelRegistry
+from ml.shared_weights import write_flat
+
+# Reinícios permitidos por worker dentro da janela antes de desistir
+MAX_RESTARTS = 5
+RESTART_WINDOW_SECONDS = 60
+
+
+# ==================== PESOS ====================
+
+def publish_weights() -> str:
+    """Carrega os pesos do runtime NumPy e grava o arquivo compartilhado"""
+    predictor = BurnoutPredictor(
+        model_path=os.path.join(BACKEND_DIR, os.getenv("MODEL_PATH", "models/burnout_predictor.h5")),
+        runtime="numpy",
+        precision=os.getenv("MODEL_PRECISION", "float32")
+    )
+
+    # Mesma prioridade do main.py: versão ativa do registro, MODEL_VERSION, MODEL_PATH
+    registry = ModelRegistry(
+        os.path.join(BACKEND_DIR, os.getenv("MODEL_REGISTRY_DIR", DEFAULT_REGISTRY_DIR))
+    )
+    version = registry.startup_version(os.getenv("MODEL_VERSION"))
+    if version:
+        predictor.activate_version(registry, version)
+    else:
+        predictor.load_model()
+    # Os workers comparam com a versão ativa do registro e trocam se ela mudar
+    os.environ["MODEL_SHARED_VERSION"] = version or ""
+
+    # /dev/shm mantém o arquivo em RAM; fora do Linux usa o diretório temporário
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    path = os.path.join(directory, f"oasis-weights-{os.getpid()}.bin")
+    write_flat(predictor.model, path)
+    return path
+
+
+# ==================== WORKERS ====================
+
+def run_worker(app, sock: socket.socket, log_level: str):
+    """Processo worker: serve o app no socket herdado do supervisor"""
+    config = uvicorn.Config(app, log_level=log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Supervisor:
+    """
+    Mantém `workers` processos uvicorn no mesmo socket
+
+    Workers que morrem são reiniciados (até MAX_RESTARTS por janela de
+    RESTART_WINDOW_SECONDS); SIGINT/SIGTERM encerram todos.
+    """
+
+    def __init__(self, app, workers: int, sock: socket.socket, context, log_level: str):
+        self.app = app
+        self.workers = workers
+        self.sock = sock
+        self.context = context
+        self.log_level = log_level
+
+        self.processes = []
+        self.restarts = []
+        self.should_exit = False
+
+    def run(self):
+        signal.signal(signal.SIGINT, self._handle_exit)
+        signal.signal(signal.SIGTERM, self._handle_exit)
+
+        for _ in range(self.workers):
+            self.processes.append(self._spawn())
+            self.restarts.append([])
+        print(f" {self.workers} workers iniciados (supervisor pid {os.getpid()})")
+
+        while not self.should_exit:
+            time.sleep(1)
+            self._restart_dead_workers()
+
+        self._stop_all()
+
+    def _spawn(self):
+        process = self.context.Process(
+            target=run_worker,
+            args=(self.app, self.sock, self.log_level)
+        )
+        process.start()
+        return process
+
+    def _restart_dead_workers(self):
+        now = time.monotonic()
+        for i, process in enumerate(self.processes):
+            if process.is_alive() or self.should_exit:
+                continue
+
+            history = [t for t in self.restarts[i] if now - t < RESTART_WINDOW_SECONDS]
+            if len(history) >= MAX_RESTARTS:
+                print(f" Worker {i} reiniciou demais, encerrando servidor")
+                self.should_exit = True
+                return
+
+            print(f" Worker {i} (pid {process.pid}) saiu com código {process.exitcode}, reiniciando...")
+            history.append(now)
+            self.restarts[i] = history
+            self.processes[i] = self._spawn()
+
+    def _stop_all(self):
+        print(" Encerrando workers...")
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.kill()
+
+    def _handle_exit(self, signum, frame):
+        self.should_exit = True
+
+
+# ==================== MAIN ====================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OÁSÎS - servidor multi-worker")
+    parser.add_argument("--app", default="main:app")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument(
+        "--preload",
+        action="store_true",
+        help="importa o app no supervisor e usa fork: modelos carregados no "
+             "import (ex.: GPT-2 no app_completo) são compartilhados por copy-on-write"
+    )
+    args = parser.parse_args()
+
+    weights_path = None
+    if os.getenv("MODEL_RUNTIME", "keras") == "numpy":
+        weights_path = publish_weights()
+        os.environ["MODEL_SHARED_WEIGHTS"] = weights_path
+        print(f" Pesos compartilhados em {weights_path}")
+    else:
+        print(" MODEL_RUNTIME != numpy: cada worker carrega sua própria cópia do modelo")
+
+    app = args.app
+    if args.preload:
+        app = import_from_string(args.app)
+        context = multiprocessing.get_context("fork")
+    else:
+        context = multiprocessing.get_context("spawn")
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.set_inheritable(True)
+
+    try:
+        Supervisor(app, args.workers, sock, context, args.log_level).run()
+    finally:
+        sock.close()
+        # Workers já encerrados: o arquivo pode ser removido
+        if weights_path and os.path.exists(weights_path):
+            os.remove(weights_path)
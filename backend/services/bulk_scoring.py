@@ -0,0 +1,201 @@
+"""
+Serviço de Scoring em Lote - leitura incremental de JSON/NDJSON
+"""
+
+import codecs
+import json
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Ordem das features esperada pelo BurnoutPredictor
+FEATURE_FIELDS = [
+    'hours_worked',
+    'meetings_count',
+    'avg_time_between_breaks',
+    'night_work',
+    'weekend_work',
+    'avg_meeting_duration',
+    'meeting_overlap_rate',
+    'response_time_after_hours'
+]
+
+
+# Maior registro aceito (caracteres): limita o buffer de um registro incompleto
+MAX_RECORD_SIZE = 1024 * 1024
+
+
+class BulkParseError(ValueError):
+    """Corpo da requisição não é um array JSON nem NDJSON válido"""
+
+
+class InvalidRecord:
+    """Registro que não pôde ser decodificado; ocupa o lugar dele no stream"""
+
+    __slots__ = ('error',)
+
+    def __init__(self, error: str):
+        self.error = error
+
+
+def records_to_matrix(records: Sequence) -> np.ndarray:
+    """Empilha registros validados em uma matriz (n, 8) de features"""
+    matrix = np.empty((len(records), len(FEATURE_FIELDS)), dtype=np.float32)
+    for i, record in enumerate(records):
+        matrix[i] = [float(getattr(record, field)) for field in FEATURE_FIELDS]
+    return matrix
+
+
+async def iter_records(
+    chunks: AsyncIterator[bytes],
+    max_record_size: int = MAX_RECORD_SIZE
+) -> AsyncIterator[Union[Dict, InvalidRecord]]:
+    """
+    Lê registros de um stream de bytes sem carregar o corpo inteiro
+
+    Aceita um array JSON (`[{...}, {...}]`) ou NDJSON (um objeto por
+    linha); o formato é detectado pelo primeiro caractere não branco.
+    Uma linha ou elemento malformado vira um InvalidRecord e a leitura
+    continua; um registro maior que `max_record_size` encerra o stream
+    com BulkParseError, assim o buffer nunca passa desse tamanho.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    json_decoder = json.JSONDecoder()
+    buffer = ''
+    mode = None          # 'array' ou 'ndjson'
+    array_closed = False
+    line_number = 0
+
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+
+        if mode is None:
+            stripped = buffer.lstrip()
+            if not stripped:
+                buffer = ''
+                continue
+            if stripped[0] == '[':
+                mode = 'array'
+                buffer = stripped[1:]
+            else:
+                mode = 'ndjson'
+                buffer = stripped
+
+        if mode == 'ndjson':
+            *lines, buffer = buffer.split('\n')
+            for line in lines:
+                line_number += 1
+                if line.strip():
+                    yield _parse_line(line, line_number)
+            if len(buffer) > max_record_size:
+                raise BulkParseError(f"Linha {line_number + 1} excede {max_record_size} caracteres")
+        elif not array_closed:
+            records, buffer, array_closed = _drain_array(json_decoder, buffer, final=False)
+            for record in records:
+                yield record
+            if not array_closed and len(buffer) > max_record_size:
+                raise BulkParseError(f"Elemento do array JSON excede {max_record_size} caracteres")
+
+    buffer += decoder.decode(b'', final=True)
+
+    if mode == 'ndjson':
+        if buffer.strip():
+            yield _parse_line(buffer, line_number + 1)
+    elif mode == 'array':
+        if not array_closed:
+            records, buffer, array_closed = _drain_array(json_decoder, buffer, final=True)
+            for record in records:
+                yield record
+        if not array_closed:
+            raise BulkParseError("Array JSON não foi fechado")
+        if buffer.strip():
+            raise BulkParseError("Conteúdo inesperado após o array JSON")
+
+
+async def iter_chunks(
+    records: AsyncIterator[Dict],
+    chunk_size: int
+) -> AsyncIterator[List[Tuple[int, Dict]]]:
+    """Agrupa registros em blocos de tamanho fixo, preservando o índice"""
+    chunk = []
+    index = 0
+    async for record in records:
+        chunk.append((index, record))
+        index += 1
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _parse_line(line: str, line_number: int) -> Union[Dict, InvalidRecord]:
+    """Decodifica uma linha NDJSON"""
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        return InvalidRecord(f"Linha {line_number} inválida: {e.msg}")
+
+
+def _drain_array(json_decoder: json.JSONDecoder, buffer: str, final: bool):
+    """
+    Extrai os elementos completos disponíveis no buffer
+
+    Retorna (registros, resto do buffer, array fechado?). Elementos
+    malformados viram InvalidRecord; um elemento sem fim no buffer fica
+    para o próximo chunk.
+    """
+    records = []
+    pos = 0
+    length = len(buffer)
+
+    while True:
+        # Pula espaços e separadores
+        while pos < length and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos >= length:
+            break
+        if buffer[pos] == ']':
+            return records, buffer[pos + 1:], True
+        try:
+            record, pos = json_decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            # Incompleto ou malformado: procura onde o elemento termina
+            end = _element_end(buffer, pos)
+            if end is None:
+                if final:
+                    records.append(InvalidRecord(f"Elemento inválido no array JSON: {e.msg}"))
+                    pos = length
+                break
+            records.append(InvalidRecord(f"Elemento inválido no array JSON: {e.msg}"))
+            pos = end
+            continue
+        records.append(record)
+
+    return records, buffer[pos:], False
+
+
+def _element_end(buffer: str, pos: int) -> Optional[int]:
+    """Posição da `,` ou `]` que fecha o elemento em `pos` (None se ainda não chegou)"""
+    depth = 0
+    in_string = escaped = False
+    for i in range(pos, len(buffer)):
+        char = buffer[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            depth += 1
+        elif char in '}]':
+            if depth == 0:
+                return i
+            depth -= 1
+        elif char == ',' and depth == 0:
+            return i
+    return None
@@ -0,0 +1,407 @@
+"""
+Histórico de Predições - armazenamento local em SQLite
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    user_id TEXT NOT NULL,
+    ts_ms INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    model_version TEXT,
+    PRIMARY KEY (user_id, ts_ms, seq)
+) WITHOUT ROWID
+"""
+
+# `seq` numera as predições do usuário no mesmo milissegundo (0, 1, ...)
+PREDICTION_INSERT = """
+INSERT INTO predictions
+SELECT ?, ?, COALESCE(MAX(seq) + 1, 0), ?, ?, ?, ?
+FROM predictions WHERE user_id = ? AND ts_ms = ?
+"""
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    user_id TEXT NOT NULL,
+    resolution TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    score_sum INTEGER NOT NULL,
+    score_min INTEGER NOT NULL,
+    score_max INTEGER NOT NULL,
+    last_ts_ms INTEGER NOT NULL,
+    last_score INTEGER NOT NULL,
+    healthy INTEGER NOT NULL,
+    attention INTEGER NOT NULL,
+    risk INTEGER NOT NULL,
+    critical INTEGER NOT NULL,
+    PRIMARY KEY (user_id, resolution, bucket)
+) WITHOUT ROWID
+"""
+
+ROLLUP_UPSERT = """
+INSERT INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (user_id, resolution, bucket) DO UPDATE SET
+    n = n + excluded.n,
+    score_sum = score_sum + excluded.score_sum,
+    score_min = MIN(score_min, excluded.score_min),
+    score_max = MAX(score_max, excluded.score_max),
+    last_score = CASE WHEN excluded.last_ts_ms >= last_ts_ms
+                      THEN excluded.last_score ELSE last_score END,
+    last_ts_ms = MAX(last_ts_ms, excluded.last_ts_ms),
+    healthy = healthy + excluded.healthy,
+    attention = attention + excluded.attention,
+    risk = risk + excluded.risk,
+    critical = critical + excluded.critical
+"""
+
+# Ordem das colunas de contagem em `rollups`
+STATUSES = ("Saudável", "Atenção", "Risco", "Crítico")
+
+# Chave de cada resolução; as chaves ordenam como texto na ordem do tempo
+RESOLUTIONS = {
+    'day': lambda dt: dt.strftime('%Y-%m-%d'),
+    'week': lambda dt: '%04d-W%02d' % dt.isocalendar()[:2],
+    'month': lambda dt: dt.strftime('%Y-%m')
+}
+
+# (user_id, ts_ms, score, status, confidence, model_version)
+Row = Tuple[str, int, int, str, float, Optional[str]]
+
+
+class PredictionStore:
+    """
+    Série temporal de predições por usuário
+
+    A tabela é uma B-tree agrupada por (user_id, ts_ms, seq), então a
+    consulta de um período é uma busca seguida de leitura sequencial:
+    O(log n + k). Predições no mesmo milissegundo nunca se sobrescrevem:
+    cada uma recebe o próximo `seq`. Escritas entram em um buffer em memória e uma thread
+    grava tudo em uma única transação (group commit) a cada
+    `flush_interval` segundos, ou antes se o buffer chegar a
+    `max_batch`. Consultas gravam o buffer antes de ler; um flush por vez,
+    então uma consulta durante o flush da thread espera o commit dele.
+    Se o commit falhar, o lote volta para o início do buffer e a thread
+    tenta de novo com espera crescente (até `max_retry_seconds`).
+
+    Na mesma transação são atualizados os agregados por dia, semana ISO
+    e mês (mín, máx, média, último score e contagem por status), então
+    `rollups` devolve um ponto por período sem ler as predições.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 0.05,
+        max_batch: int = 1000,
+        max_retry_seconds: float = 30.0
+    ):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_retry_seconds = max_retry_seconds
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._pending: List[Row] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self._local = threading.local()
+
+        # Métricas
+        self.written = 0
+        self.commits = 0
+        self.failed_commits = 0
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(SCHEMA)
+        conn.execute(ROLLUP_SCHEMA)
+        conn.close()
+
+    # ==================== CICLO DE VIDA ====================
+
+    def start(self):
+        """Inicia a thread de escrita"""
+        if self._writer is not None:
+            return
+        self._stop.clear()
+        self._writer = threading.Thread(target=self._run, name="prediction-store", daemon=True)
+        self._writer.start()
+
+    def close(self):
+        """Para a thread de escrita e grava o que estiver pendente"""
+        self._stop.set()
+        self._wake.set()
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        self.flush()
+
+    # ==================== ESCRITA ====================
+
+    def record(
+        self,
+        user_ids: Sequence[str],
+        scores: Sequence[int],
+        statuses: Sequence[str],
+        confidences: Sequence[float],
+        model_version: Optional[str] = None,
+        ts_ms: Optional[int] = None
+    ):
+        """Enfileira predições (uma por usuário) para o próximo commit"""
+        ts_ms = int(time.time() * 1000) if ts_ms is None else ts_ms
+        rows = [
+            (user_id, ts_ms, int(score), status, float(confidence), model_version)
+            for user_id, score, status, confidence in zip(user_ids, scores, statuses, confidences)
+        ]
+        with self._lock:
+            self._pending.extend(rows)
+            full = len(self._pending) >= self.max_batch
+        if full:
+            if self._writer is None:
+                self.flush()
+            else:
+                self._wake.set()
+
+    def flush(self):
+        """Grava o buffer em uma única transação (em caso de erro, o lote volta ao buffer)"""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return
+            conn = self._connection()
+            try:
+                with conn:
+                    # Sem conflito possível (seq novo a cada linha): cada linha entra
+                    # uma vez nas predições e uma vez nos agregados, na mesma transação
+                    inserted = conn.total_changes
+                    conn.executemany(PREDICTION_INSERT, [row + row[:2] for row in rows])
+                    if conn.total_changes - inserted != len(rows):
+                        raise sqlite3.IntegrityError("predições não gravadas: agregados não atualizados")
+                    conn.executemany(ROLLUP_UPSERT, _aggregate(rows))
+            except sqlite3.Error:
+                # Rollback feito: devolve o lote antes do que chegou depois
+                with self._lock:
+                    self._pending[:0] = rows
+                self.failed_commits += 1
+                raise
+            self.written += len(rows)
+            self.commits += 1
+
+    def _run(self):
+        delay = 0.0
+        while not self._stop.is_set():
+            if delay:
+                # Em backoff: só a parada interrompe a espera
+                self._stop.wait(delay)
+            else:
+                self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+                delay = 0.0
+            except sqlite3.Error as e:
+                delay = min(max(delay * 2, self.flush_interval, 0.1), self.max_retry_seconds)
+                print(f" Falha ao gravar predições (nova tentativa em {delay:.1f}s): {e}")
+
+    # ==================== CONSULTA ====================
+
+    def history(
+        self,
+        user_id: str,
+        start_ms: int,
+        end_ms: Optional[int] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[int, int]] = None
+    ) -> List[Dict]:
+        """
+        Predições do usuário em [start_ms, end_ms), da mais antiga para a mais nova
+
+        `after` = (ts_ms, seq) da última predição já lida (paginação).
+        """
+        # Read-your-writes: grava antes o que está no buffer
+        self.flush()
+        end_ms = end_ms if end_ms is not None else 2 ** 62
+        after_ts, after_seq = after if after is not None else (start_ms - 1, 2 ** 62)
+        rows = self._connection().execute(
+            "SELECT ts_ms, seq, score, status, confidence, model_version FROM predictions "
+            "WHERE user_id = ? AND ts_ms >= ? AND ts_ms < ? AND (ts_ms, seq) > (?, ?) "
+            "ORDER BY ts_ms, seq LIMIT ?",
+            (user_id, start_ms, end_ms, after_ts, after_seq, -1 if limit is None else limit)
+        ).fetchall()
+        return [_prediction(row) for row in rows]
+
+    def iter_history(
+        self,
+        user_id: str,
+        start_ms: int,
+        end_ms: Optional[int] = None,
+        batch: int = 1000
+    ) -> Iterator[List[Dict]]:
+        """Predições de [start_ms, end_ms) em blocos de até `batch`, sem materializar o período"""
+        # O stream lê só o banco: grava antes o que está no buffer
+        self.flush()
+        end_ms = end_ms if end_ms is not None else 2 ** 62
+        cursor = self._connect().execute(
+            "SELECT ts_ms, seq, score, status, confidence, model_version FROM predictions "
+            "WHERE user_id = ? AND ts_ms >= ? AND ts_ms < ? ORDER BY ts_ms, seq",
+            (user_id, start_ms, end_ms)
+        )
+        try:
+            while True:
+                rows = cursor.fetchmany(batch)
+                if not rows:
+                    break
+                yield [_prediction(row) for row in rows]
+        finally:
+            cursor.connection.close()
+
+    def rollups(
+        self,
+        user_id: str,
+        resolution: str,
+        start_ms: int,
+        end_ms: Optional[int] = None
+    ) -> List[Dict]:
+        """Um ponto agregado por período que cruza [start_ms, end_ms)"""
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"resolution deve ser um de {list(RESOLUTIONS)}")
+        # Agregados só incluem o que já foi gravado
+        self.flush()
+
+        bucket_of = RESOLUTIONS[resolution]
+        first = bucket_of(datetime.fromtimestamp(start_ms / 1000))
+        last = bucket_of(datetime.fromtimestamp(end_ms / 1000)) if end_ms is not None else '\uffff'
+        rows = self._connection().execute(
+            "SELECT bucket, n, score_sum, score_min, score_max, last_score, "
+            "healthy, attention, risk, critical FROM rollups "
+            "WHERE user_id = ? AND resolution = ? AND bucket >= ? AND bucket <= ? ORDER BY bucket",
+            (user_id, resolution, first, last)
+        ).fetchall()
+
+        return [
+            {
+                'period': bucket,
+                'count': n,
+                'min': score_min,
+                'max': score_max,
+                'mean': score_sum / n,
+                'last': last_score,
+                'status_counts': dict(zip(STATUSES, counts))
+            }
+            for bucket, n, score_sum, score_min, score_max, last_score, *counts in rows
+        ]
+
+    def daily_last_scores(self, start_ms: int, batch: int = 100_000):
+        """Itera (user_id, dia, último score) de cada dia desde `start_ms`"""
+        # Inclui o que ainda está no buffer deste processo (lido só ao iterar)
+        self.flush()
+        first = RESOLUTIONS['day'](datetime.fromtimestamp(start_ms / 1000))
+        cursor = self._connect().execute(
+            "SELECT user_id, bucket, last_score FROM rollups WHERE resolution = 'day' AND bucket >= ?",
+            (first,)
+        )
+        days = {}  # cada bucket é convertido uma vez
+        try:
+            while True:
+                rows = cursor.fetchmany(batch)
+                if not rows:
+                    break
+                for user_id, bucket, score in rows:
+                    day = days.get(bucket)
+                    if day is None:
+                        day = days[bucket] = datetime.strptime(bucket, '%Y-%m-%d').date()
+                    yield user_id, day, score
+        finally:
+            cursor.connection.close()
+
+    def latest_day_scores(self, user_ids: Sequence[str], first_day: date, chunk: int = 500) -> Dict[str, int]:
+        """Último score de cada usuário no seu dia mais recente desde `first_day`"""
+        # Inclui o que ainda está no buffer deste processo
+        self.flush()
+        first = RESOLUTIONS['day'](first_day)
+        conn = self._connection()
+        latest: Dict[str, int] = {}
+        for start in range(0, len(user_ids), chunk):
+            part = list(user_ids[start:start + chunk])
+            rows = conn.execute(
+                "SELECT user_id, last_score FROM rollups WHERE resolution = 'day' AND bucket >= ? "
+                f"AND user_id IN ({', '.join('?' * len(part))}) ORDER BY bucket",
+                (first, *part)
+            )
+            # Ordem por dia: o mais recente de cada usuário sobrescreve os anteriores
+            latest.update(rows)
+        return latest
+
+    def stats(self) -> Dict:
+        return {
+            'path': self.path,
+            'pending': len(self._pending),
+            'written': self.written,
+            'commits': self.commits,
+            'failed_commits': self.failed_commits,
+            'rows_per_commit': self.written / self.commits if self.commits else 0.0
+        }
+
+    # ==================== HELPERS ====================
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        # Uma conexão por thread (leituras concorrentes no modo WAL)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+
+def _prediction(row: tuple) -> Dict:
+    ts_ms, seq, score, status, confidence, model_version = row
+    return {
+        'ts_ms': ts_ms,
+        'seq': seq,
+        'score': score,
+        'status': status,
+        'confidence': confidence,
+        'model_version': model_version
+    }
+
+
+def _aggregate(rows: Sequence[Row]) -> List[tuple]:
+    """Agrega um lote de predições por (usuário, resolução, período)"""
+    groups: Dict[tuple, list] = {}
+    for user_id, ts_ms, score, status, _, _ in rows:
+        dt = datetime.fromtimestamp(ts_ms / 1000)
+        for resolution, bucket_of in RESOLUTIONS.items():
+            key = (user_id, resolution, bucket_of(dt))
+            group = groups.get(key)
+            if group is None:
+                # n, soma, mín, máx, último ts, último score, contagens
+                group = groups[key] = [0, 0, score, score, ts_ms, score, 0, 0, 0, 0]
+            group[0] += 1
+            group[1] += score
+            group[2] = min(group[2], score)
+            group[3] = max(group[3], score)
+            if ts_ms >= group[4]:
+                group[4], group[5] = ts_ms, score
+            if status in STATUSES:
+                group[6 + STATUSES.index(status)] += 1
+    return [key + tuple(group) for key, group in groups.items()]
@@ -0,0 +1,215 @@
+"""
+Matriz de Scores em Memória - histórico diário recente de todos os usuários
+"""
+
+import threading
+from bisect import bisect_right
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.prediction_store import STATUSES
+
+# Limites de score entre os status (mesmos de predict_burnout)
+SCORE_THRESHOLDS = (30, 60, 80)
+
+# Dia sem predição
+NO_SCORE = 255
+
+
+def status_for(score: int) -> str:
+    """Status de um score"""
+    return STATUSES[bisect_right(SCORE_THRESHOLDS, score)]
+
+
+def status_codes(scores: np.ndarray) -> np.ndarray:
+    """Índice em STATUSES de cada score (-1 onde não há score)"""
+    codes = np.searchsorted(SCORE_THRESHOLDS, scores, side='right').astype(np.int8)
+    codes[scores == NO_SCORE] = -1
+    return codes
+
+
+class ScoreMatrix:
+    """
+    Último score de cada usuário em cada um dos últimos `days` dias
+
+    Uma matriz uint8 (usuários x (days + slack)) guarda os dias como um
+    buffer deslizante: a janela válida são sempre as `days` colunas
+    antes de `_end`, então a janela de um usuário é uma fatia contígua
+    da linha e um dia de todos os usuários é uma coluna, ambos sem
+    cópia. Quando as colunas de folga acabam, a janela é movida para o
+    início (uma cópia a cada `slack` dias). Memória: capacidade x
+    (days + slack) bytes, mais o dicionário usuário -> linha; a
+    capacidade dobra quando enche.
+
+    Escritas podem mover ou realocar a matriz, inclusive a carga
+    rodando em outra thread: as leituras são feitas sob o mesmo lock e
+    devolvem cópias. Uma view seria lida depois do lock e poderia
+    apontar para colunas já movidas (outro dia ou outro usuário); a
+    cópia de uma fatia contígua custa no máximo `days` bytes por
+    usuário ou um byte por usuário por dia, bem menos que a resposta
+    JSON montada a partir dela.
+
+    Cada worker tem a sua matriz: `load` é chamado de novo periodicamente
+    com os agregados diários do SQLite para incluir os scores gravados
+    pelos outros workers.
+    """
+
+    def __init__(self, days: int = 365, slack: int = 31, initial_capacity: int = 1024):
+        if days < 1 or slack < 1:
+            raise ValueError("days e slack devem ser >= 1")
+
+        self.days = days
+        self.slack = slack
+        self._matrix = np.full((initial_capacity, days + slack), NO_SCORE, dtype=np.uint8)
+        self._rows: Dict[str, int] = {}
+        self._user_ids: List[str] = []
+        self._end = days              # coluna logo após o dia mais recente
+        self._latest: Optional[int] = None  # ordinal do dia mais recente
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        # (usuário, dia) gravados ao vivo durante uma carga
+        self._live: Optional[set] = None
+
+    # ==================== ESCRITA ====================
+
+    def record(self, user_ids: Sequence[str], scores: Sequence[int], day: Optional[date] = None):
+        """Grava o score do dia (o último gravado no dia prevalece)"""
+        ordinal = (day or date.today()).toordinal()
+        with self._lock:
+            self._write(ordinal, user_ids, scores)
+            if self._live is not None:
+                self._live.update((user_id, ordinal) for user_id in user_ids)
+
+    def load(self, entries: Iterable[Tuple[str, date, int]]):
+        """
+        Carga (ou recarga) a partir de (usuário, dia, score), em qualquer ordem
+
+        Os valores do banco substituem os da matriz, exceto os gravados
+        por `record` depois do início da carga: `entries` pode ter sido
+        lido antes deles, então o score ao vivo prevalece.
+        """
+        with self._load_lock:
+            with self._lock:
+                self._live = set()
+            try:
+                by_day: Dict[int, Tuple[List[str], List[int]]] = {}
+                for user_id, day, score in entries:
+                    users, scores = by_day.setdefault(day.toordinal(), ([], []))
+                    users.append(user_id)
+                    scores.append(score)
+                for ordinal in sorted(by_day):
+                    users, scores = by_day[ordinal]
+                    with self._lock:
+                        keep = [(u, s) for u, s in zip(users, scores) if (u, ordinal) not in self._live]
+                        if keep:
+                            self._write(ordinal, *zip(*keep))
+            finally:
+                with self._lock:
+                    self._live = None
+
+    # ==================== LEITURA ====================
+
+    def user_window(self, user_id: str, days: Optional[int] = None) -> Optional[np.ndarray]:
+        """Últimos `days` dias do usuário (NO_SCORE = sem dado)"""
+        days = min(days or self.days, self.days)
+        with self._lock:
+            row = self._rows.get(user_id)
+            if row is None:
+                return None
+            return self._matrix[row, self._end - days:self._end].copy()
+
+    def day_column(self, day: Optional[date] = None) -> Optional[np.ndarray]:
+        """Scores de todos os usuários no dia, alinhados com `user_ids`"""
+        ordinal = (day or date.today()).toordinal()
+        with self._lock:
+            column = self._column(ordinal) if self._latest is not None and ordinal <= self._latest else None
+            if column is None:
+                return None
+            return self._matrix[:len(self._user_ids), column].copy()
+
+    @property
+    def user_ids(self) -> List[str]:
+        return self._user_ids
+
+    @property
+    def latest_day(self) -> Optional[date]:
+        return date.fromordinal(self._latest) if self._latest is not None else None
+
+    def window_start(self, days: Optional[int] = None) -> Optional[date]:
+        """Primeiro dia de uma janela de `days` dias terminando no dia mais recente"""
+        if self._latest is None:
+            return None
+        return date.fromordinal(self._latest - min(days or self.days, self.days) + 1)
+
+    def memory_bytes(self) -> int:
+        """Bytes da matriz (o dicionário de usuários é aproximado à parte em stats)"""
+        return self._matrix.nbytes
+
+    def stats(self) -> Dict:
+        return {
+            'users': len(self._user_ids),
+            'capacity': self._matrix.shape[0],
+            'days': self.days,
+            'latest_day': self.latest_day.isoformat() if self._latest is not None else None,
+            'matrix_bytes': self.memory_bytes(),
+            # ~100 bytes por entrada de dict + string curta
+            'index_bytes_estimate': len(self._user_ids) * 100
+        }
+
+    # ==================== HELPERS ====================
+
+    def _write(self, ordinal: int, user_ids: Sequence[str], scores: Sequence[int]):
+        self._advance(ordinal)
+        column = self._column(ordinal)
+        if column is None:
+            return  # anterior à janela
+        rows = self._rows_for(user_ids)
+        self._matrix[rows, column] = np.clip(scores, 0, NO_SCORE - 1)
+
+    def _column(self, ordinal: int) -> Optional[int]:
+        age = self._latest - ordinal
+        if age < 0 or age >= self.days:
+            return None
+        return self._end - 1 - age
+
+    def _advance(self, ordinal: int):
+        """Abre colunas vazias até o dia `ordinal`"""
+        if self._latest is None:
+            self._latest = ordinal
+            return
+        steps = ordinal - self._latest
+        if steps <= 0:
+            return
+
+        if steps >= self.days:
+            self._matrix[:, :self.days] = NO_SCORE
+            self._end = self.days
+        elif self._end + steps <= self._matrix.shape[1]:
+            self._matrix[:, self._end:self._end + steps] = NO_SCORE
+            self._end += steps
+        else:
+            # Sem folga: move os dias que continuam na janela para o início
+            keep = self.days - steps
+            self._matrix[:, :keep] = self._matrix[:, self._end - keep:self._end]
+            self._matrix[:, keep:self.days] = NO_SCORE
+            self._end = self.days
+        self._latest = ordinal
+
+    def _rows_for(self, user_ids: Sequence[str]) -> np.ndarray:
+        rows = np.empty(len(user_ids), dtype=np.int64)
+        for i, user_id in enumerate(user_ids):
+            row = self._rows.get(user_id)
+            if row is None:
+                row = self._rows[user_id] = len(self._user_ids)
+                self._user_ids.append(user_id)
+                if row >= self._matrix.shape[0]:
+                    self._grow()
+            rows[i] = row
+        return rows
+
+    def _grow(self):
+        grown = np.full((self._matrix.shape[0] * 2, self._matrix.shape[1]), NO_SCORE, dtype=np.uint8)
+        grown[:self._matrix.shape[0]] = self._matrix
+        self._matrix = grown
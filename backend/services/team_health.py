@@ -0,0 +1,393 @@
+"""
+Saúde de Equipes - índice de membros e agregação vetorizada
+"""
+
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from services.prediction_store import STATUSES, PredictionStore
+from services.score_matrix import NO_SCORE, SCORE_THRESHOLDS, status_for
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS team_members (
+    team_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    PRIMARY KEY (team_id, user_id)
+) WITHOUT ROWID
+"""
+
+PERCENTILES = (25, 50, 75, 90)
+
+# Score a partir do qual o membro entra na lista de alerta (Risco ou pior)
+RISK_THRESHOLD = SCORE_THRESHOLDS[STATUSES.index("Risco") - 1]
+
+
+class TeamIndex:
+    """
+    Membros de cada equipe, persistidos em SQLite e mantidos em memória
+
+    Guarda o array de usuários de cada equipe e, para cada usuário, as
+    equipes de que faz parte.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._members: Dict[str, np.ndarray] = {}
+        self._teams_of: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute(SCHEMA)
+            members: Dict[str, List[str]] = {}
+            for team_id, user_id in conn.execute("SELECT team_id, user_id FROM team_members"):
+                members.setdefault(team_id, []).append(user_id)
+        for team_id, user_ids in members.items():
+            self._add_team(team_id, user_ids)
+
+    # ==================== ESCRITA ====================
+
+    def set_members(self, team_id: str, user_ids: Sequence[str]):
+        """Substitui os membros da equipe (lista vazia remove a equipe)"""
+        user_ids = list(dict.fromkeys(user_ids))
+        with self._connect() as conn:
+            conn.execute("DELETE FROM team_members WHERE team_id = ?", (team_id,))
+            conn.executemany(
+                "INSERT INTO team_members VALUES (?, ?)", ((team_id, u) for u in user_ids)
+            )
+        with self._lock:
+            for user_id in self._members.pop(team_id, ()):
+                teams = self._teams_of[user_id]
+                teams.remove(team_id)
+                if not teams:
+                    del self._teams_of[user_id]
+            if user_ids:
+                self._add_team(team_id, user_ids)
+
+    def _add_team(self, team_id: str, user_ids: List[str]):
+        self._members[team_id] = np.asarray(user_ids, dtype=object)
+        for user_id in user_ids:
+            self._teams_of.setdefault(user_id, []).append(team_id)
+
+    # ==================== LEITURA ====================
+
+    def members(self, team_id: str) -> Optional[np.ndarray]:
+        return self._members.get(team_id)
+
+    def teams(self) -> List[str]:
+        return list(self._members)
+
+    def teams_of(self, user_id: str) -> List[str]:
+        return self._teams_of.get(user_id, [])
+
+    def stats(self) -> Dict:
+        return {
+            'teams': len(self._members),
+            'memberships': int(sum(len(m) for m in self._members.values()))
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+
+class TeamAggregates:
+    """
+    Agregados de cada equipe mantidos a cada score gravado
+
+    Por equipe: o score atual de cada membro, a soma dos scores, o
+    histograma dos 255 scores possíveis (distribuição e percentis saem
+    dele) e os membros em Risco/Crítico agrupados por score. Um novo
+    score de um membro atualiza cada equipe dele em O(1); o dashboard lê
+    um snapshot montado em O(255 + top_k) e guardado até a próxima
+    mudança.
+
+    `update` só enfileira: os scores são aplicados por uma thread
+    própria (`start`), fora do event loop, e antes de cada `snapshot`.
+
+    Vale o score mais recente de cada membro em `max_age_days` dias.
+    Scores que envelhecem e scores gravados por outros workers não geram
+    evento aqui: entram em `reconcile`, que recalcula cada equipe a partir
+    dos agregados diários do SQLite (compartilhado entre os workers) e
+    conta a divergência encontrada. A leitura do banco roda fora do lock;
+    os scores aplicados enquanto ela roda são reaplicados no estado novo
+    antes da troca.
+    """
+
+    def __init__(self, index: TeamIndex, store: PredictionStore, max_age_days: int = 7, top_k: int = 20):
+        self.index = index
+        self.store = store
+        self.max_age_days = max_age_days
+        self.top_k = top_k
+
+        self._teams: Dict[str, _TeamState] = {}
+        self._snapshots: Dict[str, Dict] = {}
+        # Scores aplicados a cada equipe durante uma reconstrução dela
+        self._building: Dict[str, Dict[int, List[Tuple[str, int]]]] = {}
+        self._lock = threading.Lock()
+
+        self._pending: List[Tuple[str, int]] = []
+        self._pending_lock = threading.Lock()
+        self._apply_lock = threading.Lock()  # aplica os lotes na ordem em que chegaram
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+        # Métricas
+        self.updates = 0
+        self.reconciliations = 0
+        self.drifted_teams = 0
+        self.last_reconcile: Optional[float] = None
+
+    # ==================== CICLO DE VIDA ====================
+
+    def start(self):
+        """Inicia a thread que aplica os scores enfileirados"""
+        if self._worker is not None:
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name="team-aggregates", daemon=True)
+        self._worker.start()
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        self.flush()
+
+    # ==================== ESCRITA ====================
+
+    def update(self, user_ids: Sequence[str], scores: Sequence[int]):
+        """Enfileira novos scores (do dia mais recente) para as equipes dos usuários"""
+        with self._pending_lock:
+            self._pending.extend(zip(user_ids, scores))
+        self._wake.set()
+
+    def flush(self):
+        """Aplica os scores enfileirados"""
+        with self._apply_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, []
+            if pending:
+                self._apply(pending)
+
+    def rebuild(self, team_id: str):
+        """Recalcula uma equipe a partir do banco (ex.: após mudar os membros)"""
+        self._rebuild(team_id)
+
+    def reconcile(self) -> int:
+        """Recalcula todas as equipes a partir do banco; devolve quantas tinham divergido"""
+        with self._lock:
+            for team_id in list(self._teams):
+                if self.index.members(team_id) is None:
+                    del self._teams[team_id]
+                    self._snapshots.pop(team_id, None)
+
+        # Uma equipe por vez: o lock só é segurado na troca de cada uma
+        drifted = 0
+        for team_id in self.index.teams():
+            before, after = self._rebuild(team_id)
+            if before is not None and after is not None and not before.same_as(after):
+                drifted += 1
+
+        with self._lock:
+            self.reconciliations += 1
+            self.drifted_teams += drifted
+            self.last_reconcile = time.time()
+        return drifted
+
+    def _apply(self, updates: List[Tuple[str, int]]):
+        with self._lock:
+            for user_id, score in updates:
+                teams = self.index.teams_of(user_id)
+                if not teams:
+                    continue
+                score = min(max(int(score), 0), NO_SCORE - 1)
+                changed = False
+                for team_id in list(teams):
+                    for log in self._building.get(team_id, {}).values():
+                        log.append((user_id, score))
+                    state = self._teams.get(team_id)
+                    if state is not None and state.set(user_id, score):
+                        self._snapshots.pop(team_id, None)
+                        changed = True
+                self.updates += changed
+
+    def _rebuild(self, team_id: str) -> Tuple[Optional["_TeamState"], Optional["_TeamState"]]:
+        """(estado anterior, estado novo) da equipe recalculada a partir do banco"""
+        members = self.index.members(team_id)
+        log: List[Tuple[str, int]] = []
+        with self._lock:
+            self._building.setdefault(team_id, {})[id(log)] = log
+        try:
+            state = None
+            if members is not None:
+                first_day = date.today() - timedelta(days=self.max_age_days - 1)
+                latest = self.store.latest_day_scores(members, first_day)
+                scores = np.fromiter(
+                    (min(max(latest[u], 0), NO_SCORE - 1) if u in latest else NO_SCORE for u in members),
+                    dtype=np.uint8, count=len(members)
+                )
+                state = _TeamState.from_scores(members, scores)
+        finally:
+            with self._lock:
+                logs = self._building[team_id]
+                del logs[id(log)]
+                if not logs:
+                    del self._building[team_id]
+
+        with self._lock:
+            if self.index.members(team_id) is not members:
+                # Membros trocados durante a leitura: vale a reconstrução de set_members
+                return None, None
+            if state is None:
+                before = self._teams.pop(team_id, None)
+            else:
+                for user_id, score in log:
+                    state.set(user_id, score)
+                before = self._teams.get(team_id)
+                self._teams[team_id] = state
+            self._snapshots.pop(team_id, None)
+        return before, state
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f" Falha ao atualizar agregados de equipes: {e}")
+
+    # ==================== LEITURA ====================
+
+    def snapshot(self, team_id: str) -> Optional[Dict]:
+        """Agregados atuais da equipe (None se a equipe não existe)"""
+        self.flush()
+        snapshot = self._snapshots.get(team_id)
+        if snapshot is not None:
+            return snapshot
+        if team_id not in self._teams:
+            if self.index.members(team_id) is None:
+                return None
+            self._rebuild(team_id)
+        with self._lock:
+            state = self._teams.get(team_id)
+            if state is None:
+                return None
+            snapshot = self._snapshots[team_id] = state.summary(self.top_k)
+        return snapshot
+
+    def stats(self) -> Dict:
+        return {
+            'teams': len(self._teams),
+            'pending': len(self._pending),
+            'updates': self.updates,
+            'reconciliations': self.reconciliations,
+            'drifted_teams': self.drifted_teams,
+            'last_reconcile': self.last_reconcile
+        }
+
+
+class _TeamState:
+    """Score de cada membro, soma, histograma e membros em risco por score de uma equipe"""
+
+    __slots__ = ('members', 'scores', 'score_sum', 'histogram', 'at_risk')
+
+    def __init__(self, members: int):
+        self.members = members
+        self.scores: Dict[str, int] = {}  # NO_SCORE = sem score
+        self.score_sum = 0
+        self.histogram = [0] * (NO_SCORE + 1)  # último bin: sem score
+        self.at_risk: Dict[int, Set[str]] = {}
+
+    @classmethod
+    def from_scores(cls, user_ids: np.ndarray, scores: np.ndarray) -> "_TeamState":
+        state = cls(len(scores))
+        state.scores = dict(zip(user_ids.tolist(), scores.tolist()))
+        has_score = scores != NO_SCORE
+        state.score_sum = int(scores[has_score].sum(dtype=np.int64))
+        state.histogram = np.bincount(scores, minlength=NO_SCORE + 1).tolist()
+        for i in np.flatnonzero(has_score & (scores >= RISK_THRESHOLD)):
+            state.at_risk.setdefault(int(scores[i]), set()).add(user_ids[i])
+        return state
+
+    def set(self, user_id: str, new: int) -> bool:
+        """Troca o score do membro; False se não é membro ou nada mudou"""
+        old = self.scores.get(user_id)
+        if old is None or old == new:
+            return False
+        self.scores[user_id] = new
+        self.histogram[old] -= 1
+        self.histogram[new] += 1
+        if old != NO_SCORE:
+            self.score_sum -= old
+            if old >= RISK_THRESHOLD:
+                bucket = self.at_risk[old]
+                bucket.discard(user_id)
+                if not bucket:
+                    del self.at_risk[old]
+        if new != NO_SCORE:
+            self.score_sum += new
+            if new >= RISK_THRESHOLD:
+                self.at_risk.setdefault(new, set()).add(user_id)
+        return True
+
+    def same_as(self, other: "_TeamState") -> bool:
+        return (
+            self.scores == other.scores
+            and self.score_sum == other.score_sum
+            and self.histogram == other.histogram
+            and self.at_risk == other.at_risk
+        )
+
+    def summary(self, top_k: int) -> Dict:
+        histogram = np.asarray(self.histogram[:NO_SCORE], dtype=np.int64)
+        scored = int(histogram.sum())
+        counts = np.add.reduceat(histogram, (0,) + SCORE_THRESHOLDS)
+
+        # Top-k: percorre os scores do maior para o menor
+        at_risk = []
+        for score in sorted(self.at_risk, reverse=True):
+            for user_id in itertools.islice(self.at_risk[score], top_k - len(at_risk)):
+                at_risk.append({'user_id': user_id, 'score': score, 'status': status_for(score)})
+            if len(at_risk) >= top_k:
+                break
+
+        return {
+            'members': self.members,
+            'members_with_score': scored,
+            'overall_score': self.score_sum // scored if scored else None,
+            'distribution': {status: int(n) for status, n in zip(STATUSES, counts)},
+            'percentiles': _percentiles(histogram, scored),
+            'at_risk_members': at_risk
+        }
+
+
+def _percentiles(histogram: np.ndarray, n: int) -> Dict[str, float]:
+    """
+    Mesmo resultado de np.percentile (interpolação linear) sem ordenar
+
+    Os scores são uint8: o k-ésimo menor valor sai do histograma
+    acumulado, em vez de ordenar os `n` scores.
+    """
+    if not n:
+        return {}
+    cumulative = np.cumsum(histogram)
+    position = np.asarray(PERCENTILES) / 100 * (n - 1)
+    low, high = np.floor(position), np.ceil(position)
+    value_low = np.searchsorted(cumulative, low, side='right')
+    value_high = np.searchsorted(cumulative, high, side='right')
+    result = value_low + (value_high - value_low) * (position - low)
+    return {f"p{p}": float(v) for p, v in zip(PERCENTILES, result)}
@@ -0,0 +1,8 @@
+"""
+Configuração dos testes do backend (python -m pytest a partir de backend/)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,71 @@
+"""
+Testes da leitura incremental de JSON/NDJSON do scoring em lote
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from services.bulk_scoring import BulkParseError, InvalidRecord, iter_records
+
+
+def read(body: str, chunk_size: int = 7, **kwargs):
+    """Lê `body` em chunks de `chunk_size` bytes e devolve os registros"""
+    data = body.encode('utf-8')
+
+    async def chunks():
+        for i in range(0, len(data), chunk_size):
+            yield data[i:i + chunk_size]
+
+    async def collect():
+        return [record async for record in iter_records(chunks(), **kwargs)]
+
+    return asyncio.run(collect())
+
+
+def describe(records):
+    return [('invalid' if isinstance(r, InvalidRecord) else r) for r in records]
+
+
+RECORDS = [{"user_id": f"u{i}", "hours": i, "note": "a,b]\"c"} for i in range(5)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64, 10_000])
+def test_array_and_ndjson_yield_every_record(chunk_size):
+    assert read(json.dumps(RECORDS), chunk_size) == RECORDS
+    assert read("\n".join(json.dumps(r) for r in RECORDS) + "\n", chunk_size) == RECORDS
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 10_000])
+def test_malformed_ndjson_line_does_not_discard_the_rest(chunk_size):
+    lines = [json.dumps(r) for r in RECORDS]
+    body = "\n".join(lines[:3] + ["{bad}"] + lines[3:])
+    records = read(body, chunk_size)
+    assert describe(records) == RECORDS[:3] + ['invalid'] + RECORDS[3:]
+    assert "Linha 4" in records[3].error
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 10_000])
+def test_malformed_array_element_keeps_its_position(chunk_size):
+    elements = [json.dumps(r) for r in RECORDS]
+    body = "[" + ", ".join(elements[:2] + ['{bad: [1, "x]"]}'] + elements[2:]) + "]"
+    assert describe(read(body, chunk_size)) == RECORDS[:2] + ['invalid'] + RECORDS[2:]
+
+
+def test_truncated_array_reports_last_element_and_unclosed_array():
+    with pytest.raises(BulkParseError, match="não foi fechado"):
+        read(json.dumps(RECORDS)[:-10])
+
+
+@pytest.mark.parametrize("body", ['{"x": "' + "a" * 500, '[{"x": "' + "a" * 500])
+def test_oversized_record_fails_fast(body):
+    with pytest.raises(BulkParseError, match="excede"):
+        read(body + '"}' + "\n" * 10, chunk_size=16, max_record_size=100)
+
+
+def test_buffer_stays_bounded_after_malformed_array_element():
+    """Um elemento malformado não pode reter o resto do corpo até o EOF"""
+    body = "[{bad}, " + ", ".join(json.dumps(r) for r in RECORDS * 200) + "]"
+    records = read(body, chunk_size=64, max_record_size=200)
+    assert describe(records) == ['invalid'] + RECORDS * 200
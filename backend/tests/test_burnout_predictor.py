@@ -0,0 +1,63 @@
+"""
+Testes do ciclo de vida do modelo no BurnoutPredictor
+"""
+
+import numpy as np
+import pytest
+
+from ml.burnoutpredictor import BurnoutPredictor
+
+
+@pytest.fixture
+def predictor(tmp_path, monkeypatch):
+    predictor = BurnoutPredictor(model_path=str(tmp_path / "m.h5"), cache_size=100)
+
+    def fail():
+        raise AssertionError("load_model chamado no caminho de predição")
+    monkeypatch.setattr(predictor, "load_model", fail)
+    return predictor
+
+
+@pytest.mark.parametrize("state", ["unloaded", "loading", "training", "failed"])
+def test_predict_never_loads_inline(predictor, state):
+    predictor.state = state
+    features = np.ones((2, 8), dtype=np.float32)
+    assert len(predictor.predict_batch(features)) == 2
+    assert len(predictor.predict_incremental(["a", "b"], features)) == 2
+    # Heurística não vai para o cache
+    assert predictor.cache.stats()['size'] == 0
+
+
+class BlockingRegistry:
+    """Registro que permite inspecionar o estado durante a carga"""
+
+    def __init__(self, predictor, fail=False):
+        self.predictor = predictor
+        self.fail = fail
+        self.state_during_load = None
+
+    def load(self, version, runtime, precision):
+        self.state_during_load = self.predictor.state
+        if self.fail:
+            raise RuntimeError("artefato inválido")
+        return _Model(), 1.0
+
+
+class _Model:
+    def predict(self, sequences, verbose=0):
+        return np.tile([0.7, 0.1, 0.1, 0.1], (len(sequences), 1))
+
+
+def test_activation_on_an_unloaded_predictor_marks_it_loading(predictor):
+    registry = BlockingRegistry(predictor)
+    predictor.activate_version(registry, "1.0.0")
+    assert registry.state_during_load == "loading"
+    assert predictor.state == "ready" and predictor.version == "1.0.0"
+
+
+def test_failed_activation_restores_previous_state(predictor):
+    predictor.state = "loading"
+    with pytest.raises(RuntimeError):
+        predictor.activate_version(BlockingRegistry(predictor, fail=True), "1.0.0")
+    assert predictor.state == "loading"
+    assert predictor.swap_error == "artefato inválido"
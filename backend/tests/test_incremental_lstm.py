@@ -0,0 +1,123 @@
+"""
+Testes do scoring incremental: idempotência por dia e reconstrução dos estados
+"""
+
+import numpy as np
+import pytest
+
+from ml.daily_features import DailyFeatureStore
+from ml.incremental_lstm import IncrementalLSTMScorer, StaleDayError
+from ml.numpy_runtime import NumpyLSTMModel
+
+N_FEATURES = 8
+WINDOW = 30
+
+
+def random_model(seed=0, units=(8, 4)):
+    rng = np.random.default_rng(seed)
+    lstm, inputs = [], N_FEATURES
+    for n in units:
+        lstm.append(NumpyLSTMModel._lstm_layer(
+            rng.normal(0, 0.5, (inputs, 4 * n)), rng.normal(0, 0.5, (n, 4 * n)),
+            rng.normal(0, 0.1, 4 * n), 'tanh', 'sigmoid'
+        ))
+        inputs = n
+    dense = [NumpyLSTMModel._dense_layer(rng.normal(0, 0.5, (inputs, 4)), np.zeros(4), 'softmax')]
+    return NumpyLSTMModel(lstm, dense)
+
+
+@pytest.fixture
+def model():
+    return random_model()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DailyFeatureStore(str(tmp_path / "features.db"), N_FEATURES)
+
+
+def days_features(n, seed=1):
+    return np.random.default_rng(seed).normal(0, 1, (n, N_FEATURES)).astype(np.float32)
+
+
+def reference(model, days):
+    """Probabilidades recalculando a janela inteira do zero"""
+    window = np.asarray(days[-WINDOW:], dtype=np.float32)[np.newaxis]
+    return model.head(model.run_sequence(window)[-1][0])[0]
+
+
+def scorer(model, recompute_every=3):
+    return IncrementalLSTMScorer(model, window=WINDOW, recompute_every=recompute_every)
+
+
+def step(scorer, store, user_id, day, features):
+    """Mesma ordem do BurnoutPredictor: passo e depois gravação do dia"""
+    probs = scorer.step_batch(
+        [user_id], features[np.newaxis], [day],
+        load_history=store.windows if store is not None else None
+    )[0]
+    if store is not None:
+        store.put([user_id], [day], features[np.newaxis])
+    return probs
+
+
+@pytest.mark.parametrize("use_store", [False, True])
+def test_retrying_a_day_does_not_advance_the_state(model, store, use_store):
+    store = store if use_store else None
+    features = days_features(8)
+    s = scorer(model)
+    for day in range(1, 8):
+        first = step(s, store, "u", day, features[day - 1])
+        retry = step(s, store, "u", day, features[day - 1])
+        np.testing.assert_allclose(first, retry, atol=1e-5)
+        np.testing.assert_allclose(retry, reference(model, features[:day]), atol=1e-5)
+
+
+def test_resending_a_day_with_new_features_replaces_it(model):
+    features = days_features(6)
+    corrected = days_features(1, seed=9)[0]
+    s = scorer(model)
+    for day in range(1, 7):
+        step(s, None, "u", day, features[day - 1])
+    probs = step(s, None, "u", 6, corrected)
+    np.testing.assert_allclose(probs, reference(model, list(features[:5]) + [corrected]), atol=1e-5)
+    # O dia seguinte parte do dia corrigido
+    nxt = days_features(1, seed=10)[0]
+    np.testing.assert_allclose(
+        step(s, None, "u", 7, nxt), reference(model, list(features[:5]) + [corrected, nxt]), atol=1e-5
+    )
+
+
+def test_day_before_the_last_is_rejected(model, store):
+    s = scorer(model)
+    features = days_features(3)
+    step(s, store, "u", 9, features[0])
+    step(s, store, "u", 10, features[1])
+    with pytest.raises(StaleDayError):
+        step(s, store, "u", 9, features[2])
+    # O dia gravado continua o original
+    np.testing.assert_array_equal(store.window("u", 10, 2), features[:2])
+
+
+def test_lost_state_is_rebuilt_from_stored_days(model, store):
+    features = days_features(9)
+    before = scorer(model)
+    for day in range(1, 9):
+        step(before, store, "u", day, features[day - 1])
+
+    # Restart ou troca de modelo: novo scorer, mesmo SQLite
+    after = scorer(model)
+    probs = step(after, store, "u", 9, features[8])
+    np.testing.assert_allclose(probs, reference(model, features), atol=1e-5)
+    assert after.rebuilds == 1
+
+
+def test_days_served_by_another_worker_are_picked_up(model, store):
+    features = days_features(6)
+    a, b = scorer(model), scorer(model)
+    for day in (1, 2, 3):
+        step(a, store, "u", day, features[day - 1])
+    step(b, store, "u", 4, features[3])
+    step(b, store, "u", 5, features[4])
+    probs = step(a, store, "u", 6, features[5])
+    np.testing.assert_allclose(probs, reference(model, features), atol=1e-5)
@@ -0,0 +1,35 @@
+"""
+Testes do consumo de amostras rotuladas por chunk
+"""
+
+import numpy as np
+
+from ml.labeled_samples import LabeledSampleStore
+
+
+def _append(store, n, label):
+    store.append([f"u{i}" for i in range(n)], np.full((n, 3, 2), label, dtype=np.float32), [label] * n)
+
+
+def test_late_flush_from_another_worker_is_not_skipped(tmp_path):
+    # Dois workers: o primeiro recebe amostras antes, mas grava depois
+    early = LabeledSampleStore(str(tmp_path), flush_every=1000)
+    late = LabeledSampleStore(str(tmp_path), flush_every=1000)
+    _append(early, 4, 1)
+    _append(late, 3, 2)
+    late.flush()
+
+    consumed = set(late.chunks())
+    early.flush()
+
+    new_chunks = [name for name in early.chunks() if name not in consumed]
+    X, labels = early.load(new_chunks)
+    assert len(X) == 4 and set(labels.tolist()) == {1}
+
+
+def test_sample_limits_replay(tmp_path):
+    store = LabeledSampleStore(str(tmp_path), flush_every=5)
+    _append(store, 10, 3)
+    X, labels = store.sample(store.chunks(), 4, np.random.default_rng(0))
+    assert X.shape == (4, 3, 2) and labels.tolist() == [3] * 4
+    assert store.count() == 10
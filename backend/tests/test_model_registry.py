@@ -0,0 +1,124 @@
+"""
+Testes da versão ativa do registro e dos workers que a seguem
+"""
+
+import multiprocessing
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from ml import inference_executor
+from ml.model_registry import ActivationBackoff, ModelRegistry
+
+WEIGHTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "burnout_predictor.npz")
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    for version in ("1.0.0", "1.1.0"):
+        registry.register(version, [WEIGHTS])
+    return registry
+
+
+def test_active_pointer(registry):
+    assert registry.active() is None
+    assert registry.startup_version("1.0.0") == "1.0.0"
+    assert registry.startup_version("9.9.9") is None
+
+    registry.set_active("1.1.0")
+    assert registry.active() == "1.1.0"
+    # A versão ativada prevalece sobre MODEL_VERSION
+    assert registry.startup_version("1.0.0") == "1.1.0"
+    # O ponteiro não aparece como versão
+    assert registry.versions() == ["1.0.0", "1.1.0"]
+
+    with pytest.raises(KeyError):
+        registry.set_active("9.9.9")
+
+
+def test_process_worker_follows_active_version(registry, tmp_path):
+    config = dict(model_path=str(tmp_path / "m.h5"), runtime="numpy", cache_size=0)
+
+    inference_executor.init_worker_predictor(config, registry.root, "1.0.0", 0.0)
+    inference_executor._worker_swap.join(timeout=30)
+    worker = inference_executor._worker_predictor
+    assert worker.version == "1.0.0"
+
+    registry.set_active("1.1.0")
+    features = np.ones((2, 8), dtype=np.float32)
+    # A troca roda em background: o batch é atendido pelo modelo atual
+    assert len(inference_executor.worker_predict_batch(features)) == 2
+    inference_executor._worker_swap.join(timeout=30)
+    assert worker.version == "1.1.0" and worker.is_ready
+
+
+def test_process_worker_never_trains_and_waits_for_the_artifact(tmp_path):
+    config = dict(model_path=str(tmp_path / "m.h5"), runtime="numpy", cache_size=0)
+
+    inference_executor.init_worker_predictor(config, None, None, 0.0)
+    inference_executor._worker_swap.join(timeout=30)
+    worker = inference_executor._worker_predictor
+    assert not worker.is_ready and not os.listdir(tmp_path)
+
+    # Heurística enquanto o processo principal não grava o artefato
+    features = np.ones((2, 8), dtype=np.float32)
+    assert len(inference_executor.worker_predict_batch(features)) == 2
+    inference_executor._worker_swap.join(timeout=30)
+    assert not worker.is_ready
+
+    shutil.copy(WEIGHTS, tmp_path / "m.npz")
+    inference_executor.worker_predict_batch(features)
+    inference_executor._worker_swap.join(timeout=30)
+    assert worker.is_ready
+
+
+def _load_in_process(root):
+    ModelRegistry(root).load("1.0.0", "numpy")
+
+
+def test_concurrent_loads_keep_the_manifest_valid(registry):
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_load_in_process, args=(registry.root,)) for _ in range(6)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=120)
+        assert process.exitcode == 0
+
+    times = registry.manifest("1.0.0")['load_times_ms']['numpy-float32']
+    assert times['best'] <= times['last']
+    assert registry.versions() == ["1.0.0", "1.1.0"]
+    assert not [name for name in os.listdir(os.path.join(registry.root, "1.0.0")) if name.endswith(".tmp")]
+
+
+def test_load_survives_a_failed_timing_write(registry, monkeypatch):
+    def fail(*args):
+        raise OSError("disco cheio")
+    monkeypatch.setattr(registry, "record_load_time", fail)
+    model, _ = registry.load("1.0.0", "numpy")
+    assert model is not None
+
+
+def test_failed_activation_is_retried_with_backoff(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("ml.model_registry.time.monotonic", lambda: now[0])
+    backoff = ActivationBackoff(initial_seconds=5, max_seconds=20)
+
+    backoff.failed("1.1.0")
+    assert not backoff.ready("1.1.0")
+    now[0] += 5
+    assert backoff.ready("1.1.0")
+
+    backoff.failed("1.1.0")
+    now[0] += 5
+    assert not backoff.ready("1.1.0")
+    now[0] += 5
+    assert backoff.ready("1.1.0")
+
+    backoff.succeeded("1.1.0")
+    backoff.failed("1.1.0")
+    now[0] += 5
+    assert backoff.ready("1.1.0")
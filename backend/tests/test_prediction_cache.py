@@ -0,0 +1,48 @@
+"""
+Testes do cache de predições com troca de modelo
+"""
+
+import numpy as np
+
+from ml.burnoutpredictor import BurnoutPredictor
+from ml.prediction_cache import PredictionCache
+
+
+def test_put_after_clear_is_dropped():
+    cache = PredictionCache(max_size=10)
+    keys = cache.keys(np.ones((1, 8)))
+    generation = cache.generation
+    cache.clear()
+    cache.put_many(keys, [{'score': 1}], generation=generation)
+    assert cache.get_many(keys) == [None]
+    assert cache.stale_puts == 1
+
+    cache.put_many(keys, [{'score': 2}], generation=cache.generation)
+    assert cache.get_many(keys) == [{'score': 2}]
+
+
+class FakeModel:
+    def __init__(self, probs):
+        self.probs = np.asarray(probs, dtype=np.float32)
+        self.on_predict = None
+
+    def predict(self, sequences, verbose=0):
+        if self.on_predict is not None:
+            self.on_predict()
+        return np.tile(self.probs, (len(sequences), 1))
+
+
+def test_swap_during_forward_pass_does_not_cache_old_results(tmp_path):
+    predictor = BurnoutPredictor(model_path=str(tmp_path / "m.h5"), cache_size=100)
+    old, new = FakeModel([1, 0, 0, 0]), FakeModel([0, 0, 0, 1])
+    predictor.model, predictor.state = old, "ready"
+
+    def swap():
+        # Troca no meio do forward pass, como activate_version em outra thread
+        predictor.model = new
+        predictor._on_model_changed()
+    old.on_predict = swap
+
+    features = np.ones((1, 8), dtype=np.float32)
+    assert predictor.predict_batch(features)[0]['probabilities']['Saudável'] == 1.0
+    assert predictor.predict_batch(features)[0]['probabilities']['Crítico'] == 1.0
@@ -0,0 +1,126 @@
+"""
+Testes do histórico de predições em SQLite
+"""
+
+import random
+import sqlite3
+import time
+from datetime import datetime
+
+import pytest
+
+from services.prediction_store import RESOLUTIONS, STATUSES, PredictionStore
+from services.score_matrix import status_for
+
+TS = 1_700_000_000_000
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PredictionStore(str(tmp_path / "p.db"))
+    yield store
+    store.close()
+
+
+def _record(store, user_ids, scores, ts_ms=TS):
+    store.record(user_ids, scores, ["Atenção"] * len(scores), [0.9] * len(scores), ts_ms=ts_ms)
+
+
+def test_same_millisecond_predictions_are_all_kept(store):
+    # Mesmo usuário duas vezes no lote e de novo em outro commit, no mesmo ms
+    _record(store, ["a", "a", "b"], [20, 90, 50])
+    store.flush()
+    _record(store, ["a"], [40])
+
+    rows = store.history("a", TS - 1)
+    assert [(r['score'], r['seq']) for r in rows] == [(20, 0), (90, 1), (40, 2)]
+
+
+def test_pages_do_not_skip_rows_of_the_same_millisecond(store):
+    _record(store, ["a"] * 5, [10, 20, 30, 40, 50])
+    _record(store, ["a"], [60], ts_ms=TS + 1)
+
+    pages, after = [], None
+    while True:
+        page = store.history("a", TS - 1, limit=2, after=after)
+        if not page:
+            break
+        pages.append([r['score'] for r in page])
+        after = (page[-1]['ts_ms'], page[-1]['seq'])
+    assert pages == [[10, 20], [30, 40], [50, 60]]
+
+
+def test_failed_commit_keeps_the_batch(store, monkeypatch):
+    _record(store, ["a"], [10])
+    closed = store._connect()
+    closed.close()
+    monkeypatch.setattr(store, "_connection", lambda: closed)
+    with pytest.raises(sqlite3.Error):
+        store.flush()
+    # Chegou depois da falha: grava depois do lote devolvido
+    _record(store, ["a"], [20])
+    monkeypatch.undo()
+
+    assert [r['score'] for r in store.history("a", TS - 1)] == [10, 20]
+    assert store.stats()['failed_commits'] == 1
+
+
+def test_writer_retries_after_a_failed_commit(tmp_path, monkeypatch):
+    store = PredictionStore(str(tmp_path / "p.db"), flush_interval=0.01, max_retry_seconds=0.05)
+    connection = store._connection
+    failures = [3]
+
+    def flaky():
+        if failures[0]:
+            failures[0] -= 1
+            conn = store._connect()
+            conn.close()
+            return conn
+        return connection()
+
+    monkeypatch.setattr(store, "_connection", flaky)
+    store.start()
+    _record(store, ["a", "b"], [10, 20])
+    deadline = time.monotonic() + 10
+    while store.stats()['written'] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    store.close()
+    assert store.stats()['written'] == 2 and store.stats()['failed_commits'] == 3
+
+
+def _raw_rollups(store, user_id, resolution):
+    """Agregados recalculados das predições gravadas"""
+    points = {}
+    for row in store.history(user_id, 0):
+        bucket = RESOLUTIONS[resolution](datetime.fromtimestamp(row['ts_ms'] / 1000))
+        points.setdefault(bucket, []).append(row)
+    return [
+        {
+            'period': bucket,
+            'count': len(rows),
+            'min': min(r['score'] for r in rows),
+            'max': max(r['score'] for r in rows),
+            'mean': sum(r['score'] for r in rows) / len(rows),
+            # Empate no ms: vale a gravada por último (maior seq)
+            'last': max(rows, key=lambda r: (r['ts_ms'], r['seq']))['score'],
+            'status_counts': {s: sum(r['status'] == s for r in rows) for s in STATUSES}
+        }
+        for bucket, rows in sorted(points.items())
+    ]
+
+
+def test_rollups_match_raw_aggregates(store):
+    rng = random.Random(7)
+    day_ms = 24 * 3600 * 1000
+    for _ in range(40):
+        users = [rng.choice("abc") for _ in range(rng.randint(1, 6))]
+        scores = [rng.randint(0, 100) for _ in users]
+        # Poucos timestamps distintos: muitas colisões no mesmo ms
+        ts_ms = TS + rng.randint(0, 20) * day_ms // 2 + rng.randint(0, 2)
+        store.record(users, scores, [status_for(s) for s in scores], [0.5] * len(users), ts_ms=ts_ms)
+        if rng.random() < 0.3:
+            store.flush()
+
+    for resolution in RESOLUTIONS:
+        for user_id in "abc":
+            assert store.rollups(user_id, resolution, 0) == _raw_rollups(store, user_id, resolution)
@@ -0,0 +1,91 @@
+"""
+Testes da matriz de scores em memória
+"""
+
+import random
+import threading
+from datetime import date, timedelta
+
+from services.score_matrix import NO_SCORE, ScoreMatrix
+
+TODAY = date(2026, 3, 1)
+
+
+def _expected_window(written, user_id, latest, days):
+    return [written.get((user_id, latest - timedelta(days=k)), NO_SCORE) for k in range(days - 1, -1, -1)]
+
+
+def test_window_matches_reference_across_shifts_and_growth():
+    matrix = ScoreMatrix(days=10, slack=3, initial_capacity=2)
+    rng = random.Random(3)
+    written = {}
+    day = TODAY
+    for _ in range(200):
+        # Avança 0-4 dias (às vezes além da janela) e grava alguns usuários
+        day += timedelta(days=rng.choice([0, 0, 1, 1, 2, 4, 12]))
+        users = [f"u{rng.randint(0, 9)}" for _ in range(rng.randint(1, 4))]
+        scores = [rng.randint(0, 100) for _ in users]
+        matrix.record(users, scores, day=day)
+        for user_id, score in zip(users, scores):
+            written[(user_id, day)] = score
+
+        for user_id in {u for u, _ in written}:
+            window = matrix.user_window(user_id)
+            assert window.tolist() == _expected_window(written, user_id, day, 10)
+
+    column = matrix.day_column(day)
+    assert column.tolist() == [written.get((u, day), NO_SCORE) for u in matrix.user_ids]
+
+
+def test_reads_are_copies():
+    matrix = ScoreMatrix(days=5, slack=1)
+    matrix.record(["a"], [40], day=TODAY)
+    window = matrix.user_window("a")
+    # Sem folga: o próximo dia move a janela para o início da matriz
+    matrix.record(["a"], [70], day=TODAY + timedelta(days=1))
+    matrix.record(["a"], [90], day=TODAY + timedelta(days=2))
+    assert window.tolist() == [NO_SCORE] * 4 + [40]
+
+
+def test_load_keeps_scores_written_live():
+    matrix = ScoreMatrix(days=30)
+    matrix.record(["a", "c"], [80, 50], day=TODAY)
+
+    def entries():
+        yield ("a", TODAY, 20)
+        # Gravado ao vivo depois da leitura do banco
+        matrix.record(["a"], [90], day=TODAY)
+        yield ("a", TODAY - timedelta(days=1), 30)
+        yield ("b", TODAY, 10)
+        yield ("c", TODAY, 60)
+
+    matrix.load(entries())
+    assert matrix.user_window("a", 2).tolist() == [30, 90]
+    assert matrix.user_window("b", 1).tolist() == [10]
+    # Recarga: o banco (com o score de outro worker) substitui o valor antigo
+    assert matrix.user_window("c", 1).tolist() == [60]
+
+
+def test_load_concurrent_with_live_writes():
+    matrix = ScoreMatrix(days=60, slack=2, initial_capacity=4)
+    history = [
+        (f"old{u}", TODAY - timedelta(days=d), (u + d) % 100)
+        for u in range(300) for d in range(1, 60)
+    ]
+    loader = threading.Thread(target=matrix.load, args=(history,))
+    loader.start()
+    live = {}
+    while loader.is_alive() or len(live) < 50:
+        user_id = f"live{len(live) % 50}"
+        live[user_id] = len(live) % 100
+        matrix.record([user_id, "old0"], [live[user_id], 99], day=TODAY)
+        matrix.day_column(TODAY)
+        matrix.user_window("old0")
+    loader.join()
+
+    assert matrix.latest_day == TODAY
+    assert [matrix.user_window(u, 1)[0] for u in live] == list(live.values())
+    # Dias anteriores vieram do banco; hoje vale o score ao vivo
+    assert matrix.user_window("old0", 3).tolist() == [2, 1, 99]
+    assert matrix.user_window("old7", 3).tolist() == [9, 8, NO_SCORE]
+    assert all(matrix.user_window(f"old{u}", 2)[0] != NO_SCORE for u in range(300))
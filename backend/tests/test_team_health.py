@@ -0,0 +1,118 @@
+"""
+Testes dos agregados de equipe contra um recálculo completo
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from services.prediction_store import STATUSES, PredictionStore
+from services.score_matrix import status_for
+from services.team_health import PERCENTILES, RISK_THRESHOLD, TeamAggregates, TeamIndex
+
+
+@pytest.fixture
+def env(tmp_path):
+    store = PredictionStore(str(tmp_path / "p.db"))
+    index = TeamIndex(str(tmp_path / "t.db"))
+    aggregates = TeamAggregates(index, store, max_age_days=7, top_k=1000)
+    latest = {}
+
+    def predict(user_ids, scores):
+        # Mesma ordem de _record_predictions: banco, depois agregados
+        store.record(user_ids, scores, [status_for(s) for s in scores], [0.5] * len(scores))
+        aggregates.update(user_ids, scores)
+        latest.update(zip(user_ids, scores))
+
+    yield store, index, aggregates, latest, predict
+    store.close()
+
+
+def _check(aggregates, index, latest, team_id):
+    """Snapshot incremental == recálculo direto dos scores mais recentes"""
+    members = index.members(team_id).tolist()
+    scores = np.array([latest[u] for u in members if u in latest])
+    snapshot = aggregates.snapshot(team_id)
+
+    assert snapshot['members'] == len(members)
+    assert snapshot['members_with_score'] == len(scores)
+    assert snapshot['overall_score'] == (int(scores.sum()) // len(scores) if len(scores) else None)
+    assert snapshot['distribution'] == {s: sum(status_for(x) == s for x in scores) for s in STATUSES}
+    expected_percentiles = {f"p{p}": float(np.percentile(scores, p)) for p in PERCENTILES} if len(scores) else {}
+    assert snapshot['percentiles'] == pytest.approx(expected_percentiles)
+    at_risk = sorted((m['score'], m['user_id']) for m in snapshot['at_risk_members'])
+    assert at_risk == sorted((latest[u], u) for u in members if latest.get(u, 0) >= RISK_THRESHOLD)
+
+
+def test_overlapping_teams_match_full_recompute(env):
+    store, index, aggregates, latest, predict = env
+    rng = random.Random(11)
+    users = [f"u{i}" for i in range(12)]
+    teams = ["t0", "t1", "t2"]
+    for team_id in teams:
+        index.set_members(team_id, rng.sample(users, 6))
+
+    for step in range(300):
+        op = rng.random()
+        if op < 0.6:
+            picked = rng.sample(users, rng.randint(1, 4))
+            predict(picked, [rng.randint(0, 100) for _ in picked])
+        elif op < 0.85:
+            aggregates.rebuild(rng.choice(teams))
+        else:
+            team_id = rng.choice(teams)
+            index.set_members(team_id, rng.sample(users, rng.randint(2, 8)))
+            aggregates.rebuild(team_id)
+        for team_id in teams:
+            _check(aggregates, index, latest, team_id)
+
+    assert aggregates.reconcile() == 0
+
+
+def test_update_during_rebuild_is_replayed(env, monkeypatch):
+    store, index, aggregates, latest, predict = env
+    index.set_members("t", ["a", "b"])
+    predict(["a", "b"], [20, 30])
+    _check(aggregates, index, latest, "t")
+
+    read = store.latest_day_scores
+
+    def read_then_predict(user_ids, first_day):
+        result = read(user_ids, first_day)
+        # Chega enquanto a equipe é recalculada, depois da leitura do banco
+        monkeypatch.setattr(store, "latest_day_scores", read)
+        predict(["a"], [95])
+        aggregates.flush()
+        return result
+
+    monkeypatch.setattr(store, "latest_day_scores", read_then_predict)
+    aggregates.rebuild("t")
+    _check(aggregates, index, latest, "t")
+
+
+def test_reconcile_includes_scores_from_other_workers(env, tmp_path):
+    store, index, aggregates, latest, predict = env
+    index.set_members("t", ["a", "b", "c"])
+    predict(["a"], [40])
+    _check(aggregates, index, latest, "t")
+
+    # Outro worker grava no mesmo banco; este processo não recebe o evento
+    other = PredictionStore(store.path)
+    other.record(["b", "c"], [85, 10], ["Crítico", "Saudável"], [0.5, 0.5])
+    other.close()
+    latest.update(b=85, c=10)
+
+    assert aggregates.reconcile() == 1
+    _check(aggregates, index, latest, "t")
+
+
+def test_updates_are_applied_by_the_background_thread(env):
+    store, index, aggregates, latest, predict = env
+    index.set_members("t", ["a"])
+    aggregates.snapshot("t")
+    aggregates.start()
+    predict(["a"], [70])
+    aggregates.close()
+    assert aggregates.stats()['pending'] == 0
+    _check(aggregates, index, latest, "t")
@@ -1,10 +1,18 @@
 """
 Script de Treinamento do Modelo LSTM
-Execute: python train_model.py
+Execute: python train_model.py [--shards models/dataset --samples 10000000]
 """
 
+import argparse
 import numpy as np
 import os
+import json
+import time
+
+try:
+    import resource  # pico de RSS (indisponível no Windows)
+except ImportError:
+    resource = None
 
 # Verificar se TensorFlow está disponível
 try:
@@ -15,22 +23,19 @@ try:
     from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
     from sklearn.model_selection import train_test_split
     import matplotlib.pyplot as plt
+    from ml.synthetic_data import generate_synthetic_data
+    from ml.dataset_shards import ShardedDataset, write_shards
+    from ml.dataset_cache import DEFAULT_CACHE_DIR, DatasetCache, dataset_key, dataset_params
+    from ml.numpy_runtime import PRECISIONS, NumpyLSTMModel, default_weights_path, export_weights
     TENSORFLOW_AVAILABLE = True
 except ImportError:
     TENSORFLOW_AVAILABLE = False
     print(" TensorFlow não disponível - instale com: pip install tensorflow")
     exit(1)
 
-# Criar pasta de modelos
-os.makedirs("models", exist_ok=True)
-
-print("=" * 60)
-print(" OÁSÎS - TREINAMENTO DO MODELO LSTM")
-print("=" * 60)
-
 # ==================== GERAÇÃO DE DATASET ====================
 
-def generate_dataset(n_samples=5000, sequence_length=30, n_features=8):
+def generate_dataset(n_samples=5000, sequence_length=30, n_features=8, rng=None):
     """
     Gera dataset sintético para treinamento
     
@@ -42,73 +47,7 @@ def generate_dataset(n_samples=5000, sequence_length=30, n_features=8):
     """
     print("\n📊 Gerando dataset sintético...")
     
-    X = []
-    y = []
-    
-    for _ in range(n_samples):
-        # Escolhe classe aleatória
-        class_id = np.random.choice([0, 1, 2, 3], p=[0.4, 0.3, 0.2, 0.1])
-        
-        # Gera sequência de 30 dias
-        sequence = []
-        
-        for day in range(sequence_length):
-            if class_id == 0:  # Saudável
-                features = [
-                    np.random.uniform(6, 8),        # horas_trabalhadas
-                    np.random.randint(2, 5),        # reunioes
-                    np.random.uniform(90, 120),     # tempo_pausas
-                    0,                               # trabalho_noturno
-                    0,                               # fim_de_semana
-                    np.random.uniform(30, 45),      # duracao_reunioes
-                    np.random.uniform(0, 0.1),      # sobreposicao
-                    np.random.uniform(60, 120)      # tempo_resposta
-                ]
-            elif class_id == 1:  # Atenção
-                features = [
-                    np.random.uniform(8, 9.5),
-                    np.random.randint(5, 7),
-                    np.random.uniform(60, 90),
-                    np.random.choice([0, 1], p=[0.7, 0.3]),
-                    np.random.choice([0, 1], p=[0.8, 0.2]),
-                    np.random.uniform(45, 60),
-                    np.random.uniform(0.1, 0.3),
-                    np.random.uniform(30, 60)
-                ]
-            elif class_id == 2:  # Risco
-                features = [
-                    np.random.uniform(9.5, 11),
-                    np.random.randint(7, 10),
-                    np.random.uniform(30, 60),
-                    np.random.choice([0, 1], p=[0.4, 0.6]),
-                    np.random.choice([0, 1], p=[0.5, 0.5]),
-                    np.random.uniform(60, 90),
-                    np.random.uniform(0.3, 0.5),
-                    np.random.uniform(10, 30)
-                ]
-            else:  # Crítico
-                features = [
-                    np.random.uniform(11, 14),
-                    np.random.randint(10, 15),
-                    np.random.uniform(10, 30),
-                    np.random.choice([0, 1], p=[0.2, 0.8]),
-                    np.random.choice([0, 1], p=[0.3, 0.7]),
-                    np.random.uniform(90, 120),
-                    np.random.uniform(0.5, 0.8),
-                    np.random.uniform(5, 10)
-                ]
-            
-            sequence.append(features)
-        
-        X.append(sequence)
-        
-        # One-hot encode
-        label = [0, 0, 0, 0]
-        label[class_id] = 1
-        y.append(label)
-    
-    X = np.array(X)
-    y = np.array(y)
+    X, y = generate_synthetic_data(n_samples, sequence_length, rng=rng)
     
     print(f"✅ Dataset gerado: {X.shape}")
     print(f"   - Amostras: {n_samples}")
@@ -120,51 +59,148 @@ def generate_dataset(n_samples=5000, sequence_length=30, n_features=8):
 
 # ==================== CONSTRUÇÃO DO MODELO ====================
 
-def build_model(sequence_length=30, n_features=8):
-    """Constrói arquitetura LSTM"""
-    print("\n🏗️ Construindo modelo LSTM...")
-    
-    model = Sequential([
-        # Camada LSTM 1
-        LSTM(128, return_sequences=True, input_shape=(sequence_length, n_features)),
-        Dropout(0.3),
-        
-        # Camada LSTM 2
-        LSTM(64, return_sequences=True),
-        Dropout(0.3),
-        
-        # Camada LSTM 3
-        LSTM(32),
-        
-        # Camadas Densas
-        Dense(64, activation='relu'),
-        Dropout(0.2),
-        Dense(32, activation='relu'),
-        
-        # Saída
-        Dense(4, activation='softmax')
-    ])
+def build_model(sequence_length=30, n_features=8, lstm_units=(128, 64, 32),
+                lstm_dropout=0.3, dense_units=(64, 32), dense_dropout=0.2,
+                learning_rate=0.001, jit_compile=False, verbose=True):
+    """Constrói arquitetura LSTM (padrões = modelo de produção)"""
+    if verbose:
+        print("\n🏗️ Construindo modelo LSTM...")
+    
+    layers = [keras.Input(shape=(sequence_length, n_features))]
+    
+    # Camadas LSTM: todas menos a última devolvem a sequência inteira
+    for i, units in enumerate(lstm_units):
+        last = i == len(lstm_units) - 1
+        layers.append(LSTM(units, return_sequences=not last))
+        if not last and lstm_dropout > 0:
+            layers.append(Dropout(lstm_dropout))
+    
+    # Camadas Densas: dropout só depois da primeira
+    for i, units in enumerate(dense_units):
+        layers.append(Dense(units, activation='relu'))
+        if i == 0 and dense_dropout > 0:
+            layers.append(Dropout(dense_dropout))
+    
+    # Saída
+    layers.append(Dense(4, activation='softmax'))
+    
+    model = Sequential(layers)
     
     model.compile(
-        optimizer=keras.optimizers.Adam(learning_rate=0.001),
+        optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
         loss='categorical_crossentropy',
-        metrics=['accuracy', 'precision', 'recall']
+        metrics=['accuracy', 'precision', 'recall'],
+        jit_compile=jit_compile
     )
     
-    print(" Modelo construído")
-    print(f"   - Total de parâmetros: {model.count_params():,}")
-    
-    model.summary()
+    if verbose:
+        print(" Modelo construído")
+        print(f"   - Total de parâmetros: {model.count_params():,}")
+        model.summary()
     
     return model
 
-# ==================== TREINAMENTO ====================
+# ==================== THROUGHPUT DE CPU ====================
 
-def train_model(model, X_train, y_train, X_val, y_val, epochs=50):
-    """Treina o modelo"""
-    print("\n Iniciando treinamento...")
+BASE_BATCH_SIZE = 32
+LR_SCALING = ("none", "linear", "sqrt")
+
+def configure_threads(intra_op=0, inter_op=0):
+    """Threads do TensorFlow (0 = padrão); precisa rodar antes da primeira operação"""
+    if intra_op:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+    if inter_op:
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+
+def scaled_learning_rate(base_lr, batch_size, scaling="none"):
+    """Learning rate ajustado para batches maiores que BASE_BATCH_SIZE"""
+    ratio = batch_size / BASE_BATCH_SIZE
+    if scaling == "linear":
+        return base_lr * ratio
+    if scaling == "sqrt":
+        return base_lr * ratio ** 0.5
+    return base_lr
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024
+
+class ThroughputLogger(keras.callbacks.Callback):
+    """
+    Registra amostras/s, tempo de parede e pico de RSS por época
+
+    `samples_per_second` conta só os passos de treino: o tempo da
+    validação de cada época (on_test_begin/on_test_end, chamados pelo
+    fit) é descontado e registrado à parte em `validation_seconds`.
+    `end_to_end_samples_per_second` usa a época inteira.
+
+    O JSON é reescrito ao fim de cada época, então um treino
+    interrompido ainda deixa as épocas concluídas registradas.
+    """
     
-    # Callbacks
+    def __init__(self, path, samples_per_epoch, config=None):
+        super().__init__()
+        self.path = path
+        self.samples_per_epoch = samples_per_epoch
+        self.config = config or {}
+        self.epochs = []
+    
+    def on_train_begin(self, logs=None):
+        self.train_start = time.perf_counter()
+    
+    def on_epoch_begin(self, epoch, logs=None):
+        self.epoch_start = time.perf_counter()
+        self.validation_seconds = 0.0
+    
+    def on_test_begin(self, logs=None):
+        self.test_start = time.perf_counter()
+    
+    def on_test_end(self, logs=None):
+        self.validation_seconds += time.perf_counter() - self.test_start
+    
+    def on_epoch_end(self, epoch, logs=None):
+        wall = time.perf_counter() - self.epoch_start
+        train = wall - self.validation_seconds
+        self.epochs.append({
+            'epoch': epoch + 1,
+            'wall_seconds': wall,
+            'train_seconds': train,
+            'validation_seconds': self.validation_seconds,
+            'samples_per_second': self.samples_per_epoch / train if train > 0 else None,
+            'end_to_end_samples_per_second': self.samples_per_epoch / wall if wall else None,
+            'peak_rss_mb': peak_rss_mb(),
+            **{k: float(v) for k, v in (logs or {}).items()}
+        })
+        self._write()
+    
+    def on_train_end(self, logs=None):
+        self._write()
+        if self.epochs:
+            rates = [e['samples_per_second'] for e in self.epochs if e['samples_per_second']]
+            print(f"\n Throughput de treino: {np.median(rates):,.0f} amostras/s (mediana, sem a validação), "
+                  f"pico de RSS {self.epochs[-1]['peak_rss_mb'] or 0:.0f} MB")
+            print(f" Métricas de treino salvas em: {self.path}")
+    
+    def _write(self):
+        rates = [e['samples_per_second'] for e in self.epochs if e['samples_per_second']]
+        report = {
+            'config': self.config,
+            'samples_per_epoch': self.samples_per_epoch,
+            'total_wall_seconds': time.perf_counter() - self.train_start,
+            'median_samples_per_second': float(np.median(rates)) if rates else None,
+            'peak_rss_mb': peak_rss_mb(),
+            'epochs': self.epochs
+        }
+        with open(self.path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+# ==================== TREINAMENTO ====================
+
+def training_callbacks():
+    """Early stopping e checkpoint do melhor modelo"""
     early_stop = EarlyStopping(
         monitor='val_loss',
         patience=10,
@@ -179,13 +215,38 @@ def train_model(model, X_train, y_train, X_val, y_val, epochs=50):
         verbose=1
     )
     
+    return [early_stop, checkpoint]
+
+def train_model(model, X_train, y_train, X_val, y_val, epochs=50,
+                batch_size=32, extra_callbacks=()):
+    """Treina o modelo"""
+    print("\n Iniciando treinamento...")
+    
     # Treinamento
     history = model.fit(
         X_train, y_train,
         validation_data=(X_val, y_val),
         epochs=epochs,
-        batch_size=32,
-        callbacks=[early_stop, checkpoint],
+        batch_size=batch_size,
+        callbacks=training_callbacks() + list(extra_callbacks),
+        verbose=1
+    )
+    
+    return history
+
+def train_model_streaming(model, train_data, val_data, epochs=50,
+                          batch_size=32, shuffle_buffer=10000, seed=42,
+                          extra_callbacks=()):
+    """Treina lendo os shards em streaming (memória limitada)"""
+    print("\n Iniciando treinamento out-of-core...")
+    print(f"   - Treino: {len(train_data):,} amostras em disco")
+    print(f"   - Validação: {len(val_data):,} amostras em disco")
+    
+    history = model.fit(
+        train_data.tf_dataset(batch_size, shuffle_buffer, seed=seed),
+        validation_data=val_data.tf_dataset(batch_size, shuffle_buffer=0),
+        epochs=epochs,
+        callbacks=training_callbacks() + list(extra_callbacks),
         verbose=1
     )
     
@@ -193,8 +254,8 @@ def train_model(model, X_train, y_train, X_val, y_val, epochs=50):
 
 # ==================== AVALIAÇÃO ====================
 
-def evaluate_model(model, X_test, y_test):
-    """Avalia o modelo"""
+def evaluate_model(model, X_test, y_test=None):
+    """Avalia o modelo (arrays ou tf.data.Dataset com y_test=None)"""
     print("\n Avaliando modelo...")
     
     results = model.evaluate(X_test, y_test, verbose=0)
@@ -244,19 +305,187 @@ def plot_history(history):
     plt.savefig('models/training_history.png', dpi=300, bbox_inches='tight')
     print(" Gráficos salvos em: models/training_history.png")
 
+# ==================== QUANTIZAÇÃO ====================
+
+def measure_latency(predict_fn, X, repeats):
+    """Mediana do tempo de uma chamada de predição, em ms"""
+    predict_fn(X)  # aquecimento
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict_fn(X)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+def export_quantized_variants(h5_path='models/burnout_predictor.h5'):
+    """Exporta os pesos em cada precisão para o runtime NumPy"""
+    print("\n Exportando variantes para o runtime NumPy...")
+    paths = {}
+    for precision in PRECISIONS:
+        paths[precision] = default_weights_path(h5_path, precision)
+        export_weights(h5_path, paths[precision], precision)
+        print(f"   - {precision}: {paths[precision]}")
+    return paths
+
+def quantization_report(X_test, y_test, weight_paths, batch_size=256,
+                        h5_path='models/burnout_predictor.h5',
+                        report_path='models/quantization_report.json'):
+    """
+    Compara acurácia, tamanho e latência de CPU de cada variante
+    
+    A referência Keras também é lida do .h5 (pesos do ModelCheckpoint),
+    o mesmo arquivo de onde as variantes NumPy foram exportadas.
+    `size_bytes` é o tamanho do arquivo: em memória todas as variantes
+    NumPy ocupam o mesmo (pesos convertidos para float32 na carga).
+    """
+    print("\n Comparando variantes (acurácia x latência)...")
+    model = keras.models.load_model(h5_path, compile=False)
+    
+    X_test = X_test.astype(np.float32)
+    labels = np.argmax(y_test, axis=1)
+    single = X_test[:1]
+    batch = X_test[:batch_size]
+    
+    variants = [('keras-float32', h5_path, lambda X: model.predict(X, verbose=0))]
+    for precision, path in weight_paths.items():
+        variants.append((f'numpy-{precision}', path, NumpyLSTMModel.load(path).predict))
+    
+    report = []
+    for name, path, predict_fn in variants:
+        accuracy = float(np.mean(np.argmax(predict_fn(X_test), axis=1) == labels))
+        batch_ms = measure_latency(predict_fn, batch, repeats=10)
+        report.append({
+            'variant': name,
+            'path': path,
+            'size_bytes': os.path.getsize(path),
+            'test_accuracy': accuracy,
+            'single_latency_ms': measure_latency(predict_fn, single, repeats=50),
+            'batch_size': len(batch),
+            'batch_latency_ms': batch_ms,
+            'batch_latency_per_sample_ms': batch_ms / len(batch)
+        })
+    
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    
+    print("\n" + "=" * 60)
+    print(f"{'Variante':<16}{'Acc':>8}{'KB':>9}{'1 amostra':>12}{'lote/amostra':>15}")
+    for row in report:
+        print(
+            f"{row['variant']:<16}{row['test_accuracy']:>8.4f}"
+            f"{row['size_bytes'] / 1024:>9.0f}"
+            f"{row['single_latency_ms']:>10.2f}ms"
+            f"{row['batch_latency_per_sample_ms']:>13.3f}ms"
+        )
+    print("=" * 60)
+    print(f" Relatório salvo em: {report_path}")
+    
+    return report
+
 # ==================== MAIN ====================
 
 if __name__ == "__main__":
-    # Gerar dataset
-    X, y = generate_dataset(n_samples=5000)
+    # Criar pasta de modelos
+    os.makedirs("models", exist_ok=True)
     
-    # Split
-    X_train, X_temp, y_train, y_temp = train_test_split(
-        X, y, test_size=0.3, random_state=42, stratify=y
-    )
-    X_val, X_test, y_val, y_test = train_test_split(
-        X_temp, y_temp, test_size=0.33, random_state=42, stratify=y_temp
-    )
+    print("=" * 60)
+    print(" OÁSÎS - TREINAMENTO DO MODELO LSTM")
+    print("=" * 60)
+    
+    parser = argparse.ArgumentParser(description="Treinamento do modelo LSTM")
+    parser.add_argument("--samples", type=int, default=5000)
+    parser.add_argument("--shards", help="diretório de shards .npy (treino out-of-core)")
+    parser.add_argument("--shard-size", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processos para gerar os shards")
+    parser.add_argument("--batch-size", type=int, default=BASE_BATCH_SIZE)
+    parser.add_argument("--learning-rate", type=float, default=0.001,
+                        help=f"learning rate para batch {BASE_BATCH_SIZE}")
+    parser.add_argument("--lr-scaling", choices=LR_SCALING, default="none",
+                        help="ajuste do learning rate para batches maiores")
+    parser.add_argument("--intra-op-threads", type=int, default=0, help="0 = padrão do TensorFlow")
+    parser.add_argument("--inter-op-threads", type=int, default=0, help="0 = padrão do TensorFlow")
+    parser.add_argument("--xla", action="store_true", help="compilação JIT com XLA")
+    parser.add_argument("--shuffle-buffer", type=int, default=10000)
+    parser.add_argument("--epochs", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dataset-cache", default=os.getenv("DATASET_CACHE_DIR", DEFAULT_CACHE_DIR),
+                        help="diretório do cache de datasets")
+    parser.add_argument("--no-dataset-cache", action="store_true",
+                        help="sempre regenerar o dataset")
+    args = parser.parse_args()
+    
+    configure_threads(args.intra_op_threads, args.inter_op_threads)
+    learning_rate = scaled_learning_rate(args.learning_rate, args.batch_size, args.lr_scaling)
+    throughput_config = {
+        'batch_size': args.batch_size,
+        'learning_rate': learning_rate,
+        'lr_scaling': args.lr_scaling,
+        'intra_op_threads': tf.config.threading.get_intra_op_parallelism_threads(),
+        'inter_op_threads': tf.config.threading.get_inter_op_parallelism_threads(),
+        'xla': args.xla,
+        'cpu_count': os.cpu_count()
+    }
+    throughput_path = 'models/training_throughput.json'
+    print(f"\n⚙️ batch={args.batch_size} lr={learning_rate:g} xla={args.xla} "
+          f"threads intra/inter={args.intra_op_threads or 'auto'}/{args.inter_op_threads or 'auto'}")
+    
+    if args.shards:
+        # Dataset em disco: só os batches em uso ficam na memória.
+        # Cada conjunto de parâmetros tem seu subdiretório em --shards
+        params = dict(dataset_params(args.samples, seed=args.seed), shard_size=args.shard_size)
+        shard_dir = os.path.join(args.shards, dataset_key(params))
+        if args.no_dataset_cache or not ShardedDataset.exists(shard_dir):
+            print(f"\n📊 Gerando {args.samples:,} amostras em shards de {args.shard_size:,} "
+                  f"({args.workers} processo(s))...")
+            start = time.perf_counter()
+            write_shards(shard_dir, args.samples, args.shard_size,
+                         seed=args.seed, workers=args.workers)
+            print(f"   - Concluído em {time.perf_counter() - start:.1f}s")
+        else:
+            print(f"\n📊 Shards em cache: {shard_dir}")
+        dataset = ShardedDataset(shard_dir)
+        train_data, val_data, test_data = dataset.split(validation=0.2, test=0.1)
+        
+        model = build_model(dataset.sequence_length, dataset.n_features,
+                            learning_rate=learning_rate, jit_compile=args.xla)
+        history = train_model_streaming(
+            model, train_data, val_data, epochs=args.epochs,
+            batch_size=args.batch_size, shuffle_buffer=args.shuffle_buffer, seed=args.seed,
+            extra_callbacks=[ThroughputLogger(throughput_path, len(train_data), throughput_config)]
+        )
+        results = evaluate_model(model, test_data.tf_dataset(args.batch_size, shuffle_buffer=0))
+        plot_history(history)
+        
+        # Relatório de quantização sobre uma amostra limitada do teste
+        X_test, y_test = test_data.sample(20000, seed=args.seed)
+        weight_paths = export_quantized_variants()
+        quantization_report(X_test, y_test, weight_paths)
+        
+        print("\n Treinamento concluído!")
+        print(" Modelo salvo em: models/burnout_predictor.h5")
+        raise SystemExit(0)
+    
+    if args.no_dataset_cache:
+        # Gerar dataset
+        X, y = generate_dataset(n_samples=args.samples, rng=args.seed)
+        
+        # Split
+        X_train, X_temp, y_train, y_temp = train_test_split(
+            X, y, test_size=0.3, random_state=42, stratify=y
+        )
+        X_val, X_test, y_val, y_test = train_test_split(
+            X_temp, y_temp, test_size=0.33, random_state=42, stratify=y_temp
+        )
+    else:
+        # Dataset e split reaproveitados entre execuções com os mesmos parâmetros
+        start = time.perf_counter()
+        data = DatasetCache(args.dataset_cache).load_or_generate(args.samples, seed=args.seed)
+        X_train, y_train = data.subset('train')
+        X_val, y_val = data.subset('val')
+        X_test, y_test = data.subset('test')
+        origin = "carregado do cache" if data.hit else "gerado e salvo no cache"
+        print(f"\n📊 Dataset {data.key} {origin} em {(time.perf_counter() - start) * 1000:.0f}ms")
     
     print(f"\n Split de dados:")
     print(f"   - Treino: {len(X_train)} amostras")
@@ -264,10 +493,13 @@ if __name__ == "__main__":
     print(f"   - Teste: {len(X_test)} amostras")
     
     # Construir modelo
-    model = build_model()
+    model = build_model(learning_rate=learning_rate, jit_compile=args.xla)
     
     # Treinar
-    history = train_model(model, X_train, y_train, X_val, y_val, epochs=50)
+    history = train_model(
+        model, X_train, y_train, X_val, y_val, epochs=args.epochs, batch_size=args.batch_size,
+        extra_callbacks=[ThroughputLogger(throughput_path, len(X_train), throughput_config)]
+    )
     
     # Avaliar
     results = evaluate_model(model, X_test, y_test)
@@ -275,6 +507,12 @@ if __name__ == "__main__":
     # Plotar
     plot_history(history)
     
+    # Exportar pesos para o runtime NumPy (inferência sem TensorFlow),
+    # em float32 e nas variantes quantizadas
+    weight_paths = export_quantized_variants()
+    quantization_report(X_test, y_test, weight_paths)
+    
     print("\n Treinamento concluído!")
     print(" Modelo salvo em: models/burnout_predictor.h5")
+    print(" Pesos NumPy salvos em: models/burnout_predictor[.float16|.int8].npz")
     print("\n OÁSÎS está pronto para uso!")
\ No newline at end of file